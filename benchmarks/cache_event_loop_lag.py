@@ -0,0 +1,98 @@
+"""Event-loop lag under concurrent session writes: blocking ``set`` vs ``aset``.
+
+Run from the directory that contains the ``happyrav`` package::
+
+    python -m happyrav.benchmarks.cache_event_loop_lag --sessions 32 --writes 10
+
+A probe coroutine sleeps for ``--tick-ms`` in a loop and records how late it
+wakes up. With the blocking API every pickle/write runs on the loop and the
+probe's lateness grows with the payload; with ``aset`` it stays near zero.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from happyrav.models import SessionState
+from happyrav.services import cache as cache_module
+
+
+def _record(cache, doc_bytes: int) -> cache_module.SessionRecord:
+    session_id = cache.create_session_id()
+    now = time.time()
+    state = SessionState(session_id=session_id, created_at=now, expires_at=now + cache.ttl_seconds)
+    return cache_module.SessionRecord(state=state, document_texts={"cv.pdf": "x" * doc_bytes})
+
+
+async def _probe(stop: asyncio.Event, tick: float, lags: List[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(tick)
+        lags.append(max(0.0, time.perf_counter() - start - tick))
+
+
+async def _writer(cache, record, writes: int, use_async: bool) -> None:
+    for i in range(writes):
+        record.state.answers["step"] = str(i)
+        if use_async:
+            await cache.aset(record)
+        else:
+            cache.set(record)
+            await asyncio.sleep(0)
+
+
+async def _run(cache, sessions: int, writes: int, doc_bytes: int, tick: float, use_async: bool) -> Dict[str, float]:
+    records = [_record(cache, doc_bytes) for _ in range(sessions)]
+    lags: List[float] = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe(stop, tick, lags))
+    await asyncio.sleep(tick * 2)
+    started = time.perf_counter()
+    await asyncio.gather(*(_writer(cache, r, writes, use_async) for r in records))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+    lags.sort()
+    return {
+        "elapsed_s": elapsed,
+        "lag_p50_ms": statistics.median(lags) * 1000 if lags else 0.0,
+        "lag_p99_ms": lags[int(len(lags) * 0.99) - 1] * 1000 if lags else 0.0,
+        "lag_max_ms": lags[-1] * 1000 if lags else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=cache_module.SESSION_BACKENDS, default="pickle")
+    parser.add_argument("--sessions", type=int, default=32)
+    parser.add_argument("--writes", type=int, default=10)
+    parser.add_argument("--doc-kb", type=int, default=512, help="document text per session")
+    parser.add_argument("--tick-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_module.DATA_DIR = Path(tmp)
+        if args.backend == "sqlite":
+            cache = cache_module.SqliteSessionCache(ttl_seconds=3600)
+        else:
+            # Disable the hot tier so both modes pay the same disk cost.
+            cache = cache_module.SessionCache(ttl_seconds=3600, hot_max_entries=0)
+        print(f"backend={args.backend} sessions={args.sessions} writes={args.writes} doc={args.doc_kb}KB")
+        for label, use_async in (("blocking set", False), ("aset", True)):
+            result = asyncio.run(
+                _run(cache, args.sessions, args.writes, args.doc_kb * 1024, args.tick_ms / 1000, use_async)
+            )
+            print(
+                f"{label:>13}: total {result['elapsed_s']:.2f}s  "
+                f"lag p50 {result['lag_p50_ms']:.1f}ms  p99 {result['lag_p99_ms']:.1f}ms  "
+                f"max {result['lag_max_ms']:.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Per-call latency of a fresh SDK client per request vs the shared pooled client.
+
+Run from the directory that contains the ``happyrav`` package::
+
+    python -m happyrav.benchmarks.llm_client_pool --calls 200 --concurrency 8
+
+Starts a local OpenAI-compatible mock server (HTTP/1.1 keep-alive, optional
+``--latency-ms`` think time) and times ``chat.completions.create`` calls made
+the old way (a new ``OpenAI`` client, hence a new connection, per call) and
+through ``services/llm_clients.py``. Against a real API the fresh-client cost
+also includes a TLS handshake, so the gap there is larger than measured here.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List
+
+from openai import AsyncOpenAI, OpenAI
+
+from happyrav.services import llm_clients
+
+_COMPLETION = {
+    "id": "chatcmpl-bench",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "mock",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "{\"ok\": true}"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 10, "completion_tokens": 3, "total_tokens": 13},
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    latency = 0.0
+    connections = 0
+
+    def setup(self) -> None:
+        super().setup()
+        type(self).connections += 1
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.latency:
+            time.sleep(self.latency)
+        body = json.dumps(_COMPLETION).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1] * 1000, 3),
+        "total_s": round(sum(ordered), 3),
+    }
+
+
+def _call(client) -> None:
+    client.chat.completions.create(model="mock", messages=[{"role": "user", "content": "hi"}], max_tokens=5)
+
+
+def _run_sync(calls: int, get_client: Callable[[], OpenAI]) -> Dict[str, float]:
+    samples = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        _call(get_client())
+        samples.append(time.perf_counter() - started)
+    return _percentiles(samples)
+
+
+async def _run_async(calls: int, concurrency: int, get_client: Callable[[], AsyncOpenAI]) -> Dict[str, float]:
+    samples: List[float] = []
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with gate:
+            started = time.perf_counter()
+            await get_client().chat.completions.create(
+                model="mock", messages=[{"role": "user", "content": "hi"}], max_tokens=5
+            )
+            samples.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return _percentiles(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    _Handler.latency = args.latency_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    results = {}
+    for name, get_client in (
+        ("sync fresh client", lambda: OpenAI(api_key="bench", base_url=base_url)),
+        ("sync pooled client", lambda: llm_clients.openai_client("bench", base_url)),
+    ):
+        _Handler.connections = 0
+        results[name] = {**_run_sync(args.calls, get_client), "connections": _Handler.connections}
+
+    async def run_async() -> None:
+        for name, get_client in (
+            ("async fresh client", lambda: AsyncOpenAI(api_key="bench", base_url=base_url)),
+            ("async pooled client", lambda: llm_clients.async_openai_client("bench", base_url)),
+        ):
+            _Handler.connections = 0
+            stats = await _run_async(args.calls, args.concurrency, get_client)
+            results[name] = {**stats, "connections": _Handler.connections}
+        await llm_clients.pool.aclose()
+
+    asyncio.run(run_async())
+    server.shutdown()
+
+    print(f"{args.calls} calls, concurrency {args.concurrency} (async), server latency {args.latency_ms} ms")
+    for name, stats in results.items():
+        print(f"  {name:20s} {stats}")
+
+
+if __name__ == "__main__":
+    main()
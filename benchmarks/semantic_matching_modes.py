@@ -0,0 +1,197 @@
+"""Latency and tokens of the three-call semantic match vs ``HAPPYRAV_MATCHING_MODE=fast``.
+
+Run from the directory that contains the ``happyrav`` package::
+
+    python -m happyrav.benchmarks.semantic_matching_modes --runs 10
+
+By default the calls go to a local OpenAI-compatible mock server. It answers
+each prompt with a canned JSON payload of realistic size and reports
+``usage`` from the local token counter. It then sleeps ``--latency-ms`` plus
+``--ms-per-token`` for each completion token, which roughly models a
+provider's time to first token and decode speed. With ``--live`` the same
+prompts go to the configured OpenAI endpoint (``OPENAI_API_KEY``,
+``OPENAI_BASE_URL``) and the provider reports the tokens.
+
+The standard path is timed the way preview-match runs it: keywords, then the
+skill match, with gap detection running alongside.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+from happyrav.models import ExperienceItem, ExtractedProfile
+from happyrav.services import llm_clients, llm_matching, llm_metrics
+from happyrav.services.prompt_budget import count_tokens
+
+JOB_AD = """Senior Backend Engineer (80-100%), Zürich, hybrid
+
+You build and run the payment APIs of a fast-growing fintech. You design services in Python and Go,
+own them in production on AWS (ECS, Lambda, RDS) and mentor two junior engineers.
+
+Must have: 5+ years backend development, Python, PostgreSQL, REST API design, Docker, CI/CD,
+AWS, observability (Prometheus, Grafana). Nice to have: Go, Kafka, PCI DSS, Terraform.
+German and English; strong communication with product and compliance teams.
+"""
+
+PROFILE = ExtractedProfile(
+    full_name="Jane Doe",
+    summary="Backend engineer with eight years of API and data platform work.",
+    skills=["Python", "Django", "PostgreSQL", "Docker", "GCP", "GitLab CI", "Grafana", "Team lead"],
+    experience=[
+        ExperienceItem(role="Lead Backend Engineer", company="Acme Insurance", period="2020-2025",
+                       achievements=["Led a team of 4", "Cut API latency by 40%", "Moved services to GCP Kubernetes"]),
+        ExperienceItem(role="Backend Engineer", company="Shopline", period="2016-2020",
+                       achievements=["Built the order REST API", "Introduced PostgreSQL partitioning"]),
+    ],
+)
+
+_SKILLS = ["Python", "PostgreSQL", "REST API design", "Docker", "CI/CD", "AWS", "Prometheus", "Grafana"]
+_NICE = ["Go", "Kafka", "PCI DSS", "Terraform"]
+_REQUIREMENTS = {
+    "required_hard_skills": [
+        {"skill": skill, "alternatives": [f"{skill} experience", f"{skill} development"], "criticality": 0.9}
+        for skill in _SKILLS
+    ],
+    "required_soft_skills": [
+        {"skill": "mentoring", "alternatives": ["coaching", "led team"], "criticality": 0.7},
+        {"skill": "communication", "alternatives": ["stakeholder management"], "criticality": 0.7},
+    ],
+    "nice_to_have": [{"skill": skill, "alternatives": [], "criticality": 0.4} for skill in _NICE],
+    "experience_years": {"minimum": 5, "role": "backend development"},
+    "industry_context": "fintech payments",
+}
+_MATCH = {
+    "matched_hard_skills": [
+        {"skill": skill, "evidence": f"{skill} listed in skills and used at Acme Insurance", "confidence": 0.9}
+        for skill in ("Python", "PostgreSQL", "REST API design", "Docker", "CI/CD", "Grafana")
+    ],
+    "matched_soft_skills": [{"skill": "mentoring", "evidence": "Led a team of 4", "confidence": 0.85}],
+    "missing_critical": ["AWS", "Prometheus"],
+    "transferable_matches": [{"cv_has": "GCP", "job_needs": "AWS", "confidence": 0.7}],
+    "overall_fit": 0.72,
+}
+_GAPS = [
+    {"gap_type": "skill", "missing": "AWS", "severity": "important", "substitutable": True,
+     "suggestions": "Describe the GCP migration in cloud-neutral terms and name the managed services used."},
+    {"gap_type": "skill", "missing": "Prometheus", "severity": "nice-to-have", "substitutable": True,
+     "suggestions": "Mention the metrics behind the Grafana dashboards."},
+    {"gap_type": "certification", "missing": "PCI DSS", "severity": "nice-to-have", "substitutable": False,
+     "suggestions": "Point out payment-adjacent compliance work if any."},
+]
+
+# Canned answer per system prompt of the matching calls.
+_ANSWERS = {
+    "recruitment analyst and CV matching expert": {"requirements": _REQUIREMENTS, "match": _MATCH, "gaps": _GAPS},
+    "recruitment analyst": _REQUIREMENTS,
+    "CV matching expert": _MATCH,
+    "recruitment consultant": {"gaps": _GAPS},
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    latency = 0.3
+    per_token = 0.005
+
+    def do_POST(self) -> None:
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)))
+        system, user = (message["content"] for message in request["messages"])
+        answer = next(payload for marker, payload in _ANSWERS.items() if marker in system)
+        content = json.dumps(answer)
+        prompt_tokens = count_tokens(system) + count_tokens(user)
+        completion_tokens = count_tokens(content)
+        time.sleep(self.latency + completion_tokens * self.per_token)
+        body = json.dumps({
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": 0,
+            "model": request["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+async def _standard() -> None:
+    async def keywords_then_match() -> None:
+        keywords = await llm_matching.extract_semantic_keywords(JOB_AD, "en")
+        await llm_matching.match_skills_semantic(
+            cv_skills=PROFILE.skills_str,
+            cv_experience=[exp.model_dump() for exp in PROFILE.experience],
+            semantic_keywords=keywords,
+        )
+
+    await asyncio.gather(keywords_then_match(), llm_matching.detect_contextual_gaps(PROFILE, JOB_AD, "en"))
+
+
+async def _fast() -> None:
+    await llm_matching.match_semantic_fast(PROFILE, JOB_AD, "en")
+
+
+async def _measure(runs: int) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    for name, path in (("standard (3 calls)", _standard), ("fast (1 call)", _fast)):
+        llm_metrics.registry = llm_metrics.Registry()
+        samples: List[float] = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            await path()
+            samples.append(time.perf_counter() - started)
+        registry = llm_metrics.registry
+        results[name] = {
+            "p50_ms": round(statistics.median(samples) * 1000, 1),
+            "max_ms": round(max(samples) * 1000, 1),
+            "calls": int(registry.value("happyrav_llm_calls_total") / runs),
+            "prompt_tokens": int(registry.value("happyrav_llm_prompt_tokens_total") / runs),
+            "completion_tokens": int(registry.value("happyrav_llm_completion_tokens_total") / runs),
+        }
+    await llm_clients.pool.aclose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--ms-per-token", type=float, default=5.0)
+    parser.add_argument("--live", action="store_true", help="call the configured OpenAI endpoint instead of the mock")
+    args = parser.parse_args()
+
+    server = None
+    if not args.live:
+        _Handler.latency = args.latency_ms / 1000
+        _Handler.per_token = args.ms_per_token / 1000
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        os.environ["OPENAI_API_KEY"] = "bench"
+        os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    results = asyncio.run(_measure(args.runs))
+    if server is not None:
+        server.shutdown()
+
+    target = "live endpoint" if args.live else f"mock, {args.latency_ms} ms + {args.ms_per_token} ms/token"
+    print(f"{args.runs} runs per mode ({target}), model {llm_matching.MATCHING_MODEL}; tokens per match")
+    for name, stats in results.items():
+        print(f"  {name:20s} {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Encode/decode time and size of session records: legacy pickle vs the versioned codecs.
+
+Run from the directory that contains the ``happyrav`` package::
+
+    python -m happyrav.benchmarks.serialization_formats --sessions 50
+
+Sessions are synthetic but shaped like real ones: 5-20 uploaded documents of
+CV-like text, an extracted profile with experience and education entries,
+answered questions and a short chat history.
+"""
+from __future__ import annotations
+
+import argparse
+import pickle
+import random
+import time
+from typing import Callable, Dict, List, Tuple
+
+from happyrav.models import (
+    DocumentMeta,
+    EducationItem,
+    ExperienceItem,
+    ExtractedProfile,
+    MissingQuestion,
+    SessionState,
+)
+from happyrav.services.cache import SESSION_SCHEMA, SessionRecord
+from happyrav.services.serialization import CODECS, Serializer, msgpack
+
+WORDS = (
+    "led team developed platform python kubernetes migration reduced latency percent "
+    "stakeholders delivered roadmap analytics pipeline customers revenue zurich bern "
+    "responsible architecture cloud security compliance mentoring hiring budget"
+).split()
+
+
+def _text(rng: random.Random, words: int) -> str:
+    lines = []
+    for _ in range(max(1, words // 12)):
+        lines.append(" ".join(rng.choice(WORDS) for _ in range(12)).capitalize() + ".")
+    return "\n".join(lines)
+
+
+def _session(rng: random.Random, index: int) -> SessionRecord:
+    doc_count = rng.randint(5, 20)
+    documents = [
+        DocumentMeta(
+            doc_id=f"doc{i}",
+            filename=f"document_{i}.pdf",
+            mime="application/pdf",
+            tag=rng.choice(["cv", "cover_letter", "arbeitszeugnis", "certificate"]),
+            parse_method="pdf_text",
+            confidence=0.95,
+            size_bytes=rng.randint(20_000, 400_000),
+            text_excerpt=_text(rng, 40),
+        )
+        for i in range(doc_count)
+    ]
+    profile = ExtractedProfile(
+        full_name="Jane Muster",
+        headline="Senior Engineer",
+        summary=_text(rng, 80),
+        skills=rng.sample(WORDS, 12),
+        experience=[
+            ExperienceItem(
+                role="Engineer",
+                company=f"Company {j}",
+                period=f"20{10 + j} - 20{11 + j}",
+                achievements=[_text(rng, 20) for _ in range(4)],
+            )
+            for j in range(6)
+        ],
+        education=[EducationItem(degree="MSc", school="ETH", period="2008 - 2010")],
+    )
+    state = SessionState(
+        session_id=f"s{index}",
+        phase="review",
+        job_ad_text=_text(rng, 400),
+        documents=documents,
+        extracted_profile=profile,
+        questions=[MissingQuestion(question_id=f"q{k}", field_path="summary", prompt="Why?") for k in range(5)],
+        answers={f"q{k}": _text(rng, 20) for k in range(5)},
+        created_at=time.time(),
+        expires_at=time.time() + 3600,
+    )
+    return SessionRecord(
+        state=state,
+        document_texts={doc.doc_id: _text(rng, rng.randint(400, 2500)) for doc in documents},
+        llm_profile=profile,
+        llm_debug={"model": "gpt", "tokens": 12345},
+        chat_history=[{"role": "user", "content": _text(rng, 30)} for _ in range(6)],
+    )
+
+
+def _measure(
+    records: List[SessionRecord], dumps: Callable[[SessionRecord], bytes], loads: Callable[[bytes], SessionRecord]
+) -> Tuple[float, float, int]:
+    started = time.perf_counter()
+    payloads = [dumps(record) for record in records]
+    encode = time.perf_counter() - started
+    started = time.perf_counter()
+    for payload in payloads:
+        loads(payload)
+    decode = time.perf_counter() - started
+    return encode, decode, sum(len(p) for p in payloads)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    records = [_session(rng, i) for i in range(args.sessions)]
+    formats: Dict[str, Tuple[Callable, Callable]] = {
+        "legacy pickle": (lambda r: pickle.dumps(r), pickle.loads),
+    }
+    for name in CODECS:
+        if name == "msgpack" and msgpack is None:
+            continue
+        serializer = Serializer(SESSION_SCHEMA, name)
+        formats[name] = (serializer.dumps, serializer.loads)
+
+    n = len(records)
+    print(f"{n} sessions, 5-20 documents each")
+    print(f"{'format':>14}  {'encode ms/rec':>13}  {'decode ms/rec':>13}  {'KB/rec':>8}")
+    for name, (dumps, loads) in formats.items():
+        encode, decode, size = _measure(records, dumps, loads)
+        print(f"{name:>14}  {encode / n * 1000:13.3f}  {decode / n * 1000:13.3f}  {size / n / 1024:8.1f}")
+    if msgpack is None:
+        print("(msgpack not installed; pip install msgpack to include it)")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,18 +5,23 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import os
+import asyncio
 import hashlib
 import base64
+import functools
 import io
 import time
 import uuid
+from contextlib import asynccontextmanager
 from datetime import date
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
 
 from fastapi import Body, FastAPI, File, Form, HTTPException, Request, UploadFile
-from fastapi.responses import HTMLResponse, Response
+from fastapi.responses import FileResponse, HTMLResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from starlette.routing import Match
 from PIL import Image
 
 from happyrav.models import (
@@ -26,6 +31,7 @@ from happyrav.models import (
     CoverLetterRequest,
     CVData,
     DocTag,
+    DocumentMeta,
     ExtractedProfile,
     GenerateRequest,
     MonsterArtifactRecord,
@@ -37,7 +43,27 @@ from happyrav.models import (
     SessionState,
     ThemeConfig,
 )
-from happyrav.services.cache import ArtifactCache, MonsterCache, SessionCache, SessionRecord
+from happyrav.services.cache import (
+    EXTRACTION_FIELDS,
+    ArtifactCache,
+    BlobStore,
+    DocumentCache,
+    MonsterCache,
+    RemoteArtifactCache,
+    RemoteBlobStore,
+    RemoteDocumentCache,
+    RemoteMonsterCache,
+    SessionRecord,
+    create_session_cache,
+    namespace,
+    run_sweeper,
+)
+from happyrav.services import cache as cache_module, llm_cache, llm_clients, llm_metrics, llm_scheduler
+from happyrav.services.backends import create_state_backend
+from happyrav.services.compression import stats as compression_stats
+from happyrav.services.llm_cache import LLMResponseCache, RemoteLLMResponseCache
+from happyrav.services.quota import quota_from_env
+from happyrav.services.stages import StageRun
 from happyrav.services.emailer import send_application_email
 from happyrav.services.extract_documents import (
     DOC_TAGS,
@@ -60,6 +86,7 @@ from happyrav.services.llm_kimi import (
     QUALITY_MODE,
 )
 from happyrav.services.llm_matching import summarize_job_ad
+from happyrav.services.locks import SessionLocks
 from happyrav.services.parsing import parse_hex_color, parse_language
 from happyrav.services.pdf_render import render_pdf
 from happyrav.services.question_engine import (
@@ -137,19 +164,105 @@ def _asset_version() -> str:
 
 ASSET_VERSION = _asset_version()
 
-app = FastAPI(title="happyRAV", root_path=ROOT_PATH)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    sweeper = asyncio.create_task(
+        run_sweeper([session_cache, artifact_cache, monster_cache, document_cache, blob_store, llm_response_cache])
+    )
+    try:
+        yield
+    finally:
+        sweeper.cancel()
+        try:
+            await sweeper
+        except asyncio.CancelledError:
+            pass
+        await llm_clients.pool.aclose()
+
+
+app = FastAPI(title="happyRAV", root_path=ROOT_PATH, lifespan=lifespan)
 templates = Jinja2Templates(directory=os.path.join(BASE_DIR, "templates"))
 app.mount("/static", StaticFiles(directory=os.path.join(BASE_DIR, "static")), name="static")
 
-artifact_cache = ArtifactCache(ttl_seconds=int(os.getenv("HAPPYRAV_ARTIFACT_TTL", "3600")))
-session_cache = SessionCache(ttl_seconds=int(os.getenv("HAPPYRAV_SESSION_TTL", "7200")))
-from happyrav.services.cache import DocumentCache
-document_cache = DocumentCache()
-monster_cache = MonsterCache(ttl_seconds=7200)
+
+@app.middleware("http")
+async def label_llm_calls(request: Request, call_next):
+    """Attribute LLM metrics to the route template (not the raw path, which holds session ids)."""
+    label = "other"
+    for route in app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            label = getattr(route, "path", label)
+            break
+    token = llm_metrics.endpoint.set(f"{request.method} {label}")
+    try:
+        return await call_next(request)
+    finally:
+        llm_metrics.endpoint.reset(token)
+
+# Each namespace has its own directory (or key prefix), TTL, size budget and sweep interval;
+# HAPPYRAV_<NAME>_TTL / _MAX_BYTES / _SWEEP_INTERVAL override the defaults below.
+SESSION_NS = namespace("session", ttl_seconds=7200)
+ARTIFACT_NS = namespace("artifact", ttl_seconds=3600)
+MONSTER_NS = namespace("monster", ttl_seconds=7200)
+DOCUMENT_NS = namespace("document", ttl_seconds=30 * 24 * 3600, max_bytes=512 * 1024 * 1024)
+# PDFs and HTML are shared by artifact and monster records; keep blobs as long as the longest-lived record.
+BLOB_NS = namespace("blob", ttl_seconds=max(ARTIFACT_NS.ttl_seconds, MONSTER_NS.ttl_seconds))
+LLM_NS = namespace("llm", ttl_seconds=7 * 24 * 3600, max_bytes=256 * 1024 * 1024)
+
+# With HAPPYRAV_REDIS_URL set, all caches live on the shared server so any worker or node can serve any session.
+state_backend = create_state_backend()
+session_cache = create_session_cache(state_backend=state_backend, ns=SESSION_NS)
+if state_backend is None:
+    blob_store = BlobStore.for_namespace(BLOB_NS)
+    artifact_cache = ArtifactCache.for_namespace(ARTIFACT_NS, blobs=blob_store)
+    document_cache = DocumentCache.for_namespace(DOCUMENT_NS)
+    monster_cache = MonsterCache.for_namespace(MONSTER_NS, blobs=blob_store)
+    llm_response_cache = LLMResponseCache.for_namespace(LLM_NS)
+else:
+    blob_store = RemoteBlobStore(state_backend, ttl_seconds=BLOB_NS.ttl_seconds)
+    artifact_cache = RemoteArtifactCache.for_namespace(ARTIFACT_NS, backend=state_backend, blobs=blob_store)
+    document_cache = RemoteDocumentCache(state_backend, ttl_seconds=DOCUMENT_NS.ttl_seconds)
+    monster_cache = RemoteMonsterCache.for_namespace(MONSTER_NS, backend=state_backend, blobs=blob_store)
+    llm_response_cache = RemoteLLMResponseCache.for_namespace(LLM_NS, backend=state_backend)
+# HAPPYRAV_LLM_CACHE=0 sends every LLM call to the provider.
+if (os.getenv("HAPPYRAV_LLM_CACHE") or "1").strip().lower() not in ("0", "false", "no", "off"):
+    llm_cache.install(llm_response_cache)
+# One disk quota across all namespaces; on a shared backend the server's maxmemory does this job.
+quota = None
+if state_backend is None:
+    quota = quota_from_env(
+        cache_module.DATA_DIR,
+        {
+            "document": document_cache,
+            "llm": llm_response_cache,
+            "artifact": artifact_cache,
+            "monster": monster_cache,
+            "blob": blob_store,
+            "session": session_cache,
+        },
+    )
+session_locks = SessionLocks()
+
+
+def _serialized_per_session(handler):
+    """Run ``handler`` under the session's lock so heavy calls for one session queue up.
+
+    A request that waited reads the record only after the previous one saved,
+    so it sees that request's extraction instead of repeating it.
+    """
+
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        async with session_locks.hold(kwargs["session_id"]):
+            return await handler(*args, **kwargs)
+
+    return wrapper
 
 
-def _require_session(session_id: str) -> SessionRecord:
-    record = session_cache.touch(session_id)
+async def _require_session(session_id: str) -> SessionRecord:
+    record = await session_cache.atouch(session_id)
     if not record:
         raise HTTPException(status_code=404, detail="Session not found or expired.")
     return record
@@ -216,17 +329,29 @@ def _profile_text_for_score(profile: ExtractedProfile) -> str:
     return "\n".join(chunk for chunk in chunks if chunk)
 
 
+def _index_document(record: SessionRecord, document: DocumentMeta, text: str) -> None:
+    """Store the rule-based fragment and content digest of a newly added document next to its text."""
+    record.document_digests[document.doc_id] = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    record.document_fragments[document.doc_id] = extract_profile_fragment(
+        text=text,
+        doc_id=document.doc_id,
+        confidence=document.confidence,
+    )
+
+
+def _document_index(record: SessionRecord, document: DocumentMeta) -> Tuple[str, ExtractedProfile]:
+    """Digest and fragment of ``document``; only sessions stored before they were kept read the text."""
+    if document.doc_id not in record.document_digests or document.doc_id not in record.document_fragments:
+        _index_document(record, document, record.document_texts.get(document.doc_id, ""))
+    return record.document_digests[document.doc_id], record.document_fragments[document.doc_id]
+
+
 def _refresh_state(record: SessionRecord) -> SessionRecord:
     state = record.state
     merged = ExtractedProfile()
     for document in state.documents:
-        text = record.document_texts.get(document.doc_id, "")
-        fragment = extract_profile_fragment(
-            text=text,
-            doc_id=document.doc_id,
-            confidence=document.confidence,
-        )
-        merged = merge_profiles(merged, fragment)
+        _, fragment = _document_index(record, document)
+        merged = merge_profiles(merged, fragment.model_copy(deep=True))
 
     if record.llm_profile:
         merged = merge_profiles(merged, record.llm_profile)
@@ -295,20 +420,29 @@ def _extraction_signature(record: SessionRecord) -> str:
     for document in sorted(record.state.documents, key=lambda item: item.doc_id):
         hasher.update(document.doc_id.encode("utf-8"))
         hasher.update(document.tag.encode("utf-8"))
-        text = record.document_texts.get(document.doc_id, "")
-        hasher.update(str(len(text)).encode("utf-8"))
-        hasher.update(text[:2000].encode("utf-8", errors="ignore"))
+        digest, _ = _document_index(record, document)
+        hasher.update(digest.encode("utf-8"))
     return hasher.hexdigest()
 
 
+def _source_documents(record: SessionRecord) -> Tuple[List[str], List[str]]:
+    """Non-empty document texts with their tags, in upload order, for the prompt budget."""
+    pairs = [(record.document_texts.get(doc.doc_id, ""), doc.tag) for doc in record.state.documents]
+    pairs = [(text, tag) for text, tag in pairs if text and text.strip()]
+    return [text for text, _ in pairs], [tag for _, tag in pairs]
+
+
 async def _enrich_profile_with_openai(record: SessionRecord) -> SessionRecord:
     signature = _extraction_signature(record)
     if signature == record.extraction_signature:
         return record
     record.extraction_signature = signature
-    source_documents = [record.document_texts.get(doc.doc_id, "") for doc in record.state.documents]
-    source_documents = [text for text in source_documents if text and text.strip()]
-    profile, warning, debug = await extract_profile_from_documents(record.state.language, source_documents)
+    source_documents, doc_tags = _source_documents(record)
+    # Double-clicks and UI retries with the same documents share one LLM call.
+    profile, warning, debug = await session_locks.coalesce(
+        (record.state.session_id, signature),
+        lambda: extract_profile_from_documents(record.state.language, source_documents, doc_tags),
+    )
     record.llm_profile = profile
     record.llm_warning = warning or ""
     record.llm_debug = debug or {}
@@ -386,8 +520,26 @@ def _wizard_context(
 
 
 @app.get("/health")
-async def health() -> Dict[str, str]:
-    return {"status": "ok", "service": "happyrav"}
+async def health() -> Dict:
+    return {
+        "status": "ok",
+        "service": "happyrav",
+        "compression": compression_stats.snapshot(),
+        "document_cache": document_cache.stats(),
+        "llm_cache": llm_cache.stats.snapshot(),
+        "llm_scheduler": llm_scheduler.snapshot(),
+        "storage": await asyncio.to_thread(quota.snapshot) if quota is not None else {},
+    }
+
+
+@app.get("/metrics")
+async def metrics() -> Response:
+    """Prometheus exposition of LLM call, token, cost and scheduler metrics."""
+    gauges = {}
+    for provider, snapshot in llm_scheduler.snapshot().items():
+        for field in ("limit", "in_flight", "queued"):
+            gauges.setdefault(f"happyrav_llm_scheduler_{field}", {})[(("provider", provider),)] = snapshot[field]
+    return Response(llm_metrics.render(gauges), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 # ── CV Builder (stateless) ──
@@ -682,19 +834,19 @@ async def api_session_start(payload: SessionStartRequest) -> Dict:
     record = SessionRecord(state=state)
     record = await _enrich_profile_with_openai(record)
     record = _refresh_state(record)
-    session_cache.set(record)
+    await session_cache.aset(record)
     return {"session_id": session_id, "expires_at": record.state.expires_at, "state": _state_payload(record.state)}
 
 
 @app.post("/api/session/{session_id}/intake")
 async def api_session_intake(session_id: str, payload: SessionIntakeRequest) -> Dict:
-    record = _require_session(session_id)
+    record = await _require_session(session_id)
     record.state.company_name = payload.company_name.strip()
     record.state.position_title = payload.position_title.strip()
     record.state.job_ad_text = payload.job_ad_text.strip()
     record.state.consent_confirmed = payload.consent_confirmed
     record = _refresh_state(record)
-    session_cache.set(record)
+    await session_cache.aset(record, fields=("state",))
     return {
         "session_id": session_id,
         "expires_at": record.state.expires_at,
@@ -703,12 +855,13 @@ async def api_session_intake(session_id: str, payload: SessionIntakeRequest) ->
 
 
 @app.post("/api/session/{session_id}/upload")
+@_serialized_per_session
 async def api_session_upload(
     session_id: str,
     files: List[UploadFile] = File(...),
     tags: Optional[List[str]] = Form(None),
 ) -> Dict:
-    record = _require_session(session_id)
+    record = await _require_session(session_id)
     state = record.state
 
     if not files:
@@ -739,8 +892,8 @@ async def api_session_upload(
                 detail=f"Session size exceeded (max {MAX_SESSION_BYTES // (1024 * 1024)} MB total).",
             )
 
-        content_hash = hashlib.md5(content).hexdigest()
-        cached = document_cache.get(content_hash)
+        content_hash = DocumentCache.content_key(content)
+        cached = await document_cache.aget(content_hash, legacy_key=document_cache.legacy_key(content))
         if cached:
             text = cached.get("text", "")
             parse_method = cached.get("parse_method", "cached")
@@ -748,7 +901,7 @@ async def api_session_upload(
         else:
             try:
                 text, parse_method, confidence = extract_text_from_bytes(filename=filename, content=content)
-                document_cache.set(content_hash, {
+                await document_cache.aset(content_hash, {
                     "text": text,
                     "parse_method": parse_method,
                     "confidence": confidence,
@@ -772,12 +925,13 @@ async def api_session_upload(
         )
         state.documents.append(document_meta)
         record.document_texts[doc_id] = text
+        _index_document(record, document_meta, text)
         uploaded.append(document_meta.model_dump())
         total_bytes += size_bytes
 
     record = await _enrich_profile_with_openai(record)
     record = _refresh_state(record)
-    session_cache.set(record)
+    await session_cache.aset(record)
     return {
         "session_id": session_id,
         "uploaded": uploaded,
@@ -793,7 +947,7 @@ async def api_session_paste(
     session_id: str,
     payload: Dict[str, str] = Body(...),
 ) -> Dict:
-    record = _require_session(session_id)
+    record = await _require_session(session_id)
     state = record.state
     text = (payload.get("text") or "").strip()
     tag = payload.get("tag") or "cv"
@@ -817,9 +971,10 @@ async def api_session_paste(
     )
     state.documents.append(document_meta)
     record.document_texts[doc_id] = text
+    _index_document(record, document_meta, text)
     record = await _enrich_profile_with_openai(record)
     record = _refresh_state(record)
-    session_cache.set(record)
+    await session_cache.aset(record)
     return {
         "session_id": session_id,
         "uploaded": [document_meta.model_dump()],
@@ -834,7 +989,7 @@ async def api_session_photo(
     session_id: str,
     file: UploadFile = File(...),
 ) -> Dict:
-    record = _require_session(session_id)
+    record = await _require_session(session_id)
     filename = (file.filename or "photo").strip().lower()
     extension = os.path.splitext(filename)[1]
     if extension not in PHOTO_EXTENSIONS:
@@ -856,7 +1011,7 @@ async def api_session_photo(
         raise HTTPException(status_code=400, detail=f"Could not parse image: {exc}") from exc
 
     record = _refresh_state(record)
-    session_cache.set(record)
+    await session_cache.aset(record, fields=("state", "photo_data_url"))
     return {
         "session_id": session_id,
         "expires_at": record.state.expires_at,
@@ -865,11 +1020,12 @@ async def api_session_photo(
 
 
 @app.post("/api/session/{session_id}/extract")
+@_serialized_per_session
 async def api_session_extract(
     session_id: str,
     payload: Optional[Dict[str, Dict[str, DocTag]]] = Body(default=None),
 ) -> Dict:
-    record = _require_session(session_id)
+    record = await _require_session(session_id)
     state = record.state
 
     tag_overrides = (payload or {}).get("tag_overrides", {})
@@ -881,7 +1037,7 @@ async def api_session_extract(
 
     record = await _enrich_profile_with_openai(record)
     record = _refresh_state(record)
-    session_cache.set(record)
+    await session_cache.aset(record, fields=("state", *EXTRACTION_FIELDS))
     return {
         "session_id": session_id,
         "expires_at": record.state.expires_at,
@@ -891,11 +1047,11 @@ async def api_session_extract(
 
 @app.post("/api/session/{session_id}/answer")
 async def api_session_answer(session_id: str, payload: SessionAnswerRequest) -> Dict:
-    record = _require_session(session_id)
+    record = await _require_session(session_id)
     for question_id, answer in payload.answers.items():
         record.state.answers[question_id] = str(answer).strip()
     record = _refresh_state(record)
-    session_cache.set(record)
+    await session_cache.aset(record, fields=("state",))
     return {
         "session_id": session_id,
         "expires_at": record.state.expires_at,
@@ -905,10 +1061,10 @@ async def api_session_answer(session_id: str, payload: SessionAnswerRequest) ->
 
 @app.get("/api/session/{session_id}/state")
 async def api_session_state(session_id: str) -> Dict:
-    record = _require_session(session_id)
+    record = await _require_session(session_id)
     record = await _enrich_profile_with_openai(record)
     record = _refresh_state(record)
-    session_cache.set(record)
+    await session_cache.aset(record, fields=("state", *EXTRACTION_FIELDS))
     return {
         "session_id": session_id,
         "expires_at": record.state.expires_at,
@@ -918,11 +1074,11 @@ async def api_session_state(session_id: str) -> Dict:
 
 @app.post("/api/session/{session_id}/language")
 async def api_session_language(session_id: str, payload: Dict[str, str] = Body(...)) -> Dict:
-    record = _require_session(session_id)
+    record = await _require_session(session_id)
     record.state.language = parse_language(str((payload or {}).get("language", "en")))
     record = await _enrich_profile_with_openai(record)
     record = _refresh_state(record)
-    session_cache.set(record)
+    await session_cache.aset(record, fields=("state", *EXTRACTION_FIELDS))
     return {
         "session_id": session_id,
         "expires_at": record.state.expires_at,
@@ -932,7 +1088,7 @@ async def api_session_language(session_id: str, payload: Dict[str, str] = Body(.
 
 @app.post("/api/session/{session_id}/preseed")
 async def api_preseed(session_id: str, req: PreSeedRequest) -> Dict:
-    record = _require_session(session_id)
+    record = await _require_session(session_id)
     if req.profile:
         existing = (record.preseed_profile or ExtractedProfile()).model_dump()
         existing.update({k: v for k, v in req.profile.items() if v})
@@ -941,7 +1097,7 @@ async def api_preseed(session_id: str, req: PreSeedRequest) -> Dict:
     if req.telos:
         record.state.telos_context.update(req.telos)
     record = _refresh_state(record)
-    session_cache.set(record)
+    await session_cache.aset(record, fields=("state", "preseed_profile"))
     return {
         "session_id": session_id,
         "expires_at": record.state.expires_at,
@@ -1055,21 +1211,12 @@ def _count_transformations(original: ExtractedProfile, optimized) -> Dict[str, i
 @app.post("/api/session/{session_id}/preview-match")
 async def api_session_preview_match(session_id: str) -> Dict:
     """Preview ATS match score before generating PDFs."""
-    record = _require_session(session_id)
+    record = await _require_session(session_id)
     state = record.state
 
     if not state.job_ad_text.strip():
         raise HTTPException(status_code=422, detail="Job ad text required for match preview.")
 
-    # Guarded job summary (LLM + baseline)
-    job_summary = ""
-    try:
-        job_summary = await summarize_job_ad(state.job_ad_text, state.language)
-    except Exception as exc:
-        print(f"Job summary failed: {exc}")
-        job_summary = (state.job_ad_text or "")[:400]
-    state.job_summary = job_summary
-
     # Use extracted profile to build preview CV text
     profile = state.extracted_profile
     if not profile.full_name and not profile.experience:
@@ -1094,90 +1241,126 @@ async def api_session_preview_match(session_id: str) -> Dict:
     job_keywords = extract_job_keywords(state.job_ad_text)
 
     # Compute match with hybrid approach
+    from happyrav.services import llm_matching
     from happyrav.services.llm_matching import (
         extract_semantic_keywords,
         match_skills_semantic,
         detect_contextual_gaps,
+        match_semantic_fast,
         merge_match_scores,
     )
+    from happyrav.services.llm_kimi import generate_strategic_analysis
+
+    # LLM stages run as a dependency graph: the job summary, semantic keywords and
+    # (speculatively) contextual gaps start at once; semantic matching waits only for
+    # the keywords, strategic analysis for the merged match and the gaps. In fast
+    # matching mode one combined call replaces keywords, matching and gaps.
+    fast_matching = llm_matching.MATCHING_MODE == "fast"
+    async with StageRun() as stages:
+        summary_task = stages.start("job_summary", summarize_job_ad(state.job_ad_text, state.language))
+        if fast_matching:
+            fast_task = stages.start(
+                "semantic_fast",
+                match_semantic_fast(profile=profile, job_ad_text=state.job_ad_text, language=state.language),
+            )
+        else:
+            keywords_task = stages.start(
+                "semantic_keywords", extract_semantic_keywords(state.job_ad_text, state.language)
+            )
+            gaps_task = stages.start(
+                "contextual_gaps",
+                detect_contextual_gaps(profile=profile, job_ad_text=state.job_ad_text, language=state.language),
+                default=[],
+            )
 
-    # 1. Fast baseline (existing parser)
-    baseline_match = compute_match(cv_text=cv_text, job_ad_text=state.job_ad_text, language=state.language)
-
-    # 2. Semantic enhancement (LLM) - with error handling
-    try:
-        semantic_keywords = await extract_semantic_keywords(state.job_ad_text, state.language)
-        semantic_match = await match_skills_semantic(
-            cv_skills=profile.skills_str,
-            cv_experience=[exp.model_dump() for exp in profile.experience],
-            semantic_keywords=semantic_keywords
-        )
-        # 3. Merge scores (weighted average: 40% baseline, 60% semantic)
-        match = merge_match_scores(baseline_match, semantic_match, weights={"baseline": 0.4, "semantic": 0.6})
-    except Exception as e:
-        # Fallback to baseline if LLM fails
-        print(f"Semantic matching failed: {e}, falling back to baseline")
-        match = baseline_match
-        match.matching_strategy = "baseline"
-
-    match.job_summary = job_summary
-
-    # Compute quality metrics for preview
-    from happyrav.services.cv_quality import validate_cv_quality
+        # 1. Fast baseline (existing parser)
+        baseline_match = compute_match(cv_text=cv_text, job_ad_text=state.job_ad_text, language=state.language)
+
+        # 2. Semantic enhancement (LLM), falling back to baseline
+        match = None
+        semantic_match = None
+        if fast_matching:
+            fast_result = await fast_task
+            fast_gaps = []
+            if fast_result is not None:
+                _, semantic_match, fast_gaps = fast_result
+        else:
+            semantic_keywords = await keywords_task
+            if semantic_keywords is not None:
+                semantic_match = await stages.run(
+                    "semantic_match",
+                    match_skills_semantic(
+                        cv_skills=profile.skills_str,
+                        cv_experience=[exp.model_dump() for exp in profile.experience],
+                        semantic_keywords=semantic_keywords,
+                    ),
+                )
+        if semantic_match is not None:
+            try:
+                # 3. Merge scores (weighted average: 40% baseline, 60% semantic)
+                match = merge_match_scores(baseline_match, semantic_match, weights={"baseline": 0.4, "semantic": 0.6})
+            except Exception as e:
+                print(f"Semantic matching failed: {e}, falling back to baseline")
+        if match is None:
+            match = baseline_match
+            match.matching_strategy = "baseline"
+
+        job_summary = await summary_task
+        if job_summary is None:
+            job_summary = (state.job_ad_text or "")[:400]
+        state.job_summary = job_summary
+        match.job_summary = job_summary
+
+        # Compute quality metrics for preview
+        from happyrav.services.cv_quality import validate_cv_quality
 
-    try:
-        quality_metrics_data = validate_cv_quality(
-            cv_text=cv_text,
-            generated=None,
-            language=state.language
-        )
-        quality_metrics = QualityMetrics(**quality_metrics_data.__dict__)
-        match.quality_metrics = quality_metrics
-        match.quality_warnings = quality_metrics.warnings[:5]
-    except Exception as e:
-        print(f"Quality validation in preview failed: {e}")
-
-    # Determine recommendation
-    recommend_generate = match.overall_score >= REVIEW_RECOMMEND_THRESHOLD
-    recommendation = "ready" if recommend_generate else "improve"
-    suggestion = ""
-
-    if not recommend_generate:
-        suggestions = []
-        if match.missing_keywords:
-            suggestions.append(f"Add missing keywords: {', '.join(match.missing_keywords[:5])}")
-        if match.quality_warnings:
-            suggestions.append(f"Quality: {match.quality_warnings[0]}")
-        if match.category_scores.get("skills_match", 0) < 50:
-            suggestions.append("Add more relevant skills from job ad")
-        suggestion = " | ".join(suggestions[:2])
-
-    # Generate strategic analysis with contextual gaps if score below threshold
-    strategic_analysis = None
-    if not recommend_generate:
-        from happyrav.services.llm_kimi import generate_strategic_analysis
-
-        # Detect contextual gaps
-        contextual_gaps = []
         try:
-            contextual_gaps = await detect_contextual_gaps(
-                profile=profile,
-                job_ad_text=state.job_ad_text,
+            quality_metrics_data = validate_cv_quality(
+                cv_text=cv_text,
+                generated=None,
                 language=state.language
             )
-            # Add gaps to match payload
-            match.contextual_gaps = contextual_gaps
+            quality_metrics = QualityMetrics(**quality_metrics_data.__dict__)
+            match.quality_metrics = quality_metrics
+            match.quality_warnings = quality_metrics.warnings[:5]
         except Exception as e:
-            print(f"Gap detection failed: {e}")
-
-        strategic_analysis = await generate_strategic_analysis(
-            language=state.language,
-            match=match,
-            profile=profile,
-            job_ad_text=state.job_ad_text,
-        )
+            print(f"Quality validation in preview failed: {e}")
+
+        # Determine recommendation
+        recommend_generate = match.overall_score >= REVIEW_RECOMMEND_THRESHOLD
+        recommendation = "ready" if recommend_generate else "improve"
+        suggestion = ""
+
+        if not recommend_generate:
+            suggestions = []
+            if match.missing_keywords:
+                suggestions.append(f"Add missing keywords: {', '.join(match.missing_keywords[:5])}")
+            if match.quality_warnings:
+                suggestions.append(f"Quality: {match.quality_warnings[0]}")
+            if match.category_scores.get("skills_match", 0) < 50:
+                suggestions.append("Add more relevant skills from job ad")
+            suggestion = " | ".join(suggestions[:2])
+
+        # Strategic analysis with contextual gaps only if score below threshold
+        strategic_analysis = None
+        if recommend_generate:
+            if not fast_matching:
+                stages.skip("contextual_gaps", gaps_task)
+        else:
+            contextual_gaps = fast_gaps if fast_matching else await gaps_task
+            if contextual_gaps:
+                match.contextual_gaps = contextual_gaps
+            strategic_analysis = await stages.run(
+                "strategic_analysis",
+                generate_strategic_analysis(
+                    language=state.language,
+                    match=match,
+                    profile=profile,
+                    job_ad_text=state.job_ad_text,
+                ),
+            )
 
-    session_cache.set(record)
+    await session_cache.aset(record, fields=("state",))
     return {
         "match": match.model_dump(),
         "recommendation": recommendation,
@@ -1189,6 +1372,8 @@ async def api_session_preview_match(session_id: str) -> Dict:
             "job_keywords_count": len(job_keywords),
         },
         "strategic_analysis": strategic_analysis,
+        "stages": stages.stages,
+        "partial": stages.partial,
         "preview_comparison_sections": [
             {
                 "label_en": "Skills Overview",
@@ -1209,7 +1394,7 @@ async def api_session_preview_match(session_id: str) -> Dict:
 @app.post("/api/session/{session_id}/ask-recommendation")
 async def api_session_ask_recommendation(session_id: str, payload: Dict[str, str]) -> Dict:
     """Chat endpoint for strategic recommendation questions."""
-    record = _require_session(session_id)
+    record = await _require_session(session_id)
     state = record.state
     message = payload.get("message", "").strip()
 
@@ -1236,7 +1421,7 @@ async def api_session_ask_recommendation(session_id: str, payload: Dict[str, str
     # Store in chat history
     record.chat_history.append({"role": "user", "content": message})
     record.chat_history.append({"role": "assistant", "content": response_text})
-    session_cache.set(record)
+    await session_cache.aset(record, fields=("chat_history",))
 
     return {
         "response": response_text,
@@ -1245,6 +1430,7 @@ async def api_session_ask_recommendation(session_id: str, payload: Dict[str, str
 
 
 @app.post("/api/session/{session_id}/generate")
+@_serialized_per_session
 async def api_session_generate(
     request: Request,
     session_id: str,
@@ -1255,7 +1441,7 @@ async def api_session_generate(
             status_code=503,
             detail="API keys not configured on server. Contact administrator to set OPENAI_API_KEY and ANTHROPIC_API_KEY environment variables.",
         )
-    record = _require_session(session_id)
+    record = await _require_session(session_id)
     state = record.state
     state.template_id = _template_alias(payload.template_id or state.template_id)
     border_style = payload.border_style if payload.border_style in ("rounded", "square", "none") else "rounded"
@@ -1286,13 +1472,15 @@ async def api_session_generate(
     profile = state.extracted_profile
     basic_profile = _profile_to_basic(profile)
     match_context = _generation_match_context(state)
+    source_documents, doc_tags = _source_documents(record)
     generated, warning = await generate_content(
         language=state.language,
         job_ad_text=state.job_ad_text,
         profile=profile,
-        source_documents=list(record.document_texts.values()),
+        source_documents=source_documents,
         match_context=match_context,
         tone=payload.tone,
+        doc_tags=doc_tags,
     )
     generated = _validate_completeness(profile, generated)
 
@@ -1365,8 +1553,8 @@ async def api_session_generate(
         "comparison_metadata": comparison_metadata,
     },
     )
-    artifact_cache.set(artifact)
-    session_cache.set(record)
+    await artifact_cache.aset(artifact)
+    await session_cache.aset(record, fields=("state", *EXTRACTION_FIELDS))
     return {
         "token": token,
         "filename_cv": artifact.filename_cv,
@@ -1381,14 +1569,14 @@ async def api_session_generate(
 async def api_session_chat(request: Request, session_id: str, payload: dict = Body(...)):
     if not has_api_key():
         raise HTTPException(status_code=503, detail="API keys not configured.")
-    record = _require_session(session_id)
+    record = await _require_session(session_id)
     state = record.state
     user_message = (payload.get("message") or "").strip()
     token = (payload.get("token") or "").strip()
     if not user_message:
         raise HTTPException(400, "Message required.")
 
-    artifact = artifact_cache.get(token) if token else None
+    artifact = await artifact_cache.aget(token, include_html=False) if token else None
     if not artifact or not artifact.meta.get("generated_content"):
         raise HTTPException(422, "No generated CV found. Generate first.")
 
@@ -1425,15 +1613,16 @@ async def api_session_chat(request: Request, session_id: str, payload: dict = Bo
     new_artifact = ArtifactRecord(
         token=new_token, filename_cv=artifact.filename_cv,
         cv_html=cv_html,
-        cover_html=artifact.cover_html,
+        cover_html_hash=artifact.cover_html_hash,
+        cover_pdf_hash=artifact.cover_pdf_hash,
         filename_cover=artifact.filename_cover,
         match=match, warning=warning,
         expires_at=time.time() + artifact_cache.ttl_seconds,
         comparison_sections=comparison_sections,
         meta={**artifact.meta, "generated_content": refined.model_dump()},
     )
-    artifact_cache.set(new_artifact)
-    session_cache.set(record)
+    await artifact_cache.aset(new_artifact)
+    await session_cache.aset(record, fields=("chat_history",))
 
     return {
         "token": new_token,
@@ -1450,7 +1639,7 @@ async def api_session_signature(
     session_id: str,
     file: UploadFile = File(...),
 ) -> Dict:
-    record = _require_session(session_id)
+    record = await _require_session(session_id)
     filename = (file.filename or "signature").strip().lower()
     extension = os.path.splitext(filename)[1]
     if extension not in SIGNATURE_EXTENSIONS:
@@ -1469,7 +1658,7 @@ async def api_session_signature(
         record.signature_data_url = f"data:image/png;base64,{encoded}"
     except Exception as exc:
         raise HTTPException(status_code=400, detail=f"Could not process image: {exc}") from exc
-    session_cache.set(record)
+    await session_cache.aset(record, fields=("signature_data_url",))
     return {
         "session_id": session_id,
         "signature_uploaded": True,
@@ -1487,7 +1676,7 @@ async def api_session_generate_cover(
             status_code=503,
             detail="API keys not configured on server. Contact administrator to set OPENAI_API_KEY and ANTHROPIC_API_KEY environment variables.",
         )
-    record = _require_session(session_id)
+    record = await _require_session(session_id)
     state = record.state
 
     if payload.sender_street.strip():
@@ -1498,12 +1687,14 @@ async def api_session_generate_cover(
     profile = state.extracted_profile
     basic_profile = _profile_to_basic(profile)
     match_context = _generation_match_context(state)
+    source_documents, doc_tags = _source_documents(record)
     generated, warning = await generate_content(
         language=state.language,
         job_ad_text=state.job_ad_text,
         profile=profile,
-        source_documents=list(record.document_texts.values()),
+        source_documents=source_documents,
         match_context=match_context,
+        doc_tags=doc_tags,
     )
     generated = _validate_completeness(profile, generated)
 
@@ -1557,17 +1748,15 @@ async def api_session_generate_cover(
     else:
         artifact_filename_cover = filenames["cover"]
 
-    session_meta = state.session_id
-    existing_tokens = [
-        tok for tok, rec in artifact_cache._records.items()
-        if rec.meta.get("session_id") == session_meta
-    ]
-    if existing_tokens:
-        artifact = artifact_cache.get(existing_tokens[-1])
+    latest_token = await artifact_cache.alatest_for_session(state.session_id)
+    if latest_token:
+        artifact = await artifact_cache.aget(latest_token, include_html=False)
         if artifact:
             artifact.filename_cover = artifact_filename_cover
             artifact.cover_html = cover_html
             artifact.cover_pdf_bytes = cover_pdf_bytes
+            # A failed render must not leave the previous cover letter's PDF downloadable.
+            artifact.cover_pdf_hash = ""
             artifact.meta.update({
                 "cover_date": cover_date,
                 "sender_street": state.sender_street,
@@ -1576,8 +1765,8 @@ async def api_session_generate_cover(
                 "recipient_plz_ort": payload.recipient_plz_ort.strip(),
                 "recipient_contact": payload.recipient_contact.strip(),
             })
-            artifact_cache.set(artifact)
-            session_cache.set(record)
+            await artifact_cache.aset(artifact)
+            await session_cache.aset(record, fields=("state",))
             return {
                 "token": artifact.token,
                 "result_url": str(request.url_for("result_page", token=artifact.token)),
@@ -1600,15 +1789,14 @@ async def api_session_generate_monster(
             detail="Required API keys not configured (OPENAI_API_KEY + ANTHROPIC_API_KEY).",
         )
 
-    record = _require_session(session_id)
+    record = await _require_session(session_id)
     state = record.state
 
     if not record.document_texts:
         raise HTTPException(status_code=422, detail="No documents uploaded.")
 
     # Extract comprehensive timeline
-    source_documents = list(record.document_texts.values())
-    doc_tags = [doc.tag for doc in state.documents]
+    source_documents, doc_tags = _source_documents(record)
 
     timeline, warning = await extract_monster_timeline(
         language=state.language,
@@ -1650,11 +1838,11 @@ async def api_session_generate_monster(
         timeline=timeline,
         expires_at=time.time() + monster_cache.ttl_seconds,
     )
-    monster_cache.set(monster_artifact)
+    await monster_cache.aset(monster_artifact)
 
     # Update session state
     state.monster_cv_generated = True
-    session_cache.set(record)
+    await session_cache.aset(record, fields=("state",))
 
     # Compute stats
     date_range = ""
@@ -1681,20 +1869,36 @@ async def api_session_generate_monster(
     }
 
 
+async def _pdf_response(cache, digest: str, filename: str) -> Optional[Response]:
+    """Stream a blob from local disk, or send it from memory when it lives on the shared backend."""
+    if not digest:
+        return None
+    path = cache.blob_path(digest)
+    if path:
+        return FileResponse(path, media_type="application/pdf", filename=filename)
+    data = await cache.aread_blob(digest)
+    if not data:
+        return None
+    quoted = quote(filename)
+    disposition = f'attachment; filename="{filename}"' if quoted == filename else f"attachment; filename*=utf-8''{quoted}"
+    return Response(content=data, media_type="application/pdf", headers={"Content-Disposition": disposition})
+
+
 @app.get("/download/monster/{token}")
 async def download_monster(token: str) -> Response:
     """Download Monster CV PDF."""
-    record = monster_cache.get(token)
+    record = await monster_cache.aget(token, include_html=False)
     if not record:
         raise HTTPException(status_code=404, detail="Monster CV token expired or invalid.")
-
-    headers = {"Content-Disposition": f'attachment; filename="{record.filename}"'}
-    return Response(content=record.pdf_bytes, media_type="application/pdf", headers=headers)
+    response = await _pdf_response(monster_cache, record.pdf_hash, record.filename)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Monster CV token expired or invalid.")
+    return response
 
 
 @app.get("/result/{token}", response_class=HTMLResponse, name="result_page")
 async def result_page(request: Request, token: str) -> HTMLResponse:
-    record = artifact_cache.get(token)
+    record = await artifact_cache.aget(token)
     if not record:
         raise HTTPException(status_code=404, detail="Result expired or not found.")
     return templates.TemplateResponse(
@@ -1711,7 +1915,7 @@ async def result_page(request: Request, token: str) -> HTMLResponse:
 
 @app.get("/result-fragment/{token}", response_class=HTMLResponse, name="result_fragment")
 async def result_fragment(request: Request, token: str) -> HTMLResponse:
-    record = artifact_cache.get(token)
+    record = await artifact_cache.aget(token)
     if not record:
         raise HTTPException(status_code=404, detail="Result expired or not found.")
     return templates.TemplateResponse("_result.html", {"request": request, "record": record})
@@ -1719,7 +1923,7 @@ async def result_fragment(request: Request, token: str) -> HTMLResponse:
 
 @app.get("/api/result/{token}/comparison")
 async def api_result_comparison(token: str) -> Dict:
-    record = artifact_cache.get(token)
+    record = await artifact_cache.aget(token, include_html=False)
     if not record:
         raise HTTPException(status_code=404, detail="Result expired or not found.")
     return {"sections": [s.model_dump() for s in record.comparison_sections]}
@@ -1826,7 +2030,7 @@ def _cover_markdown(record: ArtifactRecord) -> str:
 
 @app.get("/api/result/{token}/cv-html")
 async def api_result_cv_html(token: str) -> Response:
-    record = artifact_cache.get(token)
+    record = await artifact_cache.aget(token)
     if not record:
         raise HTTPException(status_code=404, detail="Result expired or not found.")
     filename = record.filename_cv.replace(".pdf", ".html") if record.filename_cv.endswith(".pdf") else record.filename_cv + ".html"
@@ -1836,7 +2040,7 @@ async def api_result_cv_html(token: str) -> Response:
 
 @app.get("/api/result/{token}/cv-markdown")
 async def api_result_cv_markdown(token: str) -> Response:
-    record = artifact_cache.get(token)
+    record = await artifact_cache.aget(token, include_html=False)
     if not record:
         raise HTTPException(status_code=404, detail="Result expired or not found.")
     md = _cv_html_to_markdown(record)
@@ -1847,7 +2051,7 @@ async def api_result_cv_markdown(token: str) -> Response:
 
 @app.get("/api/result/{token}/cover-html")
 async def api_result_cover_html(token: str) -> Response:
-    record = artifact_cache.get(token)
+    record = await artifact_cache.aget(token)
     if not record or not record.cover_html:
         raise HTTPException(status_code=404, detail="Cover letter not found.")
     filename = record.filename_cover.replace(".pdf", ".html") if record.filename_cover.endswith(".pdf") else (record.filename_cover or "cover") + ".html"
@@ -1857,8 +2061,8 @@ async def api_result_cover_html(token: str) -> Response:
 
 @app.get("/api/result/{token}/cover-markdown")
 async def api_result_cover_markdown(token: str) -> Response:
-    record = artifact_cache.get(token)
-    if not record or not record.cover_html:
+    record = await artifact_cache.aget(token, include_html=False)
+    if not record or not record.cover_html_hash:
         raise HTTPException(status_code=404, detail="Cover letter not found.")
     md = _cover_markdown(record)
     filename = record.filename_cover.replace(".pdf", ".md") if record.filename_cover.endswith(".pdf") else (record.filename_cover or "cover") + ".md"
@@ -1868,25 +2072,22 @@ async def api_result_cover_markdown(token: str) -> Response:
 
 @app.get("/download/{token}/{file_id}")
 async def download_file(token: str, file_id: str) -> Response:
-    record = artifact_cache.get(token)
+    record = await artifact_cache.aget(token, include_html=False)
     if not record:
         raise HTTPException(status_code=404, detail="File token expired or invalid.")
 
     if file_id == "cv":
-        data = record.cv_pdf_bytes
-        filename = record.filename_cv
-        if not data:
+        response = await _pdf_response(artifact_cache, record.cv_pdf_hash, record.filename_cv)
+        if response is None:
             raise HTTPException(status_code=404, detail="CV PDF not available. Use HTML/Markdown download.")
     elif file_id == "cover":
-        data = record.cover_pdf_bytes
-        filename = record.filename_cover
-        if not data:
+        response = await _pdf_response(artifact_cache, record.cover_pdf_hash, record.filename_cover)
+        if response is None:
             raise HTTPException(status_code=404, detail="Cover letter PDF not available.")
     else:
         raise HTTPException(status_code=400, detail="Invalid file id.")
 
-    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
-    return Response(content=data, media_type="application/pdf", headers=headers)
+    return response
 
 
 @app.post("/email", response_class=HTMLResponse)
@@ -1894,7 +2095,7 @@ async def send_email(
     token: str = Form(...),
     recipient_email: str = Form(...),
 ) -> HTMLResponse:
-    record = artifact_cache.get(token)
+    record = await artifact_cache.aget(token, include_html=False)
     if not record:
         raise HTTPException(status_code=404, detail="Token expired. Generate again.")
 
@@ -1922,9 +2123,9 @@ async def send_email(
             subject=subject,
             body_text=body,
             cv_filename=record.filename_cv,
-            cv_bytes=record.cv_pdf_bytes,
+            cv_bytes=await artifact_cache.aread_blob(record.cv_pdf_hash),
             cover_filename=record.filename_cover,
-            cover_bytes=record.cover_pdf_bytes,
+            cover_bytes=await artifact_cache.aread_blob(record.cover_pdf_hash),
         )
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Email send failed: {exc}") from exc
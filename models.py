@@ -347,6 +347,11 @@ class ArtifactRecord(BaseModel):
     cover_pdf_bytes: bytes = b""
     cv_html: str
     cover_html: str = ""
+    # Blob-store digests; the cache moves PDF bytes and HTML out of the record on write.
+    cv_pdf_hash: str = ""
+    cover_pdf_hash: str = ""
+    cv_html_hash: str = ""
+    cover_html_hash: str = ""
     match: MatchPayload
     warning: Optional[str] = None
     expires_at: float
@@ -392,8 +397,10 @@ class MonsterCVProfile(BaseModel):
 class MonsterArtifactRecord(BaseModel):
     token: str
     filename: str
-    pdf_bytes: bytes
-    html: str
+    pdf_bytes: bytes = b""
+    html: str = ""
+    pdf_hash: str = ""
+    html_hash: str = ""
     timeline: MonsterCVProfile
     expires_at: float
 
@@ -0,0 +1,213 @@
+"""Shared key-value backends for running several workers or nodes against one state store.
+
+``RedisBackend`` talks to any Redis-protocol server (Redis, Valkey, KeyDB);
+``MemoryBackend`` implements the same operations in-process and is what the
+tests run against. Every write carries its TTL atomically (``SET ... PX``),
+and ``lock()`` is a lease-based distributed lock released only by its owner.
+"""
+from __future__ import annotations
+
+import abc
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import redis
+except ImportError:  # optional: pip install redis
+    redis = None
+
+
+class LockTimeout(TimeoutError):
+    pass
+
+
+class StateBackend(abc.ABC):
+    """Operations the shared caches need. Keys are strings, values are bytes."""
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abc.abstractmethod
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        """Store ``value``, expiring after ``ttl`` seconds; with ``nx`` only if the key is absent."""
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def expire(self, key: str, ttl: float) -> bool:
+        """Reset the TTL of an existing key. False when the key does not exist."""
+
+    @abc.abstractmethod
+    def zadd(self, key: str, member: str, score: float, ttl: Optional[float] = None) -> None:
+        """Add ``member`` to a sorted set unless already present, and refresh the set's TTL."""
+
+    @abc.abstractmethod
+    def zrange(self, key: str) -> List[str]:
+        """Members of a sorted set, lowest score first."""
+
+    @abc.abstractmethod
+    def release(self, key: str, token: str) -> bool:
+        """Delete ``key`` only if it still holds ``token``."""
+
+    @contextmanager
+    def lock(self, name: str, lease: float = 30.0, wait: float = 30.0) -> Iterator[None]:
+        """Hold the distributed lock ``name``.
+
+        The lease bounds how long a crashed holder can block others; work under
+        the lock must finish well within it.
+        """
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + wait
+        delay = 0.002
+        while not self.set(name, token.encode(), ttl=lease, nx=True):
+            if time.monotonic() >= deadline:
+                raise LockTimeout(f"Timed out waiting for lock {name}.")
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+        try:
+            yield
+        finally:
+            self.release(name, token)
+
+
+class MemoryBackend(StateBackend):
+    """In-process stand-in for Redis with the same TTL and locking semantics."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._values: Dict[str, Tuple[object, Optional[float]]] = {}
+
+    def _live(self, key: str) -> Optional[object]:
+        entry = self._values.get(key)
+        if entry is None:
+            return None
+        value, deadline = entry
+        if deadline is not None and deadline <= self._clock():
+            del self._values[key]
+            return None
+        return value
+
+    def _deadline(self, ttl: Optional[float]) -> Optional[float]:
+        return None if ttl is None else self._clock() + ttl
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._live(key)
+        return value if isinstance(value, bytes) else None
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        with self._lock:
+            if nx and self._live(key) is not None:
+                return False
+            self._values[key] = (bytes(value), self._deadline(ttl))
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._values.pop(key, None)
+
+    def exists(self, key: str) -> bool:
+        with self._lock:
+            return self._live(key) is not None
+
+    def expire(self, key: str, ttl: float) -> bool:
+        with self._lock:
+            value = self._live(key)
+            if value is None:
+                return False
+            self._values[key] = (value, self._deadline(ttl))
+            return True
+
+    def zadd(self, key: str, member: str, score: float, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            members = self._live(key)
+            if not isinstance(members, dict):
+                members = {}
+            members.setdefault(member, score)
+            self._values[key] = (members, self._deadline(ttl))
+
+    def zrange(self, key: str) -> List[str]:
+        with self._lock:
+            members = self._live(key)
+            if not isinstance(members, dict):
+                return []
+            return sorted(members, key=lambda member: (members[member], member))
+
+    def release(self, key: str, token: str) -> bool:
+        with self._lock:
+            if self._live(key) != token.encode():
+                return False
+            del self._values[key]
+            return True
+
+
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisBackend(StateBackend):
+    def __init__(self, url: str, prefix: str = "happyrav:") -> None:
+        if redis is None:
+            raise ValueError("HAPPYRAV_REDIS_URL is set but the redis package is not installed.")
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._release = self._client.register_script(_RELEASE_SCRIPT)
+
+    def _k(self, key: str) -> str:
+        return self.prefix + key
+
+    @staticmethod
+    def _ms(ttl: Optional[float]) -> Optional[int]:
+        return None if ttl is None else max(1, int(ttl * 1000))
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(self._k(key))
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        return bool(self._client.set(self._k(key), value, px=self._ms(ttl), nx=nx))
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self._k(key))
+
+    def exists(self, key: str) -> bool:
+        return bool(self._client.exists(self._k(key)))
+
+    def expire(self, key: str, ttl: float) -> bool:
+        return bool(self._client.pexpire(self._k(key), self._ms(ttl)))
+
+    def zadd(self, key: str, member: str, score: float, ttl: Optional[float] = None) -> None:
+        pipe = self._client.pipeline()
+        pipe.zadd(self._k(key), {member: score}, nx=True)
+        if ttl is not None:
+            pipe.pexpire(self._k(key), self._ms(ttl))
+        pipe.execute()
+
+    def zrange(self, key: str) -> List[str]:
+        return [member.decode() for member in self._client.zrange(self._k(key), 0, -1)]
+
+    def release(self, key: str, token: str) -> bool:
+        return bool(self._release(keys=[self._k(key)], args=[token]))
+
+
+def create_state_backend() -> Optional[StateBackend]:
+    """``RedisBackend`` for ``HAPPYRAV_REDIS_URL``, or None to keep all state on local disk."""
+    url = (os.getenv("HAPPYRAV_REDIS_URL") or "").strip()
+    if not url:
+        return None
+    return RedisBackend(url, prefix=os.getenv("HAPPYRAV_REDIS_PREFIX", "happyrav:"))
@@ -1,25 +1,63 @@
-"""In-memory TTL caches for sessions and generated artifacts."""
+"""Disk-backed TTL caches for sessions and generated artifacts."""
 from __future__ import annotations
 
+import asyncio
+import errno
+import hashlib
+import heapq
 import json
 import os
 import pickle
+import sqlite3
 import threading
 import time
 import uuid
-from dataclasses import dataclass, field
+import zlib
+from collections import OrderedDict
+from collections.abc import Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields as dataclass_fields
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX hosts fall back to in-process locking
+    fcntl = None
 
 from happyrav.models import ArtifactRecord, ExtractedProfile, MonsterArtifactRecord, SessionState
+from happyrav.services.backends import StateBackend, create_state_backend
+from happyrav.services.compression import LazyTexts, compressor_from_env, decompress, is_frame, pack_texts, unpack_texts
+from happyrav.services.quota import QuotaManager
+from happyrav.services.serialization import (
+    RecordSchema,
+    Serializer,
+    cache_format,
+    is_legacy,
+    legacy_to_plain,
+    model_schema,
+)
 
 DATA_DIR = Path("data")
+SWEEP_INTERVAL_SECONDS = float(os.getenv("HAPPYRAV_SWEEP_INTERVAL", "60"))
+SESSION_HOT_MAX_ENTRIES = int(os.getenv("HAPPYRAV_SESSION_HOT_ENTRIES", "256"))
+SESSION_HOT_MAX_BYTES = int(os.getenv("HAPPYRAV_SESSION_HOT_BYTES", str(64 * 1024 * 1024)))
+DOCUMENT_CACHE_MAX_BYTES = int(os.getenv("HAPPYRAV_DOCUMENT_MAX_BYTES", str(512 * 1024 * 1024)))
+DOCUMENT_CACHE_TTL_SECONDS = int(os.getenv("HAPPYRAV_DOCUMENT_TTL", str(30 * 24 * 3600)))
+SESSION_BACKENDS = ("pickle", "sqlite", "redis")
+# Large document texts and HTML blobs are stored compressed (HAPPYRAV_COMPRESSION=off disables).
+COMPRESSOR = compressor_from_env()
 
 
 @dataclass
 class SessionRecord:
     state: SessionState
     document_texts: Dict[str, str] = field(default_factory=dict)
+    # Derived from each text at upload, so state-only requests never inflate the texts.
+    document_fragments: Dict[str, ExtractedProfile] = field(default_factory=dict)
+    document_digests: Dict[str, str] = field(default_factory=dict)
     photo_data_url: str = ""
     signature_data_url: str = ""
     extraction_signature: str = ""
@@ -28,177 +66,1769 @@ class SessionRecord:
     llm_debug: Dict[str, Any] = field(default_factory=dict)
     chat_history: List[Dict[str, str]] = field(default_factory=list)
     preseed_profile: Optional[ExtractedProfile] = None
+    # Bumped on every successful write; stale writers are merged instead of clobbering.
+    version: int = 0
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state.pop("_origin", None)
+        return state
+
+
+# SessionRecord attributes that hold Pydantic models and must be rebuilt on load.
+_SESSION_MODEL_FIELDS: Dict[str, Any] = {
+    "state": SessionState,
+    "llm_profile": ExtractedProfile,
+    "preseed_profile": ExtractedProfile,
+}
+# SessionRecord attributes holding a mapping of Pydantic models.
+_SESSION_MODEL_MAP_FIELDS: Dict[str, Any] = {
+    "document_fragments": ExtractedProfile,
+}
+
+
+def session_to_dict(record: SessionRecord, attrs: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    data: Dict[str, Any] = {}
+    for name in attrs or (f.name for f in dataclass_fields(SessionRecord)):
+        value = getattr(record, name)
+        if name == "document_texts":
+            value = pack_texts(value, COMPRESSOR)
+        elif name in _SESSION_MODEL_MAP_FIELDS:
+            value = {key: item.model_dump() for key, item in value.items()}
+        data[name] = value.model_dump() if isinstance(value, BaseModel) else value
+    return data
+
+
+def session_from_dict(data: Dict[str, Any]) -> SessionRecord:
+    values: Dict[str, Any] = {}
+    for f in dataclass_fields(SessionRecord):
+        if f.name not in data:
+            continue
+        value = data[f.name]
+        model = _SESSION_MODEL_FIELDS.get(f.name)
+        if model is not None and value is not None:
+            value = model.model_validate(value)
+        elif f.name == "document_texts":
+            # Compressed documents stay compressed until a handler reads them.
+            value = unpack_texts(value)
+        elif f.name in _SESSION_MODEL_MAP_FIELDS:
+            value = {key: _SESSION_MODEL_MAP_FIELDS[f.name].model_validate(item) for key, item in value.items()}
+        values[f.name] = value
+    return SessionRecord(**values)
+
+
+SESSION_SCHEMA = RecordSchema("session", 1, to_dict=session_to_dict, from_dict=session_from_dict)
+ARTIFACT_SCHEMA = model_schema("artifact", ArtifactRecord)
+MONSTER_SCHEMA = model_schema("monster", MonsterArtifactRecord)
+
+
+class _Origin(NamedTuple):
+    """What a record looked like when it was read: the store's stamp and a loader for that snapshot."""
+
+    stamp: Any
+    load_base: Callable[[], SessionRecord]
+    raw: Any = None
+
+
+def _set_origin(record: SessionRecord, stamp: Any, load_base: Callable[[], SessionRecord], raw: Any = None) -> None:
+    record._origin = _Origin(stamp, load_base, raw)
+
+
+def _merge_value(base: Any, mine: Any, theirs: Any) -> Any:
+    """Three-way merge: keep ``theirs`` unless this writer changed the value relative to ``base``."""
+    if mine == base:
+        return theirs
+    if theirs == base:
+        return mine
+    if isinstance(mine, BaseModel) and type(base) is type(mine) is type(theirs):
+        return theirs.model_copy(update={
+            name: _merge_value(getattr(base, name), getattr(mine, name), getattr(theirs, name))
+            for name in type(mine).model_fields
+        })
+    if isinstance(base, Mapping) and isinstance(mine, Mapping) and isinstance(theirs, Mapping):
+        merged = LazyTexts(theirs.stored()) if isinstance(theirs, LazyTexts) else dict(theirs)
+        for key in base.keys() - mine.keys():
+            if theirs.get(key) == base[key]:
+                merged.pop(key, None)
+        for key, value in mine.items():
+            if key not in base or base[key] != value:
+                merged[key] = _merge_value(base.get(key), value, theirs[key]) if key in theirs else value
+        return merged
+    if (
+        isinstance(base, list) and isinstance(mine, list) and isinstance(theirs, list)
+        and mine[:len(base)] == base and theirs[:len(base)] == base
+    ):
+        # Both sides appended (e.g. chat history): keep both tails.
+        return theirs + mine[len(base):]
+    return mine
+
+
+def merge_session_records(
+    base: Optional[SessionRecord], mine: SessionRecord, theirs: SessionRecord
+) -> SessionRecord:
+    """Apply the changes ``mine`` made since ``base`` on top of the stored ``theirs``.
+
+    Values this writer did not touch keep the concurrent writer's version; when
+    both changed the same scalar, this (later) writer wins. Without a base the
+    write is treated as a full overwrite.
+    """
+    values = {}
+    for f in dataclass_fields(SessionRecord):
+        if f.name == "version":
+            continue
+        mine_value = getattr(mine, f.name)
+        values[f.name] = mine_value if base is None else _merge_value(
+            getattr(base, f.name), mine_value, getattr(theirs, f.name)
+        )
+    return SessionRecord(**values, version=theirs.version)
+
+
+def _adopt(record: SessionRecord, merged: SessionRecord) -> None:
+    """Copy ``merged`` into the caller's record so its response reflects what was stored."""
+    for f in dataclass_fields(SessionRecord):
+        setattr(record, f.name, getattr(merged, f.name))
+
+
+def _atomic_write(path: Path, payload: bytes) -> Tuple[int, int, int]:
+    """Write via a sibling temp file and ``os.replace``; readers never see a partial file.
+
+    Returns the file's stamp (inode, mtime_ns, size), which survives the rename.
+    """
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(payload)
+            f.flush()
+            st = os.fstat(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _stamp(path: Path) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class _KeyLocks:
+    """Per-key write locks that also hold across worker processes.
+
+    Keys hash onto a fixed set of lock files under ``root`` so nothing needs
+    cleaning up; ``flock`` serializes processes and a thread lock per stripe
+    serializes threads within this one.
+    """
+
+    def __init__(self, root: Path, stripes: int = 64) -> None:
+        root.mkdir(parents=True, exist_ok=True)
+        self._paths = [root / f"{i:02d}.lock" for i in range(stripes)]
+        self._thread_locks = [threading.Lock() for _ in range(stripes)]
+
+    @contextmanager
+    def hold(self, key: str) -> Iterator[None]:
+        stripe = zlib.crc32(key.encode()) % len(self._paths)
+        with self._thread_locks[stripe]:
+            if fcntl is None:
+                yield
+                return
+            with open(self._paths[stripe], "a+b") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# SessionRecord attributes grouped by the fields handlers typically change together.
+EXTRACTION_FIELDS: Tuple[str, ...] = ("extraction_signature", "llm_profile", "llm_warning", "llm_debug")
+
+
+class ExpiryIndex:
+    """Min-heap of (deadline, key) pairs with lazy invalidation.
+
+    Rescheduling a key pushes a new heap entry; stale entries are skipped when
+    popped because their deadline no longer matches ``_deadlines``.
+    """
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[float, str]] = []
+        self._deadlines: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._deadlines
+
+    def schedule(self, key: str, deadline: float) -> None:
+        with self._lock:
+            self._deadlines[key] = deadline
+            heapq.heappush(self._heap, (deadline, key))
+            # Keep the heap from filling up with stale entries for hot keys.
+            if len(self._heap) > 2 * len(self._deadlines) + 64:
+                self._heap = [(d, k) for k, d in self._deadlines.items()]
+                heapq.heapify(self._heap)
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._deadlines.pop(key, None)
+
+    def deadline(self, key: str) -> Optional[float]:
+        return self._deadlines.get(key)
 
+    def pop_expired(self, now: Optional[float] = None) -> List[str]:
+        now = time.time() if now is None else now
+        expired: List[str] = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, key = heapq.heappop(self._heap)
+                if self._deadlines.get(key) == deadline:
+                    del self._deadlines[key]
+                    expired.append(key)
+        return expired
+
+    def pop_earliest(self, keep: str = "") -> Optional[str]:
+        """Remove and return the key with the nearest deadline, other than ``keep``."""
+        with self._lock:
+            held = None
+            found = None
+            while self._heap:
+                deadline, key = heapq.heappop(self._heap)
+                if self._deadlines.get(key) != deadline:
+                    continue
+                if key == keep:
+                    held = (deadline, key)
+                    continue
+                del self._deadlines[key]
+                found = key
+                break
+            if held is not None:
+                heapq.heappush(self._heap, held)
+            return found
+
+
+@dataclass(frozen=True)
+class Namespace:
+    """Storage settings for one kind of record.
+
+    Each namespace has its own directory (or key prefix on a shared backend),
+    so sweeping or budgeting one never scans another's files.
+    ``max_bytes=0`` means no size budget.
+    """
+
+    name: str
+    ttl_seconds: int
+    max_bytes: int = 0
+    sweep_interval: float = SWEEP_INTERVAL_SECONDS
+
+
+def namespace(name: str, ttl_seconds: int, max_bytes: int = 0) -> Namespace:
+    """Settings for ``name``, overridable by ``HAPPYRAV_<NAME>_TTL``, ``_MAX_BYTES`` and ``_SWEEP_INTERVAL``."""
+    env = f"HAPPYRAV_{name.upper()}"
+    return Namespace(
+        name=name,
+        ttl_seconds=int(os.getenv(f"{env}_TTL", str(ttl_seconds))),
+        max_bytes=int(os.getenv(f"{env}_MAX_BYTES", str(max_bytes))),
+        sweep_interval=float(os.getenv(f"{env}_SWEEP_INTERVAL", str(SWEEP_INTERVAL_SECONDS))),
+    )
+
+
+def _report_size(quota: Optional[QuotaManager], delta: int) -> None:
+    """Pass a namespace's change in bytes on to the global quota, if one is registered."""
+    if quota is None or not delta:
+        return
+    if delta > 0:
+        quota.grew(delta)
+    else:
+        quota.shrank(-delta)
+
+
+class _SizeBudget:
+    """Bytes held by one namespace; ``over()`` once they exceed ``max_bytes`` (0 = unbounded)."""
+
+    def __init__(self, max_bytes: int = 0) -> None:
+        self.max_bytes = max_bytes
+        self.total = 0
+        self.evictions = 0
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, key: str, size: int) -> int:
+        """Record ``key`` at ``size`` bytes; returns the change in total (negative when it shrank)."""
+        with self._lock:
+            delta = size - self._sizes.get(key, 0)
+            self.total += delta
+            self._sizes[key] = size
+            return delta
+
+    def discard(self, key: str) -> int:
+        """Forget ``key``; returns the bytes it held."""
+        with self._lock:
+            size = self._sizes.pop(key, 0)
+            self.total -= size
+            return size
+
+    def over(self) -> bool:
+        return bool(self.max_bytes) and self.total > self.max_bytes
+
+    def evict(
+        self, expiry: ExpiryIndex, remove: Callable[[str], None], keep: str = "", nbytes: Optional[int] = None
+    ) -> int:
+        """Remove the entries nearest to expiry until back under budget (or ``nbytes`` are freed), never ``keep``.
+
+        Returns the bytes freed.
+        """
+        freed = 0
+        while self.over() if nbytes is None else freed < nbytes:
+            key = expiry.pop_earliest(keep)
+            if key is None:
+                break
+            freed += self._sizes.get(key, 0)
+            remove(key)
+            self.evictions += 1
+        return freed
+
+    def usage(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._sizes), "bytes": self.total, "max_bytes": self.max_bytes, "evictions": self.evictions}
 
-class ArtifactCache:
-    def __init__(self, ttl_seconds: int = 600) -> None:
+
+class LRUTier:
+    """Bounded in-process LRU of serialized payloads, keyed like the disk cache.
+
+    Payloads are kept serialized so every reader gets its own copy of the
+    record: a handler that mutates a record and then fails never leaks the
+    half-applied change to other requests. An optional ``stamp`` ties an entry
+    to the file it came from so a write by another worker invalidates it.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[bytes, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, stamp: Any = None) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and stamp is not None and entry[1] != stamp:
+                self._pop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, payload: bytes, stamp: Any = None) -> None:
+        with self._lock:
+            self._pop(key)
+            if self.max_entries <= 0 or len(payload) > self.max_bytes:
+                return
+            self._entries[key] = (payload, stamp)
+            self._bytes += len(payload)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def _pop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[0])
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class BlobStore:
+    """Content-addressed files under ``DATA_DIR/blobs/<aa>/<sha256>``.
+
+    Identical payloads are stored once. Re-putting an existing blob refreshes its
+    mtime, so a blob outlives every record referencing it as long as the store's
+    TTL is at least as long as the records'.
+    """
+
+    quota: Optional[QuotaManager] = None
+
+    def __init__(
+        self, ttl_seconds: int = 7200, max_bytes: int = 0, sweep_interval: float = SWEEP_INTERVAL_SECONDS
+    ) -> None:
         self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self._root = DATA_DIR / "blobs"
+        self._root.mkdir(parents=True, exist_ok=True)
+        self._expiry = ExpiryIndex()
+        self._budget = _SizeBudget(max_bytes)
+        for path in self._root.glob("*/*"):
+            if "." in path.name:
+                continue
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            self._expiry.schedule(path.name, st.st_mtime + self.ttl_seconds)
+            self._budget.add(path.name, st.st_size)
+        self._budget.evict(self._expiry, self._unlink)
+
+    @classmethod
+    def for_namespace(cls, ns: Namespace) -> "BlobStore":
+        return cls(ttl_seconds=ns.ttl_seconds, max_bytes=ns.max_bytes, sweep_interval=ns.sweep_interval)
+
+    def path(self, digest: str) -> Path:
+        return self._root / digest[:2] / digest
+
+    def put(self, data: bytes, compress: bool = False) -> str:
+        """Store ``data`` under its SHA-256; ``compress`` for text that is only read back via ``get``."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        try:
+            os.utime(path, None)
+        except FileNotFoundError:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            frame = COMPRESSOR.compress(data) if compress else None
+            stored = frame if frame is not None else data
+            _atomic_write(path, stored)
+            _report_size(self.quota, self._budget.add(digest, len(stored)))
+        self._expiry.schedule(digest, time.time() + self.ttl_seconds)
+        self._budget.evict(self._expiry, self._unlink, keep=digest)
+        return digest
+
+    def evict_bytes(self, nbytes: int) -> int:
+        return self._budget.evict(self._expiry, self._unlink, nbytes=nbytes)
+
+    def _unlink(self, digest: str) -> None:
+        _report_size(self.quota, -self._budget.discard(digest))
+        self.path(digest).unlink(missing_ok=True)
+
+    def usage(self) -> Dict[str, int]:
+        return self._budget.usage()
+
+    def get(self, digest: str) -> Optional[bytes]:
+        if not digest:
+            return None
+        try:
+            data = self.path(digest).read_bytes()
+        except OSError:
+            return None
+        return decompress(data) if is_frame(data) else data
+
+    def exists(self, digest: str) -> bool:
+        return bool(digest) and self.path(digest).is_file()
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        removed = 0
+        for digest in self._expiry.pop_expired(now):
+            path = self.path(digest)
+            try:
+                # Another cache instance or worker may have re-put it since we indexed it.
+                deadline = path.stat().st_mtime + self.ttl_seconds
+                if deadline > now:
+                    self._expiry.schedule(digest, deadline)
+                    continue
+                self._unlink(digest)
+                removed += 1
+            except OSError:
+                _report_size(self.quota, -self._budget.discard(digest))
+        return removed
+
+
+# (record attribute holding the payload, attribute holding its digest, payload is text)
+ARTIFACT_BLOB_FIELDS: Tuple[Tuple[str, str, bool], ...] = (
+    ("cv_pdf_bytes", "cv_pdf_hash", False),
+    ("cover_pdf_bytes", "cover_pdf_hash", False),
+    ("cv_html", "cv_html_hash", True),
+    ("cover_html", "cover_html_hash", True),
+)
+MONSTER_BLOB_FIELDS: Tuple[Tuple[str, str, bool], ...] = (
+    ("pdf_bytes", "pdf_hash", False),
+    ("html", "html_hash", True),
+)
+
+
+def _externalize_blobs(blobs: BlobStore, record: Any, blob_fields: Sequence[Tuple[str, str, bool]]) -> Any:
+    """Return a copy of ``record`` with non-empty payloads moved to ``blobs`` and replaced by digests."""
+    update: Dict[str, Any] = {}
+    for value_field, hash_field, is_text in blob_fields:
+        value = getattr(record, value_field)
+        if not value:
+            continue
+        update[hash_field] = blobs.put(value.encode("utf-8"), compress=True) if is_text else blobs.put(value)
+        update[value_field] = "" if is_text else b""
+    return record.model_copy(update=update) if update else record
+
+
+def _load_text_blobs(blobs: BlobStore, record: Any, blob_fields: Sequence[Tuple[str, str, bool]]) -> Any:
+    for value_field, hash_field, is_text in blob_fields:
+        digest = getattr(record, hash_field)
+        if is_text and digest and not getattr(record, value_field):
+            data = blobs.get(digest)
+            if data is not None:
+                setattr(record, value_field, data.decode("utf-8"))
+    return record
+
+
+class _AsyncCacheMixin:
+    """Awaitable counterparts of the blocking cache calls.
+
+    File I/O and (un)pickling run in the default thread pool so a large session
+    write never stalls the event loop for other requests. Each cache already
+    guards its own state with a ``threading.Lock`` (or a per-thread SQLite
+    connection), so the sync methods are safe to call from worker threads.
+    """
+
+    async def aget(self, *args: Any, **kwargs: Any) -> Any:
+        return await asyncio.to_thread(self.get, *args, **kwargs)
+
+    async def aset(self, *args: Any, **kwargs: Any) -> Any:
+        return await asyncio.to_thread(self.set, *args, **kwargs)
+
+    async def adelete(self, key: str) -> None:
+        await asyncio.to_thread(self.delete, key)
+
+
+class _DiskTTLCache(_AsyncCacheMixin):
+    """One file per key under ``DATA_DIR/<subdir>``, expired via an in-memory index.
+
+    The directory is scanned once when the cache is created. Afterwards the
+    request path only touches the file it needs; expired files are removed by
+    ``sweep()``, which the app runs from a background task every
+    ``sweep_interval`` seconds. An entry past its indexed deadline is only
+    removed if its file's mtime agrees, since another worker may have
+    rewritten it in the meantime. With ``max_bytes`` set, the entries nearest to
+    expiry are evicted once the directory outgrows it. Records are encoded by a
+    ``Serializer`` whose codec is chosen per cache (``HAPPYRAV_<NAME>_FORMAT``,
+    see ``services/serialization.py``).
+    """
+
+    subdir = ""
+    prefix = ""
+    name = ""
+    schema: RecordSchema
+    quota: Optional[QuotaManager] = None
+
+    def __init__(
+        self,
+        ttl_seconds: int,
+        codec: Optional[str] = None,
+        max_bytes: int = 0,
+        sweep_interval: float = SWEEP_INTERVAL_SECONDS,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self._serializer = Serializer(self.schema, codec or cache_format(self.name))
         self._lock = threading.Lock()
-        self._root = DATA_DIR / "artifacts"
+        self._root = DATA_DIR / self.subdir
         self._root.mkdir(parents=True, exist_ok=True)
+        self._expiry = ExpiryIndex()
+        self._budget = _SizeBudget(max_bytes)
+        self._hot: Optional[LRUTier] = None
+        self._rebuild_index()
+        self._budget.evict(self._expiry, self._remove)
 
-    def _cleanup(self) -> None:
-        now = time.time()
-        for path in self._root.glob("*.pkl"):
+    @classmethod
+    def for_namespace(cls, ns: Namespace, **kwargs: Any) -> Any:
+        return cls(ttl_seconds=ns.ttl_seconds, max_bytes=ns.max_bytes, sweep_interval=ns.sweep_interval, **kwargs)
+
+    def usage(self) -> Dict[str, int]:
+        return self._budget.usage()
+
+    def evict_bytes(self, nbytes: int) -> int:
+        """Evict the entries nearest to expiry until ``nbytes`` are freed; used by the global quota."""
+        return self._budget.evict(self._expiry, self._remove, nbytes=nbytes)
+
+    def _path(self, key: str) -> Path:
+        return self._root / f"{self.prefix}{key}.pkl"
+
+    def _owns(self, path: Path) -> bool:
+        return path.name.startswith(self.prefix)
+
+    def _rebuild_index(self) -> None:
+        # Temp files left behind by a process that died mid-write.
+        for tmp in self._root.glob(".*.tmp"):
             try:
-                if path.stat().st_mtime < now - self.ttl_seconds:
-                    path.unlink()
+                if tmp.stat().st_mtime < time.time() - 300:
+                    tmp.unlink()
+            except OSError:
+                continue
+        for path in self._root.glob(f"{self.prefix}*.pkl"):
+            if not self._owns(path):
+                continue
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            key = path.stem[len(self.prefix):]
+            self._expiry.schedule(key, st.st_mtime + self.ttl_seconds)
+            self._budget.add(key, st.st_size)
+
+    def _is_live(self, key: str, now: float) -> bool:
+        deadline = self._expiry.deadline(key)
+        if deadline is None:
+            # Written by another process after startup: adopt it from its mtime.
+            try:
+                st = self._path(key).stat()
+            except OSError:
+                return False
+            deadline = st.st_mtime + self.ttl_seconds
+            self._expiry.schedule(key, deadline)
+            _report_size(self.quota, self._budget.add(key, st.st_size))
+        if deadline <= now and not self._refreshed(key, now):
+            self._remove(key)
+            return False
+        return True
+
+    def _refreshed(self, key: str, now: float) -> bool:
+        """Whether another worker rewrote ``key`` since it was indexed; if so it is rescheduled from the file's mtime."""
+        try:
+            st = self._path(key).stat()
+        except OSError:
+            return False
+        deadline = st.st_mtime + self.ttl_seconds
+        if deadline <= now:
+            return False
+        self._expiry.schedule(key, deadline)
+        _report_size(self.quota, self._budget.add(key, st.st_size))
+        return True
+
+    def _write(self, key: str, value: Any) -> Tuple[bytes, Tuple[int, int, int]]:
+        payload = self._serializer.dumps(value)
+        try:
+            stamp = _atomic_write(self._path(key), payload)
+        except OSError as exc:
+            if exc.errno != errno.ENOSPC or self.quota is None or not self.quota.relieve(force=True):
+                raise
+            stamp = _atomic_write(self._path(key), payload)
+        self._expiry.schedule(key, time.time() + self.ttl_seconds)
+        delta = self._budget.add(key, len(payload))
+        if self._hot is not None:
+            self._hot.put(key, payload, stamp)
+        self._budget.evict(self._expiry, self._remove, keep=key)
+        _report_size(self.quota, delta)
+        return payload, stamp
+
+    def _read_raw(self, key: str) -> Optional[Tuple[bytes, Tuple[int, int, int]]]:
+        """Serialized value and file stamp for ``key``, from the hot tier when still current."""
+        if not self._is_live(key, time.time()):
+            return None
+        if self._hot is not None:
+            stamp = _stamp(self._path(key))
+            if stamp is None:
+                self._hot.discard(key)
+                return None
+            payload = self._hot.get(key, stamp)
+            if payload is not None:
+                return payload, stamp
+        try:
+            with open(self._path(key), "rb") as f:
+                payload = f.read()
+                st = os.fstat(f.fileno())
+        except Exception:
+            return None
+        stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if self._hot is not None:
+            self._hot.put(key, payload, stamp)
+        return payload, stamp
+
+    def _decode(self, key: str, payload: bytes) -> Any:
+        try:
+            return self._serializer.loads(payload)
+        except Exception as exc:
+            print(f"{type(self).__name__}: dropping unreadable record {key}: {exc}")
+            return None
+
+    def _read(self, key: str) -> Any:
+        raw = self._read_raw(key)
+        if raw is None:
+            return None
+        return self._decode(key, raw[0])
+
+    def _remove(self, key: str) -> None:
+        self._expiry.discard(key)
+        _report_size(self.quota, -self._budget.discard(key))
+        if self._hot is not None:
+            self._hot.discard(key)
+        self._on_evict(key)
+        try:
+            self._path(key).unlink(missing_ok=True)
+        except Exception:
+            pass
+
+    def _on_evict(self, key: str) -> None:
+        """Hook for subclasses that keep secondary indexes over their keys."""
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Delete every entry whose deadline has passed. Returns the number removed."""
+        now = time.time() if now is None else now
+        removed = 0
+        for key in self._expiry.pop_expired(now):
+            if self._refreshed(key, now):
+                continue
+            _report_size(self.quota, -self._budget.discard(key))
+            if self._hot is not None:
+                self._hot.discard(key)
+            self._on_evict(key)
+            try:
+                self._path(key).unlink(missing_ok=True)
             except Exception:
                 pass
+            removed += 1
+        return removed
+
+    def delete(self, key: str) -> None:
+        self._remove(key)
+
+
+class ArtifactCache(_DiskTTLCache):
+    """Artifact metadata records; PDFs and HTML live in a shared ``BlobStore``.
+
+    Each session's artifact tokens are appended, in creation order, to an index
+    file under ``artifacts/by_session/``, so every worker process sees the
+    artifacts the others wrote. Entries for expired or deleted artifacts are
+    filtered out on read.
+    """
+
+    subdir = "artifacts"
+    name = "artifact"
+    schema = ARTIFACT_SCHEMA
+
+    def __init__(
+        self,
+        ttl_seconds: int = 600,
+        blobs: Optional[BlobStore] = None,
+        codec: Optional[str] = None,
+        max_bytes: int = 0,
+        sweep_interval: float = SWEEP_INTERVAL_SECONDS,
+    ) -> None:
+        super().__init__(ttl_seconds, codec, max_bytes, sweep_interval)
+        self.blobs = blobs or BlobStore(ttl_seconds=ttl_seconds)
+
+    def _owns(self, path: Path) -> bool:
+        # Monster records left here by older versions until MonsterCache moves them.
+        return not path.name.startswith(MonsterCache.LEGACY_PREFIX)
+
+    def _index_path(self, session_id: str) -> Path:
+        digest = hashlib.blake2b(session_id.encode("utf-8"), digest_size=16).hexdigest()
+        return self._root / "by_session" / f"{digest}.idx"
+
+    def _rebuild_index(self) -> None:
+        super()._rebuild_index()
+        (self._root / "by_session").mkdir(exist_ok=True)
+        self._prune_session_index(time.time())
+        # Artifacts written before the index files existed. Records are small now
+        # that PDFs/HTML live in blobs, so one pass at startup is cheap.
+        entries = []
+        for path in self._root.glob("*.pkl"):
+            if not self._owns(path):
+                continue
+            try:
+                record = self._serializer.loads(path.read_bytes())
+                entries.append((path.stat().st_mtime, record))
+            except Exception:
+                continue
+        missing: Dict[Path, List[str]] = {}
+        for _, record in sorted(entries, key=lambda item: item[0]):
+            session_id = str((record.meta or {}).get("session_id") or "")
+            if session_id and not self._index_path(session_id).exists():
+                missing.setdefault(self._index_path(session_id), []).append(record.token)
+        for path, tokens in missing.items():
+            _atomic_write(path, "".join(f"{token}\n" for token in tokens).encode("ascii"))
+
+    def _prune_session_index(self, now: float) -> None:
+        # Every write appends to its session's file, so one untouched for a TTL lists only expired artifacts.
+        for path in (self._root / "by_session").glob("*.idx"):
+            try:
+                if path.stat().st_mtime + self.ttl_seconds <= now:
+                    path.unlink()
+            except OSError:
+                continue
+
+    def _link_session(self, record: ArtifactRecord) -> None:
+        session_id = str((record.meta or {}).get("session_id") or "")
+        if not session_id:
+            return
+        # A single short append is atomic, so workers can share the file without locking.
+        with open(self._index_path(session_id), "a", encoding="ascii") as f:
+            f.write(f"{record.token}\n")
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        removed = super().sweep(now)
+        self._prune_session_index(now)
+        return removed
 
     def create_token(self) -> str:
         return uuid.uuid4().hex
 
     def set(self, record: ArtifactRecord) -> str:
-        self._cleanup()
-        with self._lock:
-            path = self._root / f"{record.token}.pkl"
-            with open(path, "wb") as f:
-                pickle.dump(record, f)
+        self._write(record.token, _externalize_blobs(self.blobs, record, ARTIFACT_BLOB_FIELDS))
+        self._link_session(record)
         return record.token
 
-    def get(self, token: str) -> Optional[ArtifactRecord]:
-        self._cleanup()
-        path = self._root / f"{token}.pkl"
-        if not path.exists():
+    def tokens_for_session(self, session_id: str) -> List[str]:
+        """Live artifact tokens for ``session_id``, oldest first, including those written by other workers."""
+        try:
+            listed = self._index_path(session_id).read_text(encoding="ascii").split()
+        except OSError:
+            return []
+        now = time.time()
+        # Re-saved artifacts are appended again; the first line keeps their creation order.
+        return [
+            token for token in dict.fromkeys(listed)
+            if self._path(token).is_file() and self._is_live(token, now)
+        ]
+
+    def latest_for_session(self, session_id: str) -> Optional[str]:
+        tokens = self.tokens_for_session(session_id)
+        return tokens[-1] if tokens else None
+
+    async def alatest_for_session(self, session_id: str) -> Optional[str]:
+        return await asyncio.to_thread(self.latest_for_session, session_id)
+
+    def get(self, token: str, include_html: bool = True) -> Optional[ArtifactRecord]:
+        """Load the record; PDF bytes stay in the blob store, HTML is loaded unless ``include_html`` is False."""
+        record = self._read(token)
+        if record is None:
             return None
-        with self._lock:
-            try:
-                with open(path, "rb") as f:
-                    return pickle.load(f)
-            except Exception:
-                return None
+        # Records written before the blob store still hold their payloads inline.
+        record = _externalize_blobs(self.blobs, record, ARTIFACT_BLOB_FIELDS)
+        if include_html:
+            record = _load_text_blobs(self.blobs, record, ARTIFACT_BLOB_FIELDS)
+        return record
 
-    def delete(self, token: str) -> None:
-        path = self._root / f"{token}.pkl"
-        try:
-            path.unlink(missing_ok=True)
-        except Exception:
-            pass
+    def blob_path(self, digest: str) -> Optional[Path]:
+        return self.blobs.path(digest) if self.blobs.exists(digest) else None
 
+    def read_blob(self, digest: str) -> bytes:
+        return self.blobs.get(digest) or b""
 
-class DocumentCache:
-    def __init__(self) -> None:
+    async def aread_blob(self, digest: str) -> bytes:
+        return await asyncio.to_thread(self.read_blob, digest)
+
+
+class DocumentCache(_AsyncCacheMixin):
+    """Extracted text per uploaded file, keyed by a BLAKE2b hash of the file bytes.
+
+    Files live under ``documents/<aa>/<bb>/<key>.json``. The total size is kept
+    under ``max_bytes`` by evicting the least recently used entries; reads
+    refresh the file's mtime so recency survives restarts, and ``sweep()``
+    drops entries unused for ``ttl_seconds``. Hit/miss counters show how many
+    OCR and vision calls the cache saved. Entries left in the older flat
+    ``documents/<md5>.json`` layout are moved into their shard when looked up
+    with a ``legacy_key`` and otherwise expire on the same TTL.
+    """
+
+    OCR_METHODS = ("pdf_text_ocr", "ocr_image")
+    quota: Optional[QuotaManager] = None
+
+    def __init__(
+        self,
+        max_bytes: int = DOCUMENT_CACHE_MAX_BYTES,
+        ttl_seconds: int = DOCUMENT_CACHE_TTL_SECONDS,
+        sweep_interval: float = SWEEP_INTERVAL_SECONDS,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
         self._root = DATA_DIR / "documents"
         self._root.mkdir(parents=True, exist_ok=True)
         self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.ocr_calls_saved = 0
+        self.source_bytes_saved = 0
+        self._rebuild_index()
+
+    @classmethod
+    def for_namespace(cls, ns: Namespace) -> "DocumentCache":
+        return cls(max_bytes=ns.max_bytes, ttl_seconds=ns.ttl_seconds, sweep_interval=ns.sweep_interval)
+
+    @staticmethod
+    def content_key(content: bytes) -> str:
+        return hashlib.blake2b(content, digest_size=32).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self._root / key[:2] / key[2:4] / f"{key}.json"
+
+    def legacy_key(self, content: bytes) -> str:
+        """Key of ``content`` in the old flat MD5 layout, or "" once no such entries are left."""
+        return hashlib.md5(content).hexdigest() if self._has_legacy else ""
+
+    def _legacy_path(self, legacy_key: str) -> Path:
+        return self._root / f"{legacy_key}.json"
+
+    def _move_legacy(self, legacy_key: str, path: Path) -> None:
+        # Entries from the old flat layout are keyed by MD5 of the file, so they can
+        # only be moved into their shard once an upload brings the file bytes again.
+        legacy = self._legacy_path(legacy_key)
+        if not legacy.exists():
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(legacy, path)
+        except OSError:
+            pass
+
+    def _rebuild_index(self) -> None:
+        self._has_legacy = next(self._root.glob("*.json"), None) is not None
+        found = []
+        for path in self._root.glob("*/*/*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            found.append((st.st_mtime, path.stem, st.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._bytes += size
+        self._evict()
+
+    def _evict(self, keep: str = "", nbytes: Optional[int] = None) -> int:
+        """Drop least recently used entries until under ``max_bytes`` (or ``nbytes`` are freed)."""
+        freed = 0
+        while self._entries and (self._bytes > self.max_bytes if nbytes is None else freed < nbytes):
+            key, size = next(iter(self._entries.items()))
+            if key == keep:
+                if len(self._entries) == 1:
+                    break
+                self._entries.move_to_end(key)
+                continue
+            del self._entries[key]
+            self._bytes -= size
+            freed += size
+            self.evictions += 1
+            self._path(key).unlink(missing_ok=True)
+        return freed
+
+    def evict_bytes(self, nbytes: int) -> int:
+        with self._lock:
+            freed = self._evict(nbytes=nbytes)
+        _report_size(self.quota, -freed)
+        return freed
 
-    def get(self, content_hash: str) -> Optional[Dict[str, Any]]:
-        path = self._root / f"{content_hash}.json"
-        if not path.exists():
+    def get(self, content_hash: str, legacy_key: str = "") -> Optional[Dict[str, Any]]:
+        """Cached extraction for ``content_hash``; ``legacy_key`` (see ``legacy_key()``) finds old flat entries."""
+        path = self._path(content_hash)
+        if legacy_key:
+            self._move_legacy(legacy_key, path)
+        try:
+            payload = json.loads(path.read_bytes())
+        except Exception:
+            with self._lock:
+                self.misses += 1
+                size = self._entries.pop(content_hash, 0)
+                self._bytes -= size
+            _report_size(self.quota, -size)
             return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        adopted = 0
         with self._lock:
-            try:
-                return json.loads(path.read_text())
-            except Exception:
-                return None
+            self._count_hit(payload)
+            if content_hash in self._entries:
+                self._entries.move_to_end(content_hash)
+            else:
+                # Written by another worker after startup.
+                adopted = self._entries[content_hash] = path.stat().st_size
+                self._bytes += adopted
+        _report_size(self.quota, adopted)
+        return payload
+
+    def _count_hit(self, payload: Dict[str, Any]) -> None:
+        self.hits += 1
+        if payload.get("parse_method") in self.OCR_METHODS:
+            self.ocr_calls_saved += 1
+        self.source_bytes_saved += int(payload.get("size_bytes") or 0)
 
     def set(self, content_hash: str, payload: Dict[str, Any]) -> None:
-        path = self._root / f"{content_hash}.json"
+        path = self._path(content_hash)
+        data = json.dumps(payload).encode("utf-8")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _atomic_write(path, data)
+        except Exception:
+            return
+        with self._lock:
+            delta = len(data) - self._entries.pop(content_hash, 0)
+            self._bytes += delta
+            self._entries[content_hash] = len(data)
+            delta -= self._evict(keep=content_hash)
+        _report_size(self.quota, delta)
+
+    def delete(self, content_hash: str) -> None:
         with self._lock:
+            size = self._entries.pop(content_hash, 0)
+            self._bytes -= size
+        self._path(content_hash).unlink(missing_ok=True)
+        _report_size(self.quota, -size)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Remove entries not read or written for ``ttl_seconds``, walking from least recently used."""
+        cutoff = (time.time() if now is None else now) - self.ttl_seconds
+        removed = 0
+        if self._has_legacy:
+            # Old flat entries that were never looked up again expire on the same TTL.
+            remaining = False
+            for legacy in self._root.glob("*.json"):
+                try:
+                    if legacy.stat().st_mtime > cutoff:
+                        remaining = True
+                        continue
+                    legacy.unlink()
+                    removed += 1
+                except OSError:
+                    continue
+            self._has_legacy = remaining
+        while True:
+            with self._lock:
+                if not self._entries:
+                    break
+                key = next(iter(self._entries))
             try:
-                path.write_text(json.dumps(payload))
-            except Exception:
+                if self._path(key).stat().st_mtime > cutoff:
+                    break
+            except OSError:
                 pass
+            self.delete(key)
+            removed += 1
+        return removed
 
+    def usage(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
 
-class SessionCache:
-    def __init__(self, ttl_seconds: int = 3600) -> None:
-        self.ttl_seconds = ttl_seconds
-        self._lock = threading.Lock()
-        self._root = DATA_DIR / "sessions"
-        self._root.mkdir(parents=True, exist_ok=True)
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "ocr_calls_saved": self.ocr_calls_saved,
+                "source_bytes_saved": self.source_bytes_saved,
+            }
 
-    def _cleanup(self) -> None:
-        now = time.time()
-        for path in self._root.glob("*.pkl"):
-            try:
-                if path.stat().st_mtime < now - self.ttl_seconds:
-                    path.unlink()
-            except Exception:
-                pass
+
+class SessionCache(_DiskTTLCache):
+    """Session records on disk with a write-through LRU tier for repeat reads.
+
+    Writes are compare-and-set: each record remembers the file it was read
+    from, and if another request (or worker) has replaced that file since, the
+    writer's changes are merged onto the newer record instead of overwriting it.
+    """
+
+    subdir = "sessions"
+    name = "session"
+    schema = SESSION_SCHEMA
+
+    def __init__(
+        self,
+        ttl_seconds: int = 3600,
+        hot_max_entries: int = SESSION_HOT_MAX_ENTRIES,
+        hot_max_bytes: int = SESSION_HOT_MAX_BYTES,
+        codec: Optional[str] = None,
+        max_bytes: int = 0,
+        sweep_interval: float = SWEEP_INTERVAL_SECONDS,
+    ) -> None:
+        super().__init__(ttl_seconds, codec, max_bytes, sweep_interval)
+        self._hot = LRUTier(max_entries=hot_max_entries, max_bytes=hot_max_bytes)
+        self._key_locks = _KeyLocks(self._root / ".locks")
+        self.conflicts = 0
+
+    def hot_stats(self) -> Dict[str, int]:
+        return self._hot.stats()
 
     def create_session_id(self) -> str:
         return uuid.uuid4().hex
 
-    def set(self, record: SessionRecord) -> str:
-        self._cleanup()
-        with self._lock:
-            path = self._root / f"{record.state.session_id}.pkl"
-            with open(path, "wb") as f:
-                pickle.dump(record, f)
-        return record.state.session_id
+    def set(self, record: SessionRecord, fields: Optional[Sequence[str]] = None) -> str:
+        """Persist ``record``, merging onto the stored copy if it changed since ``record`` was read.
+
+        ``fields`` is a hint for partial-update backends; files are always written whole.
+        """
+        session_id = record.state.session_id
+        origin: Optional[_Origin] = getattr(record, "_origin", None)
+        with self._key_locks.hold(session_id):
+            stored = self._read_raw(session_id)
+            to_write = record
+            version = record.version
+            if stored is not None and (origin is None or origin.stamp != stored[1]):
+                current = self._decode(session_id, stored[0])
+                if current is not None:
+                    if origin is not None:
+                        self.conflicts += 1
+                    to_write = merge_session_records(origin.load_base() if origin else None, record, current)
+                    version = current.version
+            to_write.version = version + 1
+            payload, stamp = self._write(session_id, to_write)
+        if to_write is not record:
+            _adopt(record, to_write)
+        _set_origin(record, stamp, lambda: self._serializer.loads(payload))
+        return session_id
 
     def get(self, session_id: str) -> Optional[SessionRecord]:
-        self._cleanup()
-        path = self._root / f"{session_id}.pkl"
-        if not path.exists():
+        raw = self._read_raw(session_id)
+        if raw is None:
             return None
-        with self._lock:
-            try:
-                with open(path, "rb") as f:
-                    return pickle.load(f)
-            except Exception:
-                return None
+        payload, stamp = raw
+        record = self._decode(session_id, payload)
+        if record is None:
+            return None
+        _set_origin(record, stamp, lambda: self._serializer.loads(payload))
+        return record
 
     def touch(self, session_id: str) -> Optional[SessionRecord]:
         record = self.get(session_id)
         if not record:
             return None
         record.state.expires_at = time.time() + self.ttl_seconds
-        self.set(record)
+        self.set(record, fields=("state",))
         return record
 
-    def delete(self, session_id: str) -> None:
-        path = self._root / f"{session_id}.pkl"
+    async def atouch(self, session_id: str) -> Optional[SessionRecord]:
+        return await asyncio.to_thread(self.touch, session_id)
+
+
+class _Transaction:
+    """``with`` wrapper that runs the block in BEGIN IMMEDIATE / COMMIT on an autocommit connection."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self._conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self._conn.execute("BEGIN IMMEDIATE")
+        return self._conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+class SqliteSessionCache(_AsyncCacheMixin):
+    """Session store in a single SQLite database (WAL mode), one row per session.
+
+    The large parts of a record live in their own columns so a handler that
+    only changed ``state`` rewrites that column instead of re-serializing every
+    uploaded document. Expiry is a range query on the indexed ``expires_at``.
+    A ``version`` column makes writes compare-and-set, as in ``SessionCache``.
+    With ``max_bytes`` set, the sessions closest to expiry are evicted once the
+    rows' record data outgrows it.
+    """
+
+    # SessionRecord attribute -> column. Extraction bookkeeping shares one small column;
+    # per-document fragments and digests are stored with the texts they derive from.
+    COLUMNS: Dict[str, str] = {
+        "state": "state",
+        "document_texts": "document_texts",
+        "document_fragments": "document_texts",
+        "document_digests": "document_texts",
+        "chat_history": "chat_history",
+        "photo_data_url": "photo_data_url",
+        "signature_data_url": "signature_data_url",
+        "extraction_signature": "extraction",
+        "llm_profile": "extraction",
+        "llm_warning": "extraction",
+        "llm_debug": "extraction",
+        "preseed_profile": "extraction",
+    }
+
+    def __init__(
+        self,
+        ttl_seconds: int = 3600,
+        path: Optional[Path] = None,
+        codec: Optional[str] = None,
+        sweep_interval: float = SWEEP_INTERVAL_SECONDS,
+        max_bytes: int = 0,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self.max_bytes = max_bytes
+        self.quota: Optional[QuotaManager] = None
+        self.evictions = 0
+        self._size_lock = threading.Lock()
+        self._serializer = Serializer(SESSION_SCHEMA, codec or cache_format("session"))
+        self._path = path or DATA_DIR / "sessions" / "sessions.db"
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self.conflicts = 0
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " session_id TEXT PRIMARY KEY,"
+                " expires_at REAL NOT NULL,"
+                " state BLOB NOT NULL,"
+                " document_texts BLOB,"
+                " chat_history BLOB,"
+                " photo_data_url TEXT NOT NULL DEFAULT '',"
+                " signature_data_url TEXT NOT NULL DEFAULT '',"
+                " extraction BLOB,"
+                " version INTEGER NOT NULL DEFAULT 0"
+                ")"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(sessions)")}
+            if "version" not in columns:
+                conn.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions (expires_at)")
+        self._row_bytes_total = self._stored_bytes()
+        self._enforce_budget()
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets readers proceed while a writer commits.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self._path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self) -> _Transaction:
+        return _Transaction(self._conn())
+
+    # Columns stored as plain text rather than encoded attribute dicts.
+    TEXT_COLUMNS = ("photo_data_url", "signature_data_url")
+
+    def _column_values(self, record: SessionRecord, columns: Iterable[str]) -> Dict[str, Any]:
+        """Each BLOB column holds the encoded dict of the record attributes mapped to it."""
+        values: Dict[str, Any] = {}
+        for column in columns:
+            if column in self.TEXT_COLUMNS:
+                values[column] = getattr(record, column)
+            else:
+                attrs = [name for name, target in self.COLUMNS.items() if target == column]
+                values[column] = self._serializer.encode(session_to_dict(record, attrs))
+        return values
+
+    def create_session_id(self) -> str:
+        return uuid.uuid4().hex
+
+    def _decode(self, row: Dict[str, Any], version: int) -> SessionRecord:
+        data: Dict[str, Any] = {"version": version}
+        for column, value in row.items():
+            if column in self.TEXT_COLUMNS:
+                data[column] = value or ""
+            elif not value:
+                continue
+            elif is_legacy(value):
+                # Rows written before the serialization layer hold a pickled attribute value.
+                legacy = legacy_to_plain(pickle.loads(value))
+                data.update(legacy if column == "extraction" else {column: legacy})
+            else:
+                data.update(self._serializer.decode(value))
+        return session_from_dict(data)
+
+    def _attach_origin(self, record: SessionRecord, row: Dict[str, Any]) -> None:
+        version = record.version
+        _set_origin(record, version, lambda: self._decode(row, version), raw=row)
+
+    def _select(self, conn: sqlite3.Connection, session_id: str) -> Optional[Tuple[Dict[str, Any], int]]:
+        columns = sorted(set(self.COLUMNS.values()))
+        row = conn.execute(
+            f"SELECT version, {', '.join(columns)} FROM sessions WHERE session_id = ? AND expires_at > ?",
+            (session_id, time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(columns, row[1:])), row[0]
+
+    def set(self, record: SessionRecord, fields: Optional[Sequence[str]] = None) -> str:
+        """Compare-and-set ``record``; with ``fields`` only the columns backing those attributes are rewritten.
+
+        If the row's version moved on since ``record`` was read, the record is
+        merged onto the stored row and written whole.
+        """
+        session_id = record.state.session_id
+        origin: Optional[_Origin] = getattr(record, "_origin", None)
+        expires_at = time.time() + self.ttl_seconds
+        all_columns = sorted(set(self.COLUMNS.values()))
+        with self._transaction() as conn:
+            row = conn.execute(
+                f"SELECT version, {', '.join(f'COALESCE(length({column}), 0)' for column in all_columns)}"
+                " FROM sessions WHERE session_id = ? AND expires_at > ?",
+                (session_id, time.time()),
+            ).fetchone()
+            old_sizes = dict(zip(all_columns, row[1:])) if row is not None else {}
+            if row is not None and origin is not None and origin.stamp == row[0] and fields:
+                columns = sorted({self.COLUMNS[name] for name in fields})
+                values = self._column_values(record, columns)
+                assignments = ", ".join(f"{column} = ?" for column in columns)
+                conn.execute(
+                    f"UPDATE sessions SET expires_at = ?, version = ?, {assignments} WHERE session_id = ?",
+                    (expires_at, row[0] + 1, *values.values(), session_id),
+                )
+                record.version = row[0] + 1
+                self._attach_origin(record, {**origin.raw, **values})
+                to_write = None
+            else:
+                to_write = record
+                version = record.version
+                if row is not None and (origin is None or origin.stamp != row[0]):
+                    current = self._select(conn, session_id)
+                    if current is not None:
+                        if origin is not None:
+                            self.conflicts += 1
+                        stored = self._decode(*current)
+                        to_write = merge_session_records(origin.load_base() if origin else None, record, stored)
+                        version = current[1]
+                elif row is not None:
+                    version = row[0]
+                to_write.version = version + 1
+                values = self._column_values(to_write, all_columns)
+                names = ", ".join(values)
+                placeholders = ", ".join("?" for _ in values)
+                conn.execute(
+                    f"INSERT OR REPLACE INTO sessions (session_id, expires_at, version, {names})"
+                    f" VALUES (?, ?, ?, {placeholders})",
+                    (session_id, expires_at, to_write.version, *values.values()),
+                )
+        if to_write is not None:
+            if to_write is not record:
+                _adopt(record, to_write)
+            self._attach_origin(record, values)
+        self._resized(sum(len(value or b"") - old_sizes.get(column, 0) for column, value in values.items()))
+        if self.max_bytes and self._row_bytes_total > self.max_bytes:
+            self._enforce_budget(keep=session_id)
+        return session_id
+
+    def get(self, session_id: str) -> Optional[SessionRecord]:
         try:
-            path.unlink(missing_ok=True)
+            selected = self._select(self._conn(), session_id)
+            if selected is None:
+                return None
+            record = self._decode(*selected)
         except Exception:
-            pass
+            return None
+        self._attach_origin(record, selected[0])
+        return record
 
+    def touch(self, session_id: str) -> Optional[SessionRecord]:
+        record = self.get(session_id)
+        if not record:
+            return None
+        record.state.expires_at = time.time() + self.ttl_seconds
+        self.set(record, fields=("state",))
+        return record
 
-class MonsterCache:
-    def __init__(self, ttl_seconds: int = 7200) -> None:
-        self.ttl_seconds = ttl_seconds
-        self._lock = threading.Lock()
-        self._root = DATA_DIR / "artifacts"
-        self._root.mkdir(parents=True, exist_ok=True)
+    async def atouch(self, session_id: str) -> Optional[SessionRecord]:
+        return await asyncio.to_thread(self.touch, session_id)
 
-    def _cleanup(self) -> None:
-        now = time.time()
-        for path in self._root.glob("monster_*.pkl"):
+    def _row_bytes(self) -> str:
+        """SQL expression for the bytes a row's record columns hold."""
+        return " + ".join(f"COALESCE(length({column}), 0)" for column in sorted(set(self.COLUMNS.values())))
+
+    def _stored_bytes(self) -> int:
+        return self._conn().execute(f"SELECT COALESCE(SUM({self._row_bytes()}), 0) FROM sessions").fetchone()[0]
+
+    def _resized(self, delta: int) -> None:
+        with self._size_lock:
+            self._row_bytes_total += delta
+        _report_size(self.quota, delta)
+
+    def _enforce_budget(self, keep: str = "") -> int:
+        """Evict the sessions closest to expiry, never ``keep``, until the rows fit ``max_bytes``."""
+        if not self.max_bytes:
+            return 0
+        # Other workers write to the same database, so count again before evicting.
+        with self._size_lock:
+            self._row_bytes_total = self._stored_bytes()
+            excess = self._row_bytes_total - self.max_bytes
+        return self.evict_bytes(excess, keep=keep) if excess > 0 else 0
+
+    def delete(self, session_id: str) -> None:
+        with self._transaction() as conn:
+            freed = conn.execute(
+                f"SELECT COALESCE(SUM({self._row_bytes()}), 0) FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        self._resized(-freed)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        with self._transaction() as conn:
+            freed = conn.execute(
+                f"SELECT COALESCE(SUM({self._row_bytes()}), 0) FROM sessions WHERE expires_at <= ?", (now,)
+            ).fetchone()[0]
+            removed = conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,)).rowcount
+        self._resized(-freed)
+        return removed
+
+    def usage(self) -> Dict[str, int]:
+        conn = self._conn()
+        entries = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        # Pages in use rather than file size: deleted rows free pages without shrinking the file.
+        pages = conn.execute("PRAGMA page_count").fetchone()[0] - conn.execute("PRAGMA freelist_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        return {"entries": entries, "bytes": pages * page_size, "max_bytes": self.max_bytes, "evictions": self.evictions}
+
+    def evict_bytes(self, nbytes: int, keep: str = "") -> int:
+        """Delete the sessions closest to expiry, never ``keep``, until about ``nbytes`` of row data are freed."""
+        freed = 0
+        victims = []
+        with self._transaction() as conn:
+            for session_id, size in conn.execute(
+                f"SELECT session_id, {self._row_bytes()} FROM sessions WHERE session_id != ? ORDER BY expires_at",
+                (keep,),
+            ):
+                if freed >= nbytes:
+                    break
+                victims.append((session_id,))
+                freed += size
+            conn.executemany("DELETE FROM sessions WHERE session_id = ?", victims)
+        self.evictions += len(victims)
+        self._resized(-freed)
+        return freed
+
+
+def create_session_cache(
+    ttl_seconds: int = 3600, state_backend: Optional[StateBackend] = None, ns: Optional[Namespace] = None
+) -> Any:
+    """Build the session cache selected by ``HAPPYRAV_SESSION_BACKEND`` (pickle, sqlite or redis).
+
+    The default is redis when ``state_backend`` is given, pickle otherwise.
+    ``ns`` supplies TTL, size budget and sweep interval in place of ``ttl_seconds``;
+    on redis the size budget is left to the server's own ``maxmemory`` policy.
+    """
+    ns = ns or Namespace("session", ttl_seconds)
+    default = "redis" if state_backend is not None else "pickle"
+    backend = (os.getenv("HAPPYRAV_SESSION_BACKEND") or default).strip().lower()
+    if backend not in SESSION_BACKENDS:
+        raise ValueError(f"Unknown HAPPYRAV_SESSION_BACKEND {backend!r}; expected one of {SESSION_BACKENDS}.")
+    if backend == "sqlite":
+        return SqliteSessionCache(ttl_seconds=ns.ttl_seconds, sweep_interval=ns.sweep_interval, max_bytes=ns.max_bytes)
+    if backend == "redis":
+        return RemoteSessionCache(ttl_seconds=ns.ttl_seconds, backend=state_backend)
+    return SessionCache.for_namespace(ns)
+
+
+class MonsterCache(_DiskTTLCache):
+    subdir = "monster"
+    name = "monster"
+    schema = MONSTER_SCHEMA
+    # Older versions kept monster records in ``artifacts/`` as ``monster_<token>.pkl``.
+    LEGACY_PREFIX = "monster_"
+
+    def __init__(
+        self,
+        ttl_seconds: int = 7200,
+        blobs: Optional[BlobStore] = None,
+        codec: Optional[str] = None,
+        max_bytes: int = 0,
+        sweep_interval: float = SWEEP_INTERVAL_SECONDS,
+    ) -> None:
+        super().__init__(ttl_seconds, codec, max_bytes, sweep_interval)
+        self.blobs = blobs or BlobStore(ttl_seconds=ttl_seconds)
+
+    def _rebuild_index(self) -> None:
+        for legacy in (DATA_DIR / ArtifactCache.subdir).glob(f"{self.LEGACY_PREFIX}*.pkl"):
             try:
-                if path.stat().st_mtime < now - self.ttl_seconds:
-                    path.unlink()
-            except Exception:
-                pass
+                os.replace(legacy, self._root / legacy.name[len(self.LEGACY_PREFIX):])
+            except OSError:
+                continue
+        super()._rebuild_index()
 
     def create_token(self) -> str:
         return uuid.uuid4().hex
 
     def set(self, record: MonsterArtifactRecord) -> str:
-        self._cleanup()
-        with self._lock:
-            path = self._root / f"monster_{record.token}.pkl"
-            with open(path, "wb") as f:
-                pickle.dump(record, f)
+        self._write(record.token, _externalize_blobs(self.blobs, record, MONSTER_BLOB_FIELDS))
         return record.token
 
-    def get(self, token: str) -> Optional[MonsterArtifactRecord]:
-        self._cleanup()
-        path = self._root / f"monster_{token}.pkl"
-        if not path.exists():
+    def get(self, token: str, include_html: bool = True) -> Optional[MonsterArtifactRecord]:
+        record = self._read(token)
+        if record is None:
             return None
-        with self._lock:
+        record = _externalize_blobs(self.blobs, record, MONSTER_BLOB_FIELDS)
+        if include_html:
+            record = _load_text_blobs(self.blobs, record, MONSTER_BLOB_FIELDS)
+        return record
+
+    def blob_path(self, digest: str) -> Optional[Path]:
+        return self.blobs.path(digest) if self.blobs.exists(digest) else None
+
+    def read_blob(self, digest: str) -> bytes:
+        return self.blobs.get(digest) or b""
+
+    async def aread_blob(self, digest: str) -> bytes:
+        return await asyncio.to_thread(self.read_blob, digest)
+
+
+# Shared-backend variants. They keep the public API of the disk caches above and
+# store everything in a ``StateBackend`` (see ``services/backends.py``), so any
+# number of workers and nodes can serve the same sessions and downloads.
+
+
+def _payload_stamp(payload: bytes) -> bytes:
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+class RemoteBlobStore:
+    """``BlobStore`` on a shared backend: ``blob:<sha256>`` keys, TTL refreshed on re-put."""
+
+    def __init__(self, backend: StateBackend, ttl_seconds: int = 7200) -> None:
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = SWEEP_INTERVAL_SECONDS
+
+    def put(self, data: bytes, compress: bool = False) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        key = f"blob:{digest}"
+        if not self.backend.expire(key, self.ttl_seconds):
+            frame = COMPRESSOR.compress(data) if compress else None
+            self.backend.set(key, frame if frame is not None else data, ttl=self.ttl_seconds)
+        return digest
+
+    def get(self, digest: str) -> Optional[bytes]:
+        if not digest:
+            return None
+        data = self.backend.get(f"blob:{digest}")
+        if data is None:
+            return None
+        return decompress(data) if is_frame(data) else data
+
+    def exists(self, digest: str) -> bool:
+        return bool(digest) and self.backend.exists(f"blob:{digest}")
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        return 0  # the backend expires keys itself
+
+    def usage(self) -> Dict[str, int]:
+        return {}
+
+
+class _BackendKeyLocks:
+    """``_KeyLocks`` counterpart holding a distributed lock per key."""
+
+    def __init__(self, backend: StateBackend, namespace: str) -> None:
+        self._backend = backend
+        self._namespace = namespace
+
+    def hold(self, key: str):
+        return self._backend.lock(f"lock:{self._namespace}:{key}")
+
+
+class _RemoteTTLCache(_DiskTTLCache):
+    """Storage primitives of ``_DiskTTLCache`` on a shared backend.
+
+    Keys are ``<name>:<key>`` with the cache TTL set atomically on every write,
+    so there is no index to rebuild and nothing to sweep. The stamp used for
+    compare-and-set is a hash of the stored payload.
+    """
+
+    def __init__(self, ttl_seconds: int, backend: StateBackend, codec: Optional[str] = None) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = SWEEP_INTERVAL_SECONDS
+        self.backend = backend
+        self._serializer = Serializer(self.schema, codec or cache_format(self.name))
+        self._lock = threading.Lock()
+        self._hot = None
+
+    def _key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    def _write(self, key: str, value: Any) -> Tuple[bytes, bytes]:
+        payload = self._serializer.dumps(value)
+        self.backend.set(self._key(key), payload, ttl=self.ttl_seconds)
+        return payload, _payload_stamp(payload)
+
+    def _read_raw(self, key: str) -> Optional[Tuple[bytes, bytes]]:
+        payload = self.backend.get(self._key(key))
+        if payload is None:
+            return None
+        return payload, _payload_stamp(payload)
+
+    def _remove(self, key: str) -> None:
+        self.backend.delete(self._key(key))
+        self._on_evict(key)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        return 0
+
+    @classmethod
+    def for_namespace(cls, ns: Namespace, **kwargs: Any) -> Any:
+        return cls(ttl_seconds=ns.ttl_seconds, **kwargs)
+
+    def usage(self) -> Dict[str, int]:
+        # Size is tracked by the shared server, not per process.
+        return {}
+
+    def blob_path(self, digest: str) -> Optional[Path]:
+        # Blobs have no local file; callers fall back to ``read_blob``.
+        return None
+
+
+class RemoteSessionCache(_RemoteTTLCache, SessionCache):
+    """``SessionCache`` on a shared backend; the per-session write lock is distributed."""
+
+    def __init__(self, ttl_seconds: int = 3600, backend: Optional[StateBackend] = None, codec: Optional[str] = None) -> None:
+        backend = backend or create_state_backend()
+        if backend is None:
+            raise ValueError("The redis session backend needs HAPPYRAV_REDIS_URL.")
+        super().__init__(ttl_seconds, backend, codec)
+        self._key_locks = _BackendKeyLocks(backend, self.name)
+        self.conflicts = 0
+
+    def hot_stats(self) -> Dict[str, int]:
+        return {}
+
+
+class RemoteArtifactCache(_RemoteTTLCache, ArtifactCache):
+    """``ArtifactCache`` on a shared backend; the session index is a sorted set per session."""
+
+    def __init__(
+        self,
+        ttl_seconds: int = 600,
+        backend: Optional[StateBackend] = None,
+        blobs: Optional[RemoteBlobStore] = None,
+        codec: Optional[str] = None,
+    ) -> None:
+        super().__init__(ttl_seconds, backend, codec)
+        self.blobs = blobs or RemoteBlobStore(backend, ttl_seconds=ttl_seconds)
+
+    def _link_session(self, record: ArtifactRecord) -> None:
+        session_id = str((record.meta or {}).get("session_id") or "")
+        if session_id:
+            self.backend.zadd(f"artifact_index:{session_id}", record.token, time.time(), ttl=self.ttl_seconds)
+
+    def _on_evict(self, key: str) -> None:
+        # Index entries for expired or deleted artifacts are filtered out on read.
+        pass
+
+    def tokens_for_session(self, session_id: str) -> List[str]:
+        tokens = self.backend.zrange(f"artifact_index:{session_id}")
+        return [token for token in tokens if self.backend.exists(self._key(token))]
+
+    def latest_for_session(self, session_id: str) -> Optional[str]:
+        tokens = self.tokens_for_session(session_id)
+        return tokens[-1] if tokens else None
+
+
+class RemoteMonsterCache(_RemoteTTLCache, MonsterCache):
+    def __init__(
+        self,
+        ttl_seconds: int = 7200,
+        backend: Optional[StateBackend] = None,
+        blobs: Optional[RemoteBlobStore] = None,
+        codec: Optional[str] = None,
+    ) -> None:
+        super().__init__(ttl_seconds, backend, codec)
+        self.blobs = blobs or RemoteBlobStore(backend, ttl_seconds=ttl_seconds)
+
+
+class RemoteDocumentCache(DocumentCache):
+    """``DocumentCache`` on a shared backend.
+
+    Entries expire ``ttl_seconds`` after their last hit, which approximates
+    LRU; the byte budget is the server's ``maxmemory`` with a ``volatile-lru``
+    policy rather than ``HAPPYRAV_DOCUMENT_MAX_BYTES``. Counters are per process.
+    """
+
+    def __init__(self, backend: StateBackend, ttl_seconds: int = DOCUMENT_CACHE_TTL_SECONDS) -> None:
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = SWEEP_INTERVAL_SECONDS
+        self.max_bytes = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.ocr_calls_saved = 0
+        self.source_bytes_saved = 0
+        self._has_legacy = False
+
+    def get(self, content_hash: str, legacy_key: str = "") -> Optional[Dict[str, Any]]:
+        key = f"document:{content_hash}"
+        data = self.backend.get(key)
+        payload = None
+        if data is not None:
             try:
-                with open(path, "rb") as f:
-                    return pickle.load(f)
-            except Exception:
+                payload = json.loads(data)
+            except ValueError:
+                pass
+        with self._lock:
+            if payload is None:
+                self.misses += 1
                 return None
+            self._count_hit(payload)
+        self.backend.expire(key, self.ttl_seconds)
+        return payload
 
-    def delete(self, token: str) -> None:
-        path = self._root / f"monster_{token}.pkl"
-        try:
-            path.unlink(missing_ok=True)
-        except Exception:
-            pass
+    def set(self, content_hash: str, payload: Dict[str, Any]) -> None:
+        self.backend.set(f"document:{content_hash}", json.dumps(payload).encode("utf-8"), ttl=self.ttl_seconds)
+
+    def delete(self, content_hash: str) -> None:
+        self.backend.delete(f"document:{content_hash}")
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        return 0
+
+    def usage(self) -> Dict[str, int]:
+        return {}
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        for local_only in ("entries", "bytes", "max_bytes", "evictions"):
+            stats.pop(local_only)
+        return stats
+
+
+async def run_sweeper(caches: Iterable[Any], interval_seconds: Optional[float] = None) -> None:
+    """Evict expired entries from each cache on its own ``sweep_interval`` until cancelled.
+
+    ``interval_seconds`` overrides every cache's interval.
+    """
+    caches = list(caches)
+    if not caches:
+        return
+    loop = asyncio.get_running_loop()
+    intervals = [interval_seconds or getattr(cache, "sweep_interval", SWEEP_INTERVAL_SECONDS) for cache in caches]
+    due = [loop.time() + interval for interval in intervals]
+    while True:
+        await asyncio.sleep(max(0.0, min(due) - loop.time()))
+        for i, cache in enumerate(caches):
+            if due[i] > loop.time():
+                continue
+            try:
+                await asyncio.to_thread(cache.sweep)
+            except Exception as exc:
+                print(f"Cache sweep failed for {type(cache).__name__}: {exc}")
+            due[i] = loop.time() + intervals[i]
@@ -0,0 +1,218 @@
+"""Transparent compression for large text fields in cached records.
+
+Values at or above ``HAPPYRAV_COMPRESSION_MIN_BYTES`` are stored as framed
+zlib (or zstd, if the ``zstandard`` package is installed) bytes. Session
+document texts come back as a ``LazyTexts`` mapping that only inflates a
+document when a handler actually reads it, and re-saving a record reuses the
+stored frames instead of compressing again.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+import zlib
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, Optional, Union
+
+try:
+    import zstandard
+except ImportError:  # optional: pip install zstandard
+    zstandard = None
+
+FRAME_MAGIC = b"HZ"
+ALGORITHMS = ("off", "zlib", "zstd")
+_ALGORITHM_IDS = {"zlib": 1, "zstd": 2}
+
+
+class CompressionStats:
+    """Running totals for the ratio and CPU time spent (de)compressing."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.compressed = 0
+        self.skipped = 0
+        self.inflated = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.compress_seconds = 0.0
+        self.decompress_seconds = 0.0
+
+    def record_compress(self, raw: int, stored: int, seconds: float) -> None:
+        with self._lock:
+            self.compressed += 1
+            self.bytes_in += raw
+            self.bytes_out += stored
+            self.compress_seconds += seconds
+
+    def record_skip(self) -> None:
+        with self._lock:
+            self.skipped += 1
+
+    def record_decompress(self, seconds: float) -> None:
+        with self._lock:
+            self.inflated += 1
+            self.decompress_seconds += seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "compressed": self.compressed,
+                "skipped": self.skipped,
+                "inflated": self.inflated,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "ratio": round(self.bytes_in / self.bytes_out, 3) if self.bytes_out else 0.0,
+                "compress_ms": round(self.compress_seconds * 1000, 3),
+                "decompress_ms": round(self.decompress_seconds * 1000, 3),
+            }
+
+
+stats = CompressionStats()
+
+
+class Compressor:
+    def __init__(self, algorithm: str = "zlib", min_bytes: int = 4096, level: Optional[int] = None) -> None:
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown compression {algorithm!r}; expected one of {ALGORITHMS}.")
+        if algorithm == "zstd" and zstandard is None:
+            raise ValueError("zstd compression selected but the zstandard package is not installed.")
+        self.algorithm = algorithm
+        self.min_bytes = min_bytes
+        self.level = level
+
+    @property
+    def enabled(self) -> bool:
+        return self.algorithm != "off"
+
+    def compress(self, data: bytes) -> Optional[bytes]:
+        """Framed compressed bytes, or None when ``data`` is small or does not shrink."""
+        if not self.enabled or len(data) < self.min_bytes:
+            return None
+        started = time.perf_counter()
+        if self.algorithm == "zstd":
+            body = zstandard.ZstdCompressor(level=self.level or 3).compress(data)
+        else:
+            body = zlib.compress(data, self.level or 6)
+        frame = FRAME_MAGIC + bytes([_ALGORITHM_IDS[self.algorithm]]) + body
+        if len(frame) >= len(data):
+            stats.record_skip()
+            return None
+        stats.record_compress(len(data), len(frame), time.perf_counter() - started)
+        return frame
+
+
+def is_frame(data: bytes) -> bool:
+    return data[:2] == FRAME_MAGIC and data[2:3] in (b"\x01", b"\x02")
+
+
+def decompress(frame: bytes) -> bytes:
+    started = time.perf_counter()
+    algorithm = frame[2]
+    if algorithm == _ALGORITHM_IDS["zstd"]:
+        if zstandard is None:
+            raise ValueError("Record was compressed with zstd but the zstandard package is not installed.")
+        data = zstandard.ZstdDecompressor().decompress(frame[3:])
+    else:
+        data = zlib.decompress(frame[3:])
+    stats.record_decompress(time.perf_counter() - started)
+    return data
+
+
+def compressor_from_env() -> Compressor:
+    """``HAPPYRAV_COMPRESSION`` (zlib, zstd or off), ``HAPPYRAV_COMPRESSION_MIN_BYTES``, ``HAPPYRAV_COMPRESSION_LEVEL``."""
+    algorithm = (os.getenv("HAPPYRAV_COMPRESSION") or "zlib").strip().lower()
+    level = os.getenv("HAPPYRAV_COMPRESSION_LEVEL")
+    return Compressor(
+        algorithm=algorithm,
+        min_bytes=int(os.getenv("HAPPYRAV_COMPRESSION_MIN_BYTES", "4096")),
+        level=int(level) if level else None,
+    )
+
+
+class CompressedText:
+    """A stored, still-compressed text value."""
+
+    __slots__ = ("frame",)
+
+    def __init__(self, frame: bytes) -> None:
+        self.frame = frame
+
+    def inflate(self) -> str:
+        return decompress(self.frame).decode("utf-8")
+
+
+class LazyTexts(MutableMapping):
+    """``doc_id -> text`` mapping that inflates compressed values on first access."""
+
+    def __init__(self, values: Optional[Dict[str, Union[str, CompressedText]]] = None) -> None:
+        self._values: Dict[str, Union[str, CompressedText]] = dict(values or {})
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key: str) -> str:
+        value = self._values[key]
+        if isinstance(value, CompressedText):
+            with self._lock:
+                value = self._values[key]
+                if isinstance(value, CompressedText):
+                    value = self._values[key] = _Inflated(value.inflate(), value.frame)
+        return value.text if isinstance(value, _Inflated) else value
+
+    def __setitem__(self, key: str, value: str) -> None:
+        self._values[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self._values[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        return f"LazyTexts({list(self._values)})"
+
+    def stored(self) -> Dict[str, Union[str, CompressedText]]:
+        """Values as stored, without inflating; inflated values keep their original frame."""
+        return {
+            key: CompressedText(value.frame) if isinstance(value, _Inflated) else value
+            for key, value in self._values.items()
+        }
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"_values": self.stored()}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self._values = state["_values"]
+        self._lock = threading.Lock()
+
+
+class _Inflated:
+    """Inflated text that remembers the frame it came from, so an unchanged value is not recompressed."""
+
+    __slots__ = ("text", "frame")
+
+    def __init__(self, text: str, frame: bytes) -> None:
+        self.text = text
+        self.frame = frame
+
+
+def pack_texts(texts: Any, compressor: Compressor) -> Dict[str, Union[str, bytes]]:
+    """Plain-data form of a text mapping: small values as str, large ones as frame bytes."""
+    stored = texts.stored() if isinstance(texts, LazyTexts) else dict(texts)
+    packed: Dict[str, Union[str, bytes]] = {}
+    for key, value in stored.items():
+        if isinstance(value, CompressedText):
+            packed[key] = value.frame
+            continue
+        frame = compressor.compress(value.encode("utf-8"))
+        packed[key] = frame if frame is not None else str(value)
+    return packed
+
+
+def unpack_texts(packed: Dict[str, Union[str, bytes]]) -> LazyTexts:
+    return LazyTexts({
+        key: CompressedText(value) if isinstance(value, bytes) else value
+        for key, value in packed.items()
+    })
@@ -139,7 +139,8 @@ def extract_text_from_bytes(filename: str, content: bytes) -> Tuple[str, ParseMe
                     blocks.append(text)
         parse_method: ParseMethod = "pdf_text_ocr" if used_ocr else "pdf_text"
         confidence = 0.90 if used_ocr else 0.93
-        return _sanitize_text("\n\n".join(blocks).strip()), parse_method, confidence
+        # Pages are separated by a form feed so prompt compaction can find running headers and footers.
+        return _sanitize_text("\n\f\n".join(blocks).strip()), parse_method, confidence
 
     if ext == ".docx":
         doc = DocxDocument(io.BytesIO(content))
@@ -0,0 +1,155 @@
+"""Persistent cache for LLM JSON responses.
+
+Keyed by provider, model, system prompt, user prompt and ``max_tokens``, so
+popular job ads analysed by many users hit the LLM once per TTL. Calls whose
+output should vary between runs (CV generation) pass ``cache=False``.
+Incremental profile extraction stores one fragment per document under
+``fragment_key`` (content hash, language, model) in the same namespace. The
+cache is a regular storage namespace (``llm``) with its own TTL, size budget
+and sweep, and a storage failure only ever costs a cache miss.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from happyrav.services import llm_metrics
+from happyrav.services.cache import SWEEP_INTERVAL_SECONDS, _DiskTTLCache, _RemoteTTLCache
+from happyrav.services.serialization import RecordSchema
+
+LLM_RESPONSE_SCHEMA = RecordSchema("llm_response", 1, to_dict=dict, from_dict=dict)
+
+
+class LLMResponseCache(_DiskTTLCache):
+    subdir = "llm"
+    name = "llm"
+    schema = LLM_RESPONSE_SCHEMA
+
+    def __init__(
+        self,
+        ttl_seconds: int = 7 * 24 * 3600,
+        codec: Optional[str] = None,
+        max_bytes: int = 0,
+        sweep_interval: float = SWEEP_INTERVAL_SECONDS,
+    ) -> None:
+        super().__init__(ttl_seconds, codec, max_bytes, sweep_interval)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._read(key)
+
+    def set(self, key: str, record: Dict[str, Any]) -> str:
+        self._write(key, record)
+        return key
+
+
+class RemoteLLMResponseCache(_RemoteTTLCache, LLMResponseCache):
+    pass
+
+
+def response_key(provider: str, model: str, system: str, user: str, max_tokens: int) -> str:
+    material = json.dumps([provider, model, system, user, max_tokens], ensure_ascii=True)
+    return hashlib.sha256(material.encode("ascii")).hexdigest()
+
+
+class ResponseCacheStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.bypassed = 0
+        self.errors = 0
+
+    def count(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": response_cache is not None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "stores": self.stores,
+                "bypassed": self.bypassed,
+                "errors": self.errors,
+            }
+
+
+stats = ResponseCacheStats()
+response_cache: Optional[LLMResponseCache] = None
+
+
+def install(cache: Optional[LLMResponseCache]) -> None:
+    """Use ``cache`` for all LLM helpers; None disables response caching."""
+    global response_cache
+    response_cache = cache
+
+
+def _lookup(cache: LLMResponseCache, key: str, provider: str, model: str) -> Optional[Dict[str, Any]]:
+    try:
+        record = cache.get(key)
+    except Exception:
+        stats.count("errors")
+        return None
+    stats.count("hits" if record is not None else "misses")
+    llm_metrics.record_cache(provider, model, hit=record is not None)
+    return record["payload"] if record is not None else None
+
+
+def _store(cache: LLMResponseCache, key: str, provider: str, model: str, payload: Dict[str, Any]) -> None:
+    try:
+        cache.set(key, {"provider": provider, "model": model, "payload": payload, "created_at": time.time()})
+        stats.count("stores")
+    except Exception:
+        stats.count("errors")
+
+
+def fragment_key(model: str, language: str, text: str) -> str:
+    """Key of a per-document profile fragment: the document's content hash, language and model."""
+    content = hashlib.sha256(text.encode("utf-8", errors="ignore")).hexdigest()
+    material = json.dumps(["profile_fragment", model, language, content], ensure_ascii=True)
+    return hashlib.sha256(material.encode("ascii")).hexdigest()
+
+
+async def cached_json(
+    provider: str,
+    model: str,
+    system: str,
+    user: str,
+    max_tokens: int,
+    compute: Callable[[], Awaitable[Dict[str, Any]]],
+    cache: bool = True,
+) -> Dict[str, Any]:
+    """Return the cached response for this request, or await ``compute()`` and store the result.
+
+    Cache I/O runs in the thread pool.
+    """
+    if response_cache is None or not cache:
+        stats.count("bypassed")
+        return await compute()
+    return await cached(response_key(provider, model, system, user, max_tokens), provider, model, compute)
+
+
+async def cached(
+    key: str,
+    provider: str,
+    model: str,
+    compute: Callable[[], Awaitable[Dict[str, Any]]],
+) -> Dict[str, Any]:
+    """Like ``cached_json`` for callers that derive their own ``key`` (see ``fragment_key``)."""
+    store = response_cache
+    if store is None:
+        stats.count("bypassed")
+        return await compute()
+    payload = await asyncio.to_thread(_lookup, store, key, provider, model)
+    if payload is None:
+        payload = await compute()
+        await asyncio.to_thread(_store, store, key, provider, model, payload)
+    return payload
@@ -0,0 +1,156 @@
+"""Process-wide, lazily created LLM SDK clients with pooled keep-alive connections.
+
+Building an SDK client creates a new HTTP connection pool, so building one per
+call pays a TCP and TLS handshake on every request. Clients here are created
+once per provider, API key and base URL and reused. Async clients are also
+keyed by event loop, because their connections belong to the loop that
+opened them.
+
+Pool tuning: ``HAPPYRAV_LLM_MAX_CONNECTIONS`` (default 32),
+``HAPPYRAV_LLM_MAX_KEEPALIVE`` (16), ``HAPPYRAV_LLM_KEEPALIVE_SECONDS`` (60) and
+``HAPPYRAV_LLM_HTTP2`` (off; needs ``pip install h2``).
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import weakref
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+except ImportError:  # optional: pip install h2
+    h2 = None
+
+TRUE_VALUES = {"1", "true", "yes", "on"}
+
+
+def pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=int(os.getenv("HAPPYRAV_LLM_MAX_CONNECTIONS", "32")),
+        max_keepalive_connections=int(os.getenv("HAPPYRAV_LLM_MAX_KEEPALIVE", "16")),
+        keepalive_expiry=float(os.getenv("HAPPYRAV_LLM_KEEPALIVE_SECONDS", "60")),
+    )
+
+
+def http2_enabled() -> bool:
+    wanted = (os.getenv("HAPPYRAV_LLM_HTTP2") or "").strip().lower() in TRUE_VALUES
+    return wanted and h2 is not None
+
+
+class ClientPool:
+    """One SDK client per key, created on first use and closed by ``aclose()``."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._sync: Dict[Hashable, Any] = {}
+        self._async: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, Any]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.created = 0
+
+    def get(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        client = self._sync.get(key)
+        if client is None:
+            with self._lock:
+                client = self._sync.get(key)
+                if client is None:
+                    client = self._sync[key] = factory()
+                    self.created += 1
+        return client
+
+    def get_async(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async.setdefault(loop, {})
+            client = clients.get(key)
+            if client is None:
+                client = clients[key] = factory()
+                self.created += 1
+        return client
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sync) + sum(len(clients) for clients in self._async.values())
+
+    def close(self) -> None:
+        """Close the sync clients."""
+        with self._lock:
+            clients, self._sync = list(self._sync.values()), {}
+        for client in clients:
+            try:
+                client.close()
+            except Exception:
+                pass
+
+    async def aclose(self) -> None:
+        """Close every sync client and the async clients of the running loop."""
+        self.close()
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = list(self._async.pop(loop, {}).values())
+        for client in clients:
+            try:
+                await client.close()
+            except Exception:
+                pass
+
+
+pool = ClientPool()
+
+
+def openai_client(api_key: str, base_url: str = "") -> Any:
+    from openai import DefaultHttpxClient, OpenAI
+
+    def build() -> Any:
+        http_client = DefaultHttpxClient(limits=pool_limits(), http2=http2_enabled())
+        return OpenAI(api_key=api_key, base_url=base_url or None, http_client=http_client)
+
+    return pool.get(("openai", api_key, base_url), build)
+
+
+def async_openai_client(api_key: str, base_url: str = "") -> Any:
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+    def build() -> Any:
+        http_client = DefaultAsyncHttpxClient(limits=pool_limits(), http2=http2_enabled())
+        return AsyncOpenAI(api_key=api_key, base_url=base_url or None, http_client=http_client)
+
+    return pool.get_async(("openai", api_key, base_url), build)
+
+
+def anthropic_client(api_key: str) -> Any:
+    from anthropic import Anthropic, DefaultHttpxClient
+
+    def build() -> Any:
+        http_client = DefaultHttpxClient(limits=pool_limits(), http2=http2_enabled())
+        return Anthropic(api_key=api_key, http_client=http_client)
+
+    return pool.get(("anthropic", api_key), build)
+
+
+def async_anthropic_client(api_key: str) -> Any:
+    from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
+
+    def build() -> Any:
+        http_client = DefaultAsyncHttpxClient(limits=pool_limits(), http2=http2_enabled())
+        return AsyncAnthropic(api_key=api_key, http_client=http_client)
+
+    return pool.get_async(("anthropic", api_key), build)
+
+
+_google_key: Optional[str] = None
+
+
+def google_module(api_key: str) -> Any:
+    """``google.generativeai`` configured for ``api_key``; it keeps its own module-level transport."""
+    global _google_key
+    import google.generativeai as genai
+
+    if _google_key != api_key:
+        genai.configure(api_key=api_key)
+        _google_key = api_key
+    return genai
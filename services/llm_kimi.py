@@ -8,7 +8,7 @@ import os
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 from happyrav.models import (
     ChronologicalEntry,
@@ -18,7 +18,11 @@ from happyrav.models import (
     GeneratedContent,
     MonsterCVProfile,
 )
+from happyrav.services import llm_cache, llm_clients, llm_metrics, llm_scheduler
+from happyrav.services.llm_scheduler import estimate_tokens
+from happyrav.services.prompt_budget import TAG_PRIORITY, count_tokens, plan_documents
 from happyrav.services.parsing import split_keywords
+from happyrav.services.stages import StageRun
 
 
 QUALITY_MODE = os.getenv("HAPPYRAV_QUALITY", "balanced").strip().lower()
@@ -33,6 +37,14 @@ CFG = MODELS[QUALITY_MODE]
 
 TRUE_VALUES = {"1", "true", "yes", "on"}
 
+# Token budgets for source documents in a prompt; the character limits stay as hard ceilings.
+EXTRACTION_TOKEN_BUDGET = int(os.getenv("HAPPYRAV_EXTRACTION_TOKEN_BUDGET", "16000"))
+GENERATION_TOKEN_BUDGET = int(os.getenv("HAPPYRAV_GENERATION_TOKEN_BUDGET", "12000"))
+MONSTER_TOKEN_BUDGET = int(os.getenv("HAPPYRAV_MONSTER_TOKEN_BUDGET", "20000"))
+# combined: one extraction call over all documents; incremental: one cached call per document, merged.
+EXTRACTION_MODE = os.getenv("HAPPYRAV_EXTRACTION_MODE", "combined").strip().lower()
+MONSTER_TAG_PRIORITY = ("arbeitszeugnis",) + tuple(tag for tag in TAG_PRIORITY if tag != "arbeitszeugnis")
+
 
 def _strip_code_fences(text: str) -> str:
     text = (text or "").strip()
@@ -61,33 +73,45 @@ def has_api_key() -> bool:
     return True
 
 
-def _build_client() -> OpenAI:
+def _openai_credentials() -> Tuple[str, str]:
     api_key = (os.getenv("OPENAI_API_KEY") or "").strip()
     if not api_key:
         api_key = _load_codex_oauth_token()
     if not api_key:
         raise ValueError("OPENAI_API_KEY missing and no Codex OAuth token available.")
-    base_url = (os.getenv("OPENAI_BASE_URL") or "").strip()
-    if base_url:
-        return OpenAI(api_key=api_key, base_url=base_url)
-    return OpenAI(api_key=api_key)
+    return api_key, (os.getenv("OPENAI_BASE_URL") or "").strip()
 
 
-def _build_anthropic_client():
-    from anthropic import Anthropic
+def _anthropic_key() -> str:
     key = (os.getenv("ANTHROPIC_API_KEY") or "").strip()
     if not key:
         raise ValueError("ANTHROPIC_API_KEY not set")
-    return Anthropic(api_key=key)
+    return key
+
+
+def _build_client() -> OpenAI:
+    """Shared OpenAI client for the current key and base URL (see ``services/llm_clients.py``)."""
+    return llm_clients.openai_client(*_openai_credentials())
+
+
+def _build_async_client() -> AsyncOpenAI:
+    """Shared async OpenAI client for the current key, base URL and event loop."""
+    return llm_clients.async_openai_client(*_openai_credentials())
+
+
+def _build_anthropic_client():
+    return llm_clients.anthropic_client(_anthropic_key())
+
+
+def _build_async_anthropic_client():
+    return llm_clients.async_anthropic_client(_anthropic_key())
 
 
 def _build_google_client():
-    import google.generativeai as genai
     key = (os.getenv("GOOGLE_API_KEY") or "").strip()
     if not key:
         raise ValueError("GOOGLE_API_KEY not set")
-    genai.configure(api_key=key)
-    return genai
+    return llm_clients.google_module(key)
 
 
 def _load_codex_oauth_token() -> str:
@@ -274,57 +298,98 @@ def _fallback_content(
     )
 
 
-def _chat_json_openai(prompt: str, max_tokens: int, model: str = None) -> Dict[str, Any]:
-    client = _build_client()
-    response = client.chat.completions.create(
-        model=model or CFG["extraction"],
-        temperature=0.1,
-        max_tokens=max_tokens,
-        messages=[
-            {"role": "system", "content": "Return valid JSON only. No markdown. No comments."},
-            {"role": "user", "content": prompt},
-        ],
-    )
-    text = response.choices[0].message.content or ""
-    return _extract_json_payload(text)
+async def _chat_json_openai(prompt: str, max_tokens: int, model: str = None, cache: bool = True) -> Dict[str, Any]:
+    system = "Return valid JSON only. No markdown. No comments."
+    model = model or CFG["extraction"]
+
+    async def call() -> Dict[str, Any]:
+        client = _build_async_client()
+        response = await llm_scheduler.run(
+            "openai",
+            lambda: client.chat.completions.create(
+                model=model,
+                temperature=0.1,
+                max_tokens=max_tokens,
+                messages=[
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": prompt},
+                ],
+            ),
+            tokens=estimate_tokens(system, prompt, max_tokens=max_tokens),
+            model=model,
+        )
+        text = response.choices[0].message.content or ""
+        return _extract_json_payload(text)
+
+    return await llm_cache.cached_json("openai", model, system, prompt, max_tokens, call, cache=cache)
+
+
+async def _chat_json_anthropic(model: str, system: str, user: str, max_tokens: int, cache: bool = True) -> Dict[str, Any]:
+    async def call() -> Dict[str, Any]:
+        client = _build_async_anthropic_client()
+        resp = await llm_scheduler.run(
+            "anthropic",
+            lambda: client.messages.create(
+                model=model,
+                max_tokens=max_tokens,
+                system=system,
+                messages=[{"role": "user", "content": user}],
+            ),
+            tokens=estimate_tokens(system, user, max_tokens=max_tokens),
+            model=model,
+        )
+        return _extract_json_payload(resp.content[0].text or "")
 
+    return await llm_cache.cached_json("anthropic", model, system, user, max_tokens, call, cache=cache)
 
-def _chat_json_anthropic(model: str, system: str, user: str, max_tokens: int) -> Dict[str, Any]:
-    client = _build_anthropic_client()
-    resp = client.messages.create(
-        model=model,
-        max_tokens=max_tokens,
-        system=system,
-        messages=[{"role": "user", "content": user}],
-    )
-    return _extract_json_payload(resp.content[0].text or "")
 
+async def _chat_json_google(model: str, system: str, user: str, cache: bool = True) -> Dict[str, Any]:
+    async def call() -> Dict[str, Any]:
+        client = _build_google_client()
+        m = client.GenerativeModel(model, system_instruction=system)
+        response = await llm_scheduler.run(
+            "google", lambda: m.generate_content_async(user), tokens=estimate_tokens(system, user), model=model
+        )
+        return _extract_json_payload(response.text or "")
 
-def _chat_json_google(model: str, system: str, user: str) -> Dict[str, Any]:
-    client = _build_google_client()
-    m = client.GenerativeModel(model, system_instruction=system)
-    return _extract_json_payload(m.generate_content(user).text or "")
+    return await llm_cache.cached_json("google", model, system, user, 0, call, cache=cache)
 
 
 def vision_ocr(image_bytes: bytes, mime_type: str = "image/png") -> str:
     """Extract text from a document image using GPT vision."""
     client = _build_client()
     b64 = base64.b64encode(image_bytes).decode("ascii")
-    resp = client.chat.completions.create(
-        model=CFG["ocr"],
-        max_tokens=4000,
-        messages=[
-            {"role": "system", "content": "Extract all text from this document image. Raw text only, preserve structure."},
-            {"role": "user", "content": [
-                {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{b64}"}},
-                {"type": "text", "text": "Extract all text."},
-            ]},
-        ],
-    )
+    with llm_metrics.track("openai", CFG["ocr"]) as record:
+        resp = record.response = client.chat.completions.create(
+            model=CFG["ocr"],
+            max_tokens=4000,
+            messages=[
+                {"role": "system", "content": "Extract all text from this document image. Raw text only, preserve structure."},
+                {"role": "user", "content": [
+                    {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{b64}"}},
+                    {"type": "text", "text": "Extract all text."},
+                ]},
+            ],
+        )
     return (resp.choices[0].message.content or "").strip()
 
 
-def _profile_extract_prompt(language: str, source_documents: List[str]) -> Tuple[str, Optional[str]]:
+def _prompt_usage(purpose: str, prompt: str, usage: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the whole prompt's token count to a budget report and log it before the call goes out."""
+    usage = {**usage, "prompt_tokens": count_tokens(prompt)}
+    print(
+        f"Prompt budget {purpose}: {usage['prompt_tokens']} prompt tokens, documents "
+        f"{usage['kept_tokens']}/{usage['budget_tokens']} ({usage['input_tokens']} after compaction, "
+        f"{usage['raw_tokens']} raw, {usage['tokenizer']})"
+    )
+    return usage
+
+
+def _profile_extract_prompt(
+    language: str,
+    source_documents: List[str],
+    doc_tags: Optional[List[str]] = None,
+) -> Tuple[str, Optional[str], Dict[str, Any]]:
     schema = {
         "full_name": "string",
         "headline": "string",
@@ -340,12 +405,11 @@ def _profile_extract_prompt(language: str, source_documents: List[str]) -> Tuple
         "experience": [{"role": "string", "company": "string", "period": "string", "achievements": ["string"]}],
         "education": [{"degree": "string", "school": "string", "period": "string"}],
     }
-    raw_blob = "\n\n--- DOCUMENT ---\n\n".join(source_documents)
-    limit = 64000
-    warning = None
-    if len(raw_blob) > limit:
-        raw_blob = raw_blob[:limit]
-        warning = "Source documents truncated to 64k chars for extraction."
+    separator = "\n\n--- DOCUMENT ---\n\n"
+    budget = plan_documents(
+        source_documents, doc_tags, EXTRACTION_TOKEN_BUDGET, 64000, separator=separator, purpose="extraction"
+    )
+    raw_blob = separator.join(budget.documents)
 
     guard = (
         "Extract structured CV facts from the provided documents. "
@@ -364,7 +428,7 @@ def _profile_extract_prompt(language: str, source_documents: List[str]) -> Tuple
         f"Output schema: {json.dumps(schema, ensure_ascii=True)}\n\n"
         f"Input documents:\n<DOCUMENTS>\n{raw_blob}\n</DOCUMENTS>"
     )
-    return prompt, warning
+    return prompt, budget.warning, _prompt_usage("extraction", prompt, budget.usage)
 
 
 def _generate_prompt(
@@ -373,7 +437,8 @@ def _generate_prompt(
     profile: ExtractedProfile,
     source_documents: Optional[List[str]],
     match_context: Optional[Dict[str, Any]] = None,
-) -> Tuple[str, Optional[str]]:
+    doc_tags: Optional[List[str]] = None,
+) -> Tuple[str, Optional[str], Dict[str, Any]]:
     schema = {
         "summary": "string",
         "skills": ["string"],
@@ -385,12 +450,10 @@ def _generate_prompt(
         "cover_closing": "string",
         "matched_keywords": ["string"],
     }
-    raw_blob = "\n\n".join((source_documents or [])[:10])
-    limit = 48000
-    warning = None
-    if len(raw_blob) > limit:
-        raw_blob = raw_blob[:limit]
-        warning = "Source documents truncated to 48k chars for generation."
+    budget = plan_documents(
+        (source_documents or [])[:10], (doc_tags or [])[:10], GENERATION_TOKEN_BUDGET, 48000, purpose="generation"
+    )
+    raw_blob = "\n\n".join(budget.documents)
 
     input_payload = {
         "language": language,
@@ -483,7 +546,7 @@ def _generate_prompt(
         f"Input Metadata: {json.dumps(input_payload, ensure_ascii=True)}\n\n"
         f"Source Documents Context:\n<DOCUMENTS>\n{raw_blob}\n</DOCUMENTS>"
     )
-    return prompt, warning
+    return prompt, budget.warning, _prompt_usage("generation", prompt, budget.usage)
 
 
 def _build_skill_contexts(
@@ -558,7 +621,7 @@ def _refine_prompt(
     )
 
 
-def _refine_sync(
+async def _refine(
     language: str,
     user_message: str,
     current_content: GeneratedContent,
@@ -568,11 +631,12 @@ def _refine_sync(
 ) -> Tuple[GeneratedContent, Optional[str]]:
     prompt = _refine_prompt(language, user_message, current_content, profile, job_ad_text, chat_history)
     try:
-        payload = _chat_json_anthropic(
+        payload = await _chat_json_anthropic(
             model=CFG["generation"],
             system=_build_generation_system_prompt(language),
             user=prompt,
             max_tokens=2600,
+            cache=False,
         )
         generated = _coerce_generated_payload(payload)
         return _merge_generated_with_profile(generated, profile, language), None
@@ -580,26 +644,29 @@ def _refine_sync(
         return current_content, f"Refinement fallback: {exc}"
 
 
-def _crosscheck_gemini(generated: GeneratedContent, profile: ExtractedProfile, language: str) -> GeneratedContent:
+async def _crosscheck_gemini(generated: GeneratedContent, profile: ExtractedProfile, language: str) -> GeneratedContent:
     """Non-fatal advisory crosscheck via Gemini. Logs issues but returns generated content regardless."""
     try:
         system = "CV fact-checker. Compare generated vs source profile. Return JSON with issues array and verified boolean."
         user = json.dumps({"generated": generated.model_dump(), "source": profile.model_dump()})
-        _chat_json_google(model=CFG["crosscheck"], system=system, user=user)
+        await _chat_json_google(model=CFG["crosscheck"], system=system, user=user)
     except Exception:
         pass
     return generated
 
 
-def _extract_profile_sync(
+async def _extract_profile(
     language: str,
     source_documents: List[str],
+    doc_tags: Optional[List[str]] = None,
 ) -> Tuple[Optional[ExtractedProfile], Optional[str], Dict[str, Any]]:
     if not source_documents:
         return None, None, {"model_used": None, "source_chars": 0, "source_docs": 0}
-    prompt, warning = _profile_extract_prompt(language=language, source_documents=source_documents)
+    prompt, warning, usage = _profile_extract_prompt(
+        language=language, source_documents=source_documents, doc_tags=doc_tags
+    )
     try:
-        payload = _chat_json_openai(prompt=prompt, max_tokens=2600, model=CFG["extraction"])
+        payload = await _chat_json_openai(prompt=prompt, max_tokens=2600, model=CFG["extraction"])
         profile = _coerce_profile_payload(payload)
         debug = {
             "model_used": CFG["extraction"],
@@ -607,6 +674,7 @@ def _extract_profile_sync(
             "source_docs": len(source_documents),
             "experience_count": len(profile.experience),
             "skills_count": len(profile.skills),
+            "prompt_budget": usage,
         }
         return profile, warning, debug
     except Exception as exc:
@@ -618,9 +686,80 @@ def _extract_profile_sync(
             "model_used": CFG["extraction"],
             "source_chars": sum(len(chunk) for chunk in source_documents),
             "source_docs": len(source_documents),
+            "prompt_budget": usage,
         }
 
 
+async def _extract_fragment(language: str, text: str, tag: str) -> Tuple[ExtractedProfile, Optional[str], bool]:
+    """Profile fragment of one document, cached by content hash and language; the bool is True on a cache hit."""
+    model = CFG["extraction"]
+    extracted = False
+
+    async def compute() -> Dict[str, Any]:
+        nonlocal extracted
+        extracted = True
+        prompt, warning, _ = _profile_extract_prompt(language=language, source_documents=[text], doc_tags=[tag])
+        payload = await _chat_json_openai(prompt=prompt, max_tokens=2600, model=model, cache=False)
+        return {"profile": _coerce_profile_payload(payload).model_dump(), "warning": warning}
+
+    payload = await llm_cache.cached(llm_cache.fragment_key(model, language, text), "openai", model, compute)
+    return ExtractedProfile.model_validate(payload["profile"]), payload.get("warning"), not extracted
+
+
+async def _extract_profile_incremental(
+    language: str,
+    source_documents: List[str],
+    doc_tags: Optional[List[str]] = None,
+) -> Tuple[Optional[ExtractedProfile], Optional[str], Dict[str, Any]]:
+    """Extract each document separately and merge the fragments, so a new upload costs one small call."""
+    from happyrav.services.extract_documents import merge_profiles
+
+    if not source_documents:
+        return None, None, {"model_used": None, "source_chars": 0, "source_docs": 0}
+    tags = list(doc_tags or [])
+    tags += ["other"] * (len(source_documents) - len(tags))
+    # Scalar fields keep the first value merged, so merge the CV's fragment first.
+    order = sorted(
+        range(len(source_documents)),
+        key=lambda index: TAG_PRIORITY.index(tags[index]) if tags[index] in TAG_PRIORITY else len(TAG_PRIORITY),
+    )
+    results = await asyncio.gather(
+        *(_extract_fragment(language, source_documents[index], tags[index]) for index in order),
+        return_exceptions=True,
+    )
+
+    profile = ExtractedProfile()
+    warnings: List[str] = []
+    errors: List[str] = []
+    cached = 0
+    for result in results:
+        if isinstance(result, BaseException):
+            errors.append(str(result))
+            continue
+        fragment, warning, hit = result
+        profile = merge_profiles(profile, fragment)
+        cached += hit
+        if warning:
+            warnings.append(warning)
+    debug = {
+        "model_used": CFG["extraction"],
+        "mode": "incremental",
+        "source_chars": sum(len(chunk) for chunk in source_documents),
+        "source_docs": len(source_documents),
+        "fragments_cached": cached,
+        "fragments_extracted": len(results) - cached - len(errors),
+        "fragments_failed": len(errors),
+    }
+    if len(errors) == len(results):
+        prefix = "Extraktion Fallback" if language == "de" else "Extraction fallback used"
+        return None, " | ".join([*warnings, f"{prefix}: {errors[0]}"]), debug
+    if errors:
+        warnings.append(f"{len(errors)} of {len(results)} documents could not be extracted: {errors[0]}")
+    debug["experience_count"] = len(profile.experience)
+    debug["skills_count"] = len(profile.skills)
+    return profile, " | ".join(warnings) or None, debug
+
+
 _TONE_INSTRUCTIONS = {
     "de": {
         1: "Verwende einfache, direkte Sprache. Keine Fachbegriffe oder Buzzwords. Kurze, klare Sätze. Faktenbasiert und nüchtern.",
@@ -692,32 +831,35 @@ Tone:
 Return valid JSON only. No markdown."""
 
 
-def _generate_sync(
+async def _generate(
     language: str,
     job_ad_text: str,
     profile: ExtractedProfile,
     source_documents: Optional[List[str]],
     match_context: Optional[Dict[str, Any]] = None,
     tone: int = 3,
+    doc_tags: Optional[List[str]] = None,
 ) -> Tuple[GeneratedContent, Optional[str]]:
-    prompt, warning = _generate_prompt(
+    prompt, warning, _ = _generate_prompt(
         language=language,
         job_ad_text=job_ad_text,
         profile=profile,
         source_documents=source_documents,
         match_context=match_context,
+        doc_tags=doc_tags,
     )
     try:
-        payload = _chat_json_anthropic(
+        payload = await _chat_json_anthropic(
             model=CFG["generation"],
             system=_build_generation_system_prompt(language, tone),
             user=prompt,
             max_tokens=2600,
+            cache=False,
         )
         generated = _coerce_generated_payload(payload)
         result = _merge_generated_with_profile(generated, profile, language)
         if CFG["crosscheck"]:
-            result = _crosscheck_gemini(result, profile, language)
+            result = await _crosscheck_gemini(result, profile, language)
         return result, warning
     except Exception as exc:
         fallback = _fallback_content(language=language, job_ad_text=job_ad_text, profile=profile)
@@ -730,8 +872,11 @@ def _generate_sync(
 async def extract_profile_from_documents(
     language: str,
     source_documents: List[str],
+    doc_tags: Optional[List[str]] = None,
 ) -> Tuple[Optional[ExtractedProfile], Optional[str], Dict[str, Any]]:
-    return await asyncio.to_thread(_extract_profile_sync, language, source_documents)
+    if EXTRACTION_MODE == "incremental":
+        return await _extract_profile_incremental(language, source_documents, doc_tags)
+    return await _extract_profile(language, source_documents, doc_tags)
 
 
 async def generate_content(
@@ -741,36 +886,45 @@ async def generate_content(
     source_documents: Optional[List[str]] = None,
     match_context: Optional[Dict[str, Any]] = None,
     tone: int = 3,
+    doc_tags: Optional[List[str]] = None,
 ) -> Tuple[GeneratedContent, Optional[str]]:
-    # Enhance match_context with skill ranking and achievement scoring
+    # Enhance match_context with skill ranking and achievement scoring. Both run
+    # concurrently under their own deadline; generation goes ahead without a hint
+    # whose stage failed or timed out.
     from happyrav.services.llm_matching import rank_skills_by_relevance, score_achievement_relevance
 
     enhanced_context = match_context.copy() if match_context else {}
 
-    try:
+    all_achievements = []
+    for exp in profile.experience:
+        all_achievements.extend(exp.achievements)
+
+    async with StageRun() as stages:
         # 1. Rank skills by relevance
+        ranking_task = None
         if profile.skills:
-            ranked_skills = await rank_skills_by_relevance(
-                cv_skills=profile.skills_str,
-                job_ad_text=job_ad_text,
-                language=language
+            ranking_task = stages.start(
+                "skill_ranking",
+                rank_skills_by_relevance(cv_skills=profile.skills_str, job_ad_text=job_ad_text, language=language),
             )
+        # 2. Score achievements
+        scoring_task = None
+        if all_achievements:
+            scoring_task = stages.start(
+                "achievement_scoring",
+                score_achievement_relevance(achievements=all_achievements, job_ad_text=job_ad_text, language=language),
+            )
+
+        ranked_skills = await ranking_task if ranking_task else None
+        scored_achievements = await scoring_task if scoring_task else None
+
+    try:
+        if ranked_skills is not None:
             enhanced_context["skill_rankings"] = {
                 "top_skills": [s for s in ranked_skills if s.get("relevance", 0) > 0.7][:10],
                 "deprioritize": [s["skill"] for s in ranked_skills if s.get("relevance", 0) < 0.3]
             }
-
-        # 2. Score achievements
-        all_achievements = []
-        for exp in profile.experience:
-            all_achievements.extend(exp.achievements)
-
-        if all_achievements:
-            scored_achievements = await score_achievement_relevance(
-                achievements=all_achievements,
-                job_ad_text=job_ad_text,
-                language=language
-            )
+        if scored_achievements is not None:
             enhanced_context["achievement_hints"] = {
                 "high_relevance": [a for a in scored_achievements if a.get("relevance", 0) > 0.7][:5],
                 "needs_metrics": [a for a in scored_achievements if a.get("add_metrics")][:3],
@@ -783,16 +937,12 @@ async def generate_content(
     except Exception as e:
         # Don't fail generation if enhancement fails
         print(f"LLM enhancement failed: {e}")
+    if stages.stages:
+        print("LLM enhancement stages: " + ", ".join(
+            f"{name}={stage['status']} {stage.get('ms', 0)}ms" for name, stage in stages.stages.items()
+        ))
 
-    return await asyncio.to_thread(
-        _generate_sync,
-        language,
-        job_ad_text,
-        profile,
-        source_documents,
-        enhanced_context,
-        tone,
-    )
+    return await _generate(language, job_ad_text, profile, source_documents, enhanced_context, tone, doc_tags)
 
 
 async def refine_content(
@@ -803,18 +953,12 @@ async def refine_content(
     job_ad_text: str,
     chat_history: Optional[List[Dict[str, str]]] = None,
 ) -> Tuple[GeneratedContent, Optional[str]]:
-    return await asyncio.to_thread(
-        _refine_sync,
-        language,
-        user_message,
-        current_content,
-        profile,
-        job_ad_text,
-        chat_history or [],
-    )
+    return await _refine(language, user_message, current_content, profile, job_ad_text, chat_history or [])
 
 
-def _monster_timeline_prompt(language: str, source_documents: List[str], doc_tags: List[str]) -> Tuple[str, Optional[str]]:
+def _monster_timeline_prompt(
+    language: str, source_documents: List[str], doc_tags: List[str]
+) -> Tuple[str, Optional[str], Dict[str, Any]]:
     """Build prompt for comprehensive Monster CV timeline extraction."""
     schema = {
         "timeline": [
@@ -837,22 +981,18 @@ def _monster_timeline_prompt(language: str, source_documents: List[str], doc_tag
         "extraction_metadata": {},
     }
 
-    # Prioritize Arbeitszeugnisse by reordering documents
-    prioritized_docs = []
-    other_docs = []
-    for i, (doc, tag) in enumerate(zip(source_documents, doc_tags)):
-        if tag == "arbeitszeugnis":
-            prioritized_docs.append(doc)
-        else:
-            other_docs.append(doc)
-    ordered_docs = prioritized_docs + other_docs
-
-    raw_blob = "\n\n--- DOCUMENT ---\n\n".join(ordered_docs)
-    limit = 80000
-    warning = None
-    if len(raw_blob) > limit:
-        raw_blob = raw_blob[:limit]
-        warning = "Source documents truncated to 80k chars for Monster CV extraction."
+    # Prioritize Arbeitszeugnisse: they come first and are the last to be cut
+    separator = "\n\n--- DOCUMENT ---\n\n"
+    budget = plan_documents(
+        source_documents,
+        doc_tags,
+        MONSTER_TOKEN_BUDGET,
+        80000,
+        separator=separator,
+        purpose="Monster CV extraction",
+        priority=MONSTER_TAG_PRIORITY,
+    )
+    raw_blob = separator.join(budget.documents)
 
     guard_en = (
         "Extract a COMPREHENSIVE chronological timeline from all documents. "
@@ -891,7 +1031,7 @@ def _monster_timeline_prompt(language: str, source_documents: List[str], doc_tag
         f"Output schema: {json.dumps(schema, ensure_ascii=True)}\n\n"
         f"Input documents (Arbeitszeugnisse prioritized):\n<DOCUMENTS>\n{raw_blob}\n</DOCUMENTS>"
     )
-    return prompt, warning
+    return prompt, budget.warning, _prompt_usage("monster", prompt, budget.usage)
 
 
 def _coerce_timeline_entry(item: Any) -> Optional[ChronologicalEntry]:
@@ -953,19 +1093,18 @@ def _coerce_monster_payload(payload: Dict[str, Any]) -> MonsterCVProfile:
     )
 
 
-def _extract_monster_timeline_sync(
+async def _extract_monster_timeline(
     language: str,
     source_documents: List[str],
     doc_tags: List[str],
 ) -> Tuple[Optional[MonsterCVProfile], Optional[str]]:
-    """Synchronous Monster CV timeline extraction."""
     if not source_documents:
         return None, "No source documents provided"
 
-    prompt, warning = _monster_timeline_prompt(language, source_documents, doc_tags)
+    prompt, warning, _ = _monster_timeline_prompt(language, source_documents, doc_tags)
 
     try:
-        payload = _chat_json_openai(prompt=prompt, max_tokens=8000, model=CFG["extraction"])
+        payload = await _chat_json_openai(prompt=prompt, max_tokens=8000, model=CFG["extraction"])
         timeline = _coerce_monster_payload(payload)
         return timeline, warning
     except Exception as exc:
@@ -981,7 +1120,7 @@ async def extract_monster_timeline(
     doc_tags: List[str],
 ) -> Tuple[Optional[MonsterCVProfile], Optional[str]]:
     """Extract comprehensive Monster CV timeline (all responsibilities, no limits)."""
-    return await asyncio.to_thread(_extract_monster_timeline_sync, language, source_documents, doc_tags)
+    return await _extract_monster_timeline(language, source_documents, doc_tags)
 
 
 def _strategic_analysis_prompt(
@@ -1069,18 +1208,17 @@ Output: JSON with keys {{strengths, gaps, recommendations, summary}}
 Each list should contain 2-5 items."""
 
 
-def _generate_strategic_analysis_sync(
+async def _generate_strategic_analysis(
     language: str,
     match: Any,
     profile: ExtractedProfile,
     job_ad_text: str,
 ) -> Dict[str, Any]:
-    """Synchronous strategic analysis generation."""
     prompt = _strategic_analysis_prompt(language, match, profile, job_ad_text)
     system = "You are an expert career strategist. Return valid JSON only."
 
     try:
-        payload = _chat_json_anthropic(
+        payload = await _chat_json_anthropic(
             model=CFG["generation"],
             system=system,
             user=prompt,
@@ -1110,13 +1248,7 @@ async def generate_strategic_analysis(
     job_ad_text: str,
 ) -> Dict[str, Any]:
     """Generate strategic recommendations for job application."""
-    return await asyncio.to_thread(
-        _generate_strategic_analysis_sync,
-        language,
-        match,
-        profile,
-        job_ad_text
-    )
+    return await _generate_strategic_analysis(language, match, profile, job_ad_text)
 
 
 def _answer_strategic_question_prompt(
@@ -1164,7 +1296,7 @@ Answer the user's question in {lang_label} with specific, actionable advice base
 Do NOT return JSON. Return plain text answer only."""
 
 
-def _answer_strategic_question_sync(
+async def _answer_strategic_question(
     language: str,
     user_question: str,
     strategic_context: Dict[str, Any],
@@ -1172,39 +1304,25 @@ def _answer_strategic_question_sync(
     profile: ExtractedProfile,
     job_ad: str,
 ) -> str:
-    """Synchronous strategic question answering."""
+    """Answer user's strategic question with context-aware advice."""
     prompt = _answer_strategic_question_prompt(
         language, user_question, strategic_context, match_context, profile, job_ad
     )
 
-    client = _build_anthropic_client()
+    client = _build_async_anthropic_client()
     try:
-        resp = client.messages.create(
+        system = "You are a helpful career advisor. Provide concise, actionable advice."
+        resp = await llm_scheduler.run(
+            "anthropic",
+            lambda: client.messages.create(
+                model=CFG["generation"],
+                max_tokens=500,
+                system=system,
+                messages=[{"role": "user", "content": prompt}],
+            ),
+            tokens=estimate_tokens(system, prompt, max_tokens=500),
             model=CFG["generation"],
-            max_tokens=500,
-            system="You are a helpful career advisor. Provide concise, actionable advice.",
-            messages=[{"role": "user", "content": prompt}],
         )
         return (resp.content[0].text or "").strip()
     except Exception as exc:
         return f"Sorry, I couldn't generate a response. Error: {exc}"
-
-
-async def _answer_strategic_question(
-    language: str,
-    user_question: str,
-    strategic_context: Dict[str, Any],
-    match_context: Dict[str, Any],
-    profile: ExtractedProfile,
-    job_ad: str,
-) -> str:
-    """Answer user's strategic question with context-aware advice."""
-    return await asyncio.to_thread(
-        _answer_strategic_question_sync,
-        language,
-        user_question,
-        strategic_context,
-        match_context,
-        profile,
-        job_ad
-    )
@@ -1,9 +1,10 @@
 """LLM-based contextual matching and semantic understanding for CV-job alignment."""
 from __future__ import annotations
 
+import asyncio
 import json
 import os
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 from openai import AsyncOpenAI
 
@@ -13,6 +14,9 @@ from happyrav.models import (
     ExtractedProfile,
     SemanticMatchResult,
 )
+from happyrav.services import llm_cache, llm_clients, llm_metrics, llm_scheduler
+from happyrav.services.llm_scheduler import estimate_tokens
+from happyrav.services.prompt_budget import fit_text
 
 MATCHING_MODEL = (os.getenv("HAPPYRAV_MATCHING_MODEL") or "gpt-5.2").strip()
 MATCHING_MODEL_FALLBACKS = [
@@ -20,22 +24,20 @@ MATCHING_MODEL_FALLBACKS = [
     for m in (os.getenv("HAPPYRAV_MATCHING_MODEL_FALLBACKS") or "gpt-4.1,gpt-4.1-mini").split(",")
     if m.strip()
 ]
+# Hedging: once a candidate has been silent for its latency percentile, the next one starts too.
+HEDGE_ENABLED = (os.getenv("HAPPYRAV_LLM_HEDGE") or "1").strip().lower() not in ("0", "false", "no", "off")
+HEDGE_PERCENTILE = float(os.getenv("HAPPYRAV_LLM_HEDGE_PERCENTILE") or "0.95")
+HEDGE_MIN_SAMPLES = int(os.getenv("HAPPYRAV_LLM_HEDGE_MIN_SAMPLES") or "20")
+HEDGE_DEFAULT_DELAY = float(os.getenv("HAPPYRAV_LLM_HEDGE_DELAY") or "20")
+# standard: keywords, skill match and gap detection as three calls; fast: one combined call.
+MATCHING_MODE = (os.getenv("HAPPYRAV_MATCHING_MODE") or "standard").strip().lower()
 
 
-def _build_async_openai_client():
-    """Build async OpenAI client."""
-    from happyrav.services.llm_kimi import _load_codex_oauth_token
+def _build_async_openai_client() -> AsyncOpenAI:
+    """Shared async OpenAI client for the current key, base URL and event loop."""
+    from happyrav.services.llm_kimi import _openai_credentials
 
-    api_key = (os.getenv("OPENAI_API_KEY") or "").strip()
-    if not api_key:
-        api_key = _load_codex_oauth_token()
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY missing and no Codex OAuth token available.")
-
-    base_url = (os.getenv("OPENAI_BASE_URL") or "").strip()
-    if base_url:
-        return AsyncOpenAI(api_key=api_key, base_url=base_url)
-    return AsyncOpenAI(api_key=api_key)
+    return llm_clients.async_openai_client(*_openai_credentials())
 
 
 def _extract_json_payload(text: str) -> Dict[str, Any]:
@@ -51,32 +53,109 @@ def _extract_json_payload(text: str) -> Dict[str, Any]:
     return json.loads(text.strip())
 
 
+def _hedge_delay(model: str) -> Optional[float]:
+    """Seconds to wait on ``model`` before hedging: its latency percentile, or the default until enough calls are seen."""
+    if not HEDGE_ENABLED:
+        return None
+    delay = llm_metrics.latency_quantile("openai", model, HEDGE_PERCENTILE, min_samples=HEDGE_MIN_SAMPLES)
+    return delay if delay is not None else HEDGE_DEFAULT_DELAY
+
+
 async def _chat_json_openai_async(
-    system: str, user: str, max_tokens: int, model: str | None = None
+    system: str, user: str, max_tokens: int, model: str | None = None, cache: bool = True
 ) -> Dict[str, Any]:
-    """Async wrapper for OpenAI JSON chat with model fallback chain."""
-    client = _build_async_openai_client()
-    candidates = [model or MATCHING_MODEL, *MATCHING_MODEL_FALLBACKS]
-    last_exc: Exception | None = None
-    for candidate in candidates:
-        try:
-            resp = await client.chat.completions.create(
+    """Async wrapper for OpenAI JSON chat with model fallback chain.
+
+    A candidate that fails hands over to the next one at once. A candidate that
+    is still silent after its hedge delay gets the next one started alongside;
+    the first valid JSON wins and the other calls are cancelled. The hedge
+    delay counts from when the scheduler admits the call, so time spent queued
+    behind other requests never triggers a hedge.
+    Responses are cached under the requested model, whichever candidate answered.
+    """
+    requested = model or MATCHING_MODEL
+
+    async def call() -> Dict[str, Any]:
+        client = _build_async_openai_client()
+        candidates = [requested, *MATCHING_MODEL_FALLBACKS]
+
+        async def attempt(candidate: str, admitted: asyncio.Event) -> Dict[str, Any]:
+            # Rate limits are queued and retried by the scheduler; only other
+            # failures (or exhausted retries) fall through to the next model.
+            resp = await llm_scheduler.run(
+                "openai",
+                lambda: client.chat.completions.create(
+                    model=candidate,
+                    temperature=0.1,
+                    max_tokens=max_tokens,
+                    messages=[
+                        {"role": "system", "content": system},
+                        {"role": "user", "content": user},
+                    ],
+                ),
+                tokens=estimate_tokens(system, user, max_tokens=max_tokens),
                 model=candidate,
-                temperature=0.1,
-                max_tokens=max_tokens,
-                messages=[
-                    {"role": "system", "content": system},
-                    {"role": "user", "content": user},
-                ],
+                on_admit=admitted.set,
             )
             text = resp.choices[0].message.content or ""
             return _extract_json_payload(text)
-        except Exception as exc:
-            last_exc = exc
-            continue
-    if last_exc:
-        raise last_exc
-    raise RuntimeError("No matching model candidates configured.")
+
+        pending: Dict[asyncio.Task, str] = {}
+        admitted: Dict[str, asyncio.Event] = {}
+        hedged: set = set()
+        launched = 0
+
+        def launch(after: Optional[str] = None, hedge: bool = False) -> None:
+            nonlocal launched
+            candidate = candidates[launched]
+            if hedge:
+                llm_metrics.record_hedge("openai", after, candidate)
+                hedged.add(candidate)
+            elif after:
+                llm_metrics.record_fallback("openai", after, candidate)
+            launched += 1
+            admitted[candidate] = asyncio.Event()
+            pending[asyncio.ensure_future(attempt(candidate, admitted[candidate]))] = candidate
+
+        last_exc: Exception | None = None
+        try:
+            if candidates:
+                launch()
+            while pending:
+                latest = candidates[launched - 1]
+                delay = _hedge_delay(latest) if launched < len(candidates) else None
+                if delay is not None and not admitted[latest].is_set():
+                    # Still queued in the scheduler: wait for admission before starting the hedge clock.
+                    gate = asyncio.ensure_future(admitted[latest].wait())
+                    done, _ = await asyncio.wait([*pending, gate], return_when=asyncio.FIRST_COMPLETED)
+                    gate.cancel()
+                    done.discard(gate)
+                    if not done:
+                        continue
+                else:
+                    done, _ = await asyncio.wait(pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                    if not done:
+                        launch(after=latest, hedge=True)
+                        continue
+                for task in done:
+                    candidate = pending.pop(task)
+                    if task.exception() is None:
+                        if candidate in hedged:
+                            llm_metrics.record_hedge_win("openai", candidate)
+                        return task.result()
+                    last_exc = task.exception()
+                    if launched < len(candidates):
+                        launch(after=candidate)
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        if last_exc:
+            raise last_exc
+        raise RuntimeError("No matching model candidates configured.")
+
+    return await llm_cache.cached_json("openai", requested, system, user, max_tokens, call, cache=cache)
 
 
 async def extract_semantic_keywords(
@@ -100,7 +179,7 @@ async def extract_semantic_keywords(
     user_prompt = f"""Analyze this job posting and extract requirements with semantic understanding.
 
 Job Posting:
-{job_ad_text[:2500]}
+{fit_text(job_ad_text, 625)}
 
 Return JSON with:
 - required_hard_skills: technical skills with synonyms/alternatives (array of objects)
@@ -179,7 +258,11 @@ Return JSON:
         model=MATCHING_MODEL
     )
 
-    # Convert to SemanticMatchResult model
+    return _semantic_match_result(response)
+
+
+def _semantic_match_result(response: Dict[str, Any]) -> SemanticMatchResult:
+    """Convert a skill-match JSON payload to SemanticMatchResult."""
     return SemanticMatchResult(
         matched_hard_skills=response.get("matched_hard_skills", []),
         matched_soft_skills=response.get("matched_soft_skills", []),
@@ -204,7 +287,7 @@ async def rank_skills_by_relevance(
     user_prompt = f"""Rank these CV skills by relevance to the job posting.
 
 Job Posting:
-{job_ad_text[:2000]}
+{fit_text(job_ad_text, 500)}
 
 CV Skills:
 {', '.join(cv_skills[:40])}
@@ -252,7 +335,7 @@ async def score_achievement_relevance(
     user_prompt = f"""Analyze these CV achievements for relevance to the job posting.
 
 Job Posting:
-{job_ad_text[:2000]}
+{fit_text(job_ad_text, 500)}
 
 Achievements:
 {json.dumps(achievements[:20], indent=2)}
@@ -306,7 +389,7 @@ async def detect_contextual_gaps(
     user_prompt = f"""Analyze gaps between this CV and job requirements.
 
 Job Posting:
-{job_ad_text[:2000]}
+{fit_text(job_ad_text, 500)}
 
 CV Profile:
 {json.dumps(profile_summary, indent=2)}
@@ -337,8 +420,11 @@ Return JSON with "gaps" array. Focus on actionable gaps. Language: {lang_label}
         model=MATCHING_MODEL
     )
 
-    # Convert to ContextualGap objects
-    gaps_data = response.get("gaps", [])
+    return _contextual_gaps(response.get("gaps", []))
+
+
+def _contextual_gaps(gaps_data: List[Dict[str, Any]]) -> List[ContextualGap]:
+    """Convert a JSON "gaps" array to ContextualGap objects."""
     gaps = []
     for gap in gaps_data:
         gaps.append(ContextualGap(
@@ -351,6 +437,83 @@ Return JSON with "gaps" array. Focus on actionable gaps. Language: {lang_label}
     return gaps
 
 
+async def match_semantic_fast(
+    profile: ExtractedProfile,
+    job_ad_text: str,
+    language: str
+) -> Tuple[Dict[str, Any], SemanticMatchResult, List[ContextualGap]]:
+    """
+    Single-call alternative to extract_semantic_keywords + match_skills_semantic + detect_contextual_gaps.
+
+    Sends the job ad once and returns (requirements, SemanticMatchResult, gaps)
+    in the same shapes as the three-call path.
+    """
+    lang_label = "German" if language == "de" else "English"
+
+    cv_profile = {
+        "skills": profile.skills_str[:30],
+        "experience_summary": [
+            f"{exp.role} at {exp.company} ({exp.period}): {' '.join(exp.achievements)[:200]}"
+            for exp in profile.experience[:5]
+        ],
+        "experience_entries": len(profile.experience),
+        "education": [f"{edu.degree} from {edu.school}" for edu in profile.education[:5]],
+        "summary": profile.summary[:300] if profile.summary else ""
+    }
+
+    user_prompt = f"""Analyze this job posting, then match the CV against it with semantic understanding.
+
+Job Posting:
+{fit_text(job_ad_text, 625)}
+
+CV Profile:
+{json.dumps(cv_profile, indent=2)}
+
+Step 1 - requirements: extract required hard skills, required soft skills and nice-to-have skills, each with
+canonical name, alternatives (equivalent terms) and criticality 0-1 (1 = must-have, 0.5 = nice-to-have).
+Step 2 - match: for each requirement check whether the CV lists it, demonstrates it through experience,
+or has a transferable/equivalent skill.
+Step 3 - gaps: missing hard/soft skills, experience duration, education or certification gaps that matter;
+severity critical (deal-breaker) | important (significant) | nice-to-have (minor).
+
+Return JSON:
+{{
+    "requirements": {{
+        "required_hard_skills": [{{"skill": "Python", "alternatives": ["Python 3"], "criticality": 0.95}}],
+        "required_soft_skills": [{{"skill": "leadership", "alternatives": ["team management"], "criticality": 0.8}}],
+        "nice_to_have": [],
+        "experience_years": {{"minimum": 5, "role": "backend development"}},
+        "industry_context": "fintech startup"
+    }},
+    "match": {{
+        "matched_hard_skills": [{{"skill": "Python", "evidence": "Listed in skills + 5 years backend work", "confidence": 0.95}}],
+        "matched_soft_skills": [{{"skill": "leadership", "evidence": "Led team of 15", "confidence": 0.9}}],
+        "missing_critical": ["AWS"],
+        "transferable_matches": [{{"cv_has": "Java", "job_needs": "object-oriented language", "confidence": 0.8}}],
+        "overall_fit": 0.75
+    }},
+    "gaps": [{{"gap_type": "skill|experience|education|certification", "missing": "AWS", "severity": "critical", "substitutable": false, "suggestions": "how to address in application"}}]
+}}
+
+Focus gaps on actionable items. Language: {lang_label}
+"""
+
+    system_prompt = "You are a recruitment analyst and CV matching expert. Identify semantic skill matches beyond exact keywords and gaps with nuance. Return valid JSON only."
+
+    response = await _chat_json_openai_async(
+        system=system_prompt,
+        user=user_prompt,
+        max_tokens=5000,
+        model=MATCHING_MODEL
+    )
+    requirements = response.get("requirements", {})
+    return (
+        requirements if isinstance(requirements, dict) else {},
+        _semantic_match_result(response.get("match") or {}),
+        _contextual_gaps(response.get("gaps") or []),
+    )
+
+
 async def summarize_job_ad(job_ad_text: str, language: str) -> str:
     """
     Produce a concise, quote-grounded job summary.
@@ -373,12 +536,12 @@ async def summarize_job_ad(job_ad_text: str, language: str) -> str:
         "in the posting. If a detail is unclear, omit it. Return 3-5 bullet sentences separated by spaces; "
         "no Markdown, no quotes, max 90 words."
     )
-    user_prompt = f"Language: {lang_label}\nJob posting:\n{job_ad_text[:2600]}"
+    user_prompt = f"Language: {lang_label}\nJob posting:\n{fit_text(job_ad_text, 650)}"
 
     try:
         response = await _chat_json_openai_async(
             system=system_prompt,
-            user=json.dumps({"job_posting": job_ad_text[:2600], "language": lang_label}),
+            user=json.dumps({"job_posting": fit_text(job_ad_text, 650), "language": lang_label}),
             max_tokens=300,
             model=MATCHING_MODEL,
         )
@@ -0,0 +1,268 @@
+"""Token, latency and cost accounting for LLM calls, exported in Prometheus format.
+
+Every provider call is wrapped by ``track()`` (the scheduler does this for the
+async calls, ``vision_ocr`` for itself), which records the provider, model,
+prompt and completion tokens reported by the response, wall time, rate-limit
+retries and outcome. The response cache and the matching fallback chain add
+cache hits, fallback hops and hedged requests. Everything is labelled with
+the endpoint that caused it, which the app sets per request via
+``endpoint``. Two latency histograms are kept: wall time of the whole call,
+including scheduler queueing and rate-limit retries, and provider time of the
+attempt that answered. Only the latter feeds ``latency_quantile``, which sets
+the hedge delay of the matching fallback chain, so queueing under load does
+not push the delay up. A call cancelled because a hedge won counts as
+``cancelled`` and stays out of both histograms, since its wall time only
+bounds the real latency from below.
+
+Costs use list prices in USD per million tokens from ``PRICES`` (matched by
+model prefix), overridable with ``HAPPYRAV_LLM_PRICES`` as JSON, e.g.
+``{"gpt-5.2": [1.25, 10.0]}``. Unpriced models count tokens but no cost.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+endpoint: ContextVar[str] = ContextVar("happyrav_llm_endpoint", default="other")
+
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+CALL_SECONDS = "happyrav_llm_call_seconds"
+PROVIDER_SECONDS = "happyrav_llm_provider_seconds"
+
+# USD per million (prompt, completion) tokens; the longest matching prefix wins.
+PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "claude-sonnet-4": (3.00, 15.00),
+}
+
+
+def _prices() -> Dict[str, Tuple[float, float]]:
+    prices = dict(PRICES)
+    raw = os.getenv("HAPPYRAV_LLM_PRICES")
+    if raw:
+        prices.update({model: (float(pair[0]), float(pair[1])) for model, pair in json.loads(raw).items()})
+    return prices
+
+
+def cost_usd(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prices = _prices()
+    matches = [prefix for prefix in prices if model.startswith(prefix)]
+    if not matches:
+        return 0.0
+    prompt_price, completion_price = prices[max(matches, key=len)]
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+def _count(value: Any) -> int:
+    return value if isinstance(value, int) and not isinstance(value, bool) else 0
+
+
+def usage_tokens(response: Any) -> Tuple[int, int]:
+    """(prompt, completion) tokens from an OpenAI, Anthropic or Gemini response; zeros when not reported."""
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        prompt = _count(getattr(usage, "prompt_tokens", None)) or _count(getattr(usage, "input_tokens", None))
+        completion = _count(getattr(usage, "completion_tokens", None)) or _count(getattr(usage, "output_tokens", None))
+        return prompt, completion
+    metadata = getattr(response, "usage_metadata", None)
+    if metadata is not None:
+        return _count(getattr(metadata, "prompt_token_count", None)), _count(getattr(metadata, "candidates_token_count", None))
+    return 0, 0
+
+
+class Registry:
+    """Counters and latency histograms keyed by label tuples."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[Tuple[Tuple[str, str], ...], float]] = {}
+        self.histograms: Dict[str, Dict[Tuple[Tuple[str, str], ...], List[float]]] = {}
+
+    def inc(self, name: str, labels: Dict[str, str], amount: float = 1.0) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, labels: Dict[str, str], seconds: float, metric: str = CALL_SECONDS) -> None:
+        # Per series: one count per bucket, then +Inf count and the sum.
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self.histograms.setdefault(metric, {}).setdefault(key, [0.0] * (len(LATENCY_BUCKETS) + 2))
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    series[index] += 1
+            series[-2] += 1
+            series[-1] += seconds
+
+    def quantile(self, q: float, min_samples: int = 1, metric: str = CALL_SECONDS, **labels: str) -> Optional[float]:
+        """Latency below which a ``q`` share of calls matching ``labels`` finished, interpolated within buckets.
+
+        None with fewer than ``min_samples`` observations; the top bucket bound when the quantile lies beyond it.
+        """
+        with self._lock:
+            matching = [
+                series for key, series in self.histograms.get(metric, {}).items()
+                if all(dict(key).get(label) == wanted for label, wanted in labels.items())
+            ]
+            buckets = [sum(series[index] for series in matching) for index in range(len(LATENCY_BUCKETS) + 1)]
+        total = buckets[-1]
+        if not total or total < min_samples:
+            return None
+        rank = q * total
+        lower_bound, lower_count = 0.0, 0.0
+        for bound, count in zip(LATENCY_BUCKETS, buckets):
+            if count >= rank:
+                share = (rank - lower_count) / (count - lower_count) if count > lower_count else 1.0
+                return lower_bound + (bound - lower_bound) * share
+            lower_bound, lower_count = bound, count
+        return LATENCY_BUCKETS[-1]
+
+    def value(self, name: str, **labels: str) -> float:
+        """Sum of ``name`` over all series matching ``labels``."""
+        with self._lock:
+            return sum(
+                amount
+                for key, amount in self.counters.get(name, {}).items()
+                if all(dict(key).get(label) == wanted for label, wanted in labels.items())
+            )
+
+
+registry = Registry()
+
+
+class CallRecord:
+    def __init__(self, provider: str, model: str) -> None:
+        self.provider = provider
+        self.model = model
+        self.retries = 0
+        self.response: Any = None
+        # Time the answering attempt spent at the provider; the scheduler sets it, excluding queue waits.
+        self.provider_seconds: Optional[float] = None
+
+
+@contextmanager
+def track(provider: str, model: str) -> Iterator[CallRecord]:
+    """Record one logical provider call; set ``record.response`` (and ``retries``) inside the block."""
+    record = CallRecord(provider, model)
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield record
+        outcome = "ok"
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    finally:
+        labels = {"endpoint": endpoint.get(), "provider": provider, "model": model}
+        registry.inc("happyrav_llm_calls_total", {**labels, "outcome": outcome})
+        elapsed = time.perf_counter() - started
+        if outcome != "cancelled":
+            registry.observe(labels, elapsed)
+        if outcome == "ok":
+            seconds = record.provider_seconds if record.provider_seconds is not None else elapsed
+            registry.observe(labels, seconds, metric=PROVIDER_SECONDS)
+        if record.retries:
+            registry.inc("happyrav_llm_retries_total", labels, record.retries)
+        if record.response is not None:
+            prompt, completion = usage_tokens(record.response)
+            registry.inc("happyrav_llm_prompt_tokens_total", labels, prompt)
+            registry.inc("happyrav_llm_completion_tokens_total", labels, completion)
+            cost = cost_usd(model, prompt, completion)
+            if cost:
+                registry.inc("happyrav_llm_cost_usd_total", labels, cost)
+
+
+def record_cache(provider: str, model: str, hit: bool) -> None:
+    name = "happyrav_llm_cache_hits_total" if hit else "happyrav_llm_cache_misses_total"
+    registry.inc(name, {"endpoint": endpoint.get(), "provider": provider, "model": model})
+
+
+def record_fallback(provider: str, from_model: str, to_model: str) -> None:
+    registry.inc(
+        "happyrav_llm_fallback_hops_total",
+        {"endpoint": endpoint.get(), "provider": provider, "model": from_model, "to_model": to_model},
+    )
+
+
+def record_hedge(provider: str, from_model: str, to_model: str) -> None:
+    registry.inc(
+        "happyrav_llm_hedges_total",
+        {"endpoint": endpoint.get(), "provider": provider, "model": from_model, "to_model": to_model},
+    )
+
+
+def record_hedge_win(provider: str, model: str) -> None:
+    registry.inc("happyrav_llm_hedge_wins_total", {"endpoint": endpoint.get(), "provider": provider, "model": model})
+
+
+def latency_quantile(provider: str, model: str, q: float, min_samples: int = 1) -> Optional[float]:
+    """``q`` quantile of provider latency (no queue wait) for ``provider``/``model`` across all endpoints, in seconds."""
+    return registry.quantile(q, min_samples, metric=PROVIDER_SECONDS, provider=provider, model=model)
+
+
+_HELP = {
+    "happyrav_llm_calls_total": "LLM provider calls by outcome.",
+    "happyrav_llm_prompt_tokens_total": "Prompt tokens reported by the provider.",
+    "happyrav_llm_completion_tokens_total": "Completion tokens reported by the provider.",
+    "happyrav_llm_cost_usd_total": "Estimated cost in USD at list prices.",
+    "happyrav_llm_retries_total": "Retries after provider rate limits.",
+    "happyrav_llm_fallback_hops_total": "Moves to the next model in a fallback chain.",
+    "happyrav_llm_hedges_total": "Hedged requests started because a model was slower than its latency percentile.",
+    "happyrav_llm_hedge_wins_total": "Hedged requests that answered first.",
+    "happyrav_llm_cache_hits_total": "LLM responses served from the response cache.",
+    "happyrav_llm_cache_misses_total": "Response cache lookups that went to the provider.",
+    CALL_SECONDS: "Wall time of LLM provider calls, including queueing and rate-limit waits.",
+    PROVIDER_SECONDS: "Provider response time of successful LLM calls, excluding queueing.",
+}
+
+
+def _labels(key: Tuple[Tuple[str, str], ...], extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = list(key) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + body + "}"
+
+
+def _number(value: float) -> str:
+    return repr(int(value)) if float(value).is_integer() else repr(value)
+
+
+def render(gauges: Optional[Dict[str, Dict[Tuple[Tuple[str, str], ...], float]]] = None) -> str:
+    """Prometheus text exposition of the registry plus ``gauges`` (name -> label key -> value)."""
+    lines: List[str] = []
+    with registry._lock:
+        counters = {name: dict(series) for name, series in registry.counters.items()}
+        histograms = {
+            name: {key: list(series) for key, series in metric.items()} for name, metric in registry.histograms.items()
+        }
+    for name in sorted(counters):
+        lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+        lines.append(f"# TYPE {name} counter")
+        for key, value in sorted(counters[name].items()):
+            lines.append(f"{name}{_labels(key)} {_number(value)}")
+    for name in sorted(histograms):
+        lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+        lines.append(f"# TYPE {name} histogram")
+        for key, series in sorted(histograms[name].items()):
+            for bound, count in zip(LATENCY_BUCKETS, series):
+                lines.append(f"{name}_bucket{_labels(key, {'le': repr(bound)})} {_number(count)}")
+            lines.append(f"{name}_bucket{_labels(key, {'le': '+Inf'})} {_number(series[-2])}")
+            lines.append(f"{name}_count{_labels(key)} {_number(series[-2])}")
+            lines.append(f"{name}_sum{_labels(key)} {_number(series[-1])}")
+    for name, series in sorted((gauges or {}).items()):
+        lines.append(f"# TYPE {name} gauge")
+        for key, value in sorted(series.items()):
+            lines.append(f"{name}{_labels(key)} {_number(value)}")
+    return "\n".join(lines) + "\n"
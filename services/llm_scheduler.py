@@ -0,0 +1,258 @@
+"""Per-provider admission control for LLM calls.
+
+Each provider gets a concurrency limit, optional requests-per-minute and
+tokens-per-minute buckets, and a pause honouring ``Retry-After``. The
+concurrency limit adapts AIMD-style: it grows by about one slot per limit's
+worth of successful calls and halves on every 429. A call rejected with 429 is
+queued and retried here instead of failing over to another model, so bursts
+degrade into queueing.
+
+Configuration per provider (``OPENAI``, ``ANTHROPIC``, ``GOOGLE``):
+``HAPPYRAV_<PROVIDER>_MAX_CONCURRENCY`` (default 16), ``HAPPYRAV_<PROVIDER>_RPM``
+and ``HAPPYRAV_<PROVIDER>_TPM`` (default 0, unlimited); ``HAPPYRAV_LLM_RATE_LIMIT_RETRIES``
+(default 3) bounds the retries of one rate-limited call.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from happyrav.services import llm_metrics
+from happyrav.services.prompt_budget import count_tokens
+
+BACKOFF_BASE_SECONDS = 1.0
+MAX_PAUSE_SECONDS = 60.0
+
+
+def estimate_tokens(*texts: str, max_tokens: int = 0) -> int:
+    """Prompt token count for the rate buckets plus the completion budget."""
+    return sum(count_tokens(text or "") for text in texts) + max_tokens
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    status = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+    return status == 429 or type(exc).__name__ in ("RateLimitError", "ResourceExhausted", "TooManyRequests")
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait, from ``retry-after-ms`` or ``Retry-After`` (seconds or HTTP date)."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Refills ``per_minute`` units per minute, holding at most one minute's worth."""
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.per_minute = per_minute
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._level = float(per_minute)
+        self._updated = clock()
+
+    def reserve(self, amount: float) -> float:
+        """Take ``amount`` (capped at the bucket size) and return how long to wait before it is covered."""
+        if self.per_minute <= 0:
+            return 0.0
+        with self._lock:
+            now = self._clock()
+            self._level = min(self.per_minute, self._level + (now - self._updated) * self.per_minute / 60)
+            self._updated = now
+            self._level -= min(amount, self.per_minute)
+            return 0.0 if self._level >= 0 else -self._level * 60 / self.per_minute
+
+
+class ProviderScheduler:
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int = 16,
+        rpm: float = 0,
+        tpm: float = 0,
+        max_retries: int = 3,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.limit = float(self.max_concurrency)
+        self.requests = TokenBucket(rpm, clock)
+        self.tokens = TokenBucket(tpm, clock)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.completed = 0
+        self.throttled = 0
+
+    @property
+    def queued(self) -> int:
+        """Calls waiting for a slot."""
+        with self._lock:
+            return len(self._waiters)
+
+    def _slots(self) -> int:
+        return max(1, int(self.limit))
+
+    def _hand_off(self) -> None:
+        # Called with the lock held: give free slots to waiters in arrival order.
+        while self._waiters and self.in_flight < self._slots():
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            waiter.get_loop().call_soon_threadsafe(self._grant, waiter)
+
+    def _grant(self, waiter: asyncio.Future) -> None:
+        if waiter.done():
+            # Cancelled between hand-off and delivery: return the slot.
+            self._release()
+        else:
+            waiter.set_result(None)
+
+    def _release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self._hand_off()
+
+    async def _acquire(self) -> None:
+        with self._lock:
+            if self.in_flight < self._slots() and not self._waiters:
+                self.in_flight += 1
+                return
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+
+    async def _admit(self, tokens: int) -> None:
+        # Holding a slot: wait out any Retry-After pause, then for the rate buckets.
+        while True:
+            pause = self.paused_until - self._clock()
+            if pause <= 0:
+                break
+            await asyncio.sleep(pause)
+        wait = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def _succeeded(self) -> None:
+        with self._lock:
+            self.completed += 1
+            self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+            self.in_flight -= 1
+            self._hand_off()
+
+    def _throttle(self, exc: BaseException, attempt: int) -> None:
+        delay = retry_after(exc)
+        if delay is None:
+            delay = BACKOFF_BASE_SECONDS * 2 ** attempt
+        with self._lock:
+            self.throttled += 1
+            self.limit = max(1.0, self.limit / 2)
+            self.paused_until = max(self.paused_until, self._clock() + min(delay, MAX_PAUSE_SECONDS))
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[Any]],
+        tokens: int = 0,
+        model: str = "",
+        on_admit: Optional[Callable[[], None]] = None,
+    ) -> Any:
+        """Run ``call`` once a slot and rate budget are free, retrying it after 429s.
+
+        ``on_admit`` is called each time the call leaves the queue and goes to the provider.
+        """
+        with llm_metrics.track(self.name, model) as record:
+            while True:
+                await self._acquire()
+                try:
+                    await self._admit(tokens)
+                    if on_admit is not None:
+                        on_admit()
+                    started = time.perf_counter()
+                    result = await call()
+                    record.provider_seconds = time.perf_counter() - started
+                except BaseException as exc:
+                    if isinstance(exc, Exception) and is_rate_limited(exc) and record.retries < self.max_retries:
+                        self._throttle(exc, record.retries)
+                        self._release()
+                        record.retries += 1
+                        continue
+                    self._release()
+                    raise
+                self._succeeded()
+                record.response = result
+                return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "limit": round(self.limit, 2),
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self.in_flight,
+                "queued": len(self._waiters),
+                "paused_for": round(max(0.0, self.paused_until - self._clock()), 2),
+                "completed": self.completed,
+                "throttled": self.throttled,
+            }
+
+
+_lock = threading.Lock()
+schedulers: Dict[str, ProviderScheduler] = {}
+
+
+def scheduler(provider: str) -> ProviderScheduler:
+    """The process-wide scheduler for ``provider``, configured from the environment on first use."""
+    current = schedulers.get(provider)
+    if current is None:
+        with _lock:
+            current = schedulers.get(provider)
+            if current is None:
+                env = f"HAPPYRAV_{provider.upper()}"
+                current = schedulers[provider] = ProviderScheduler(
+                    provider,
+                    max_concurrency=int(os.getenv(f"{env}_MAX_CONCURRENCY", "16")),
+                    rpm=float(os.getenv(f"{env}_RPM", "0")),
+                    tpm=float(os.getenv(f"{env}_TPM", "0")),
+                    max_retries=int(os.getenv("HAPPYRAV_LLM_RATE_LIMIT_RETRIES", "3")),
+                )
+    return current
+
+
+async def run(
+    provider: str,
+    call: Callable[[], Awaitable[Any]],
+    tokens: int = 0,
+    model: str = "",
+    on_admit: Optional[Callable[[], None]] = None,
+) -> Any:
+    return await scheduler(provider).run(call, tokens, model, on_admit)
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    return {name: current.snapshot() for name, current in list(schedulers.items())}
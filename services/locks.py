@@ -0,0 +1,77 @@
+"""Per-session asyncio locks and coalescing of identical in-flight work."""
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _LockEntry:
+    __slots__ = ("lock", "users")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class SessionLocks:
+    """Serializes work per session and lets duplicate operations share one result.
+
+    Locks are reference-counted and dropped once no request holds or waits on
+    them, so idle sessions cost nothing. Both mechanisms are per process;
+    across workers the session store's compare-and-set writes keep records
+    consistent.
+    """
+
+    def __init__(self) -> None:
+        self._locks: Dict[str, _LockEntry] = {}
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.coalesced = 0
+
+    @asynccontextmanager
+    async def hold(self, session_id: str) -> AsyncIterator[None]:
+        entry = self._locks.get(session_id)
+        if entry is None:
+            entry = self._locks[session_id] = _LockEntry()
+        entry.users += 1
+        try:
+            async with entry.lock:
+                yield
+        finally:
+            entry.users -= 1
+            if not entry.users:
+                self._locks.pop(session_id, None)
+
+    def locked(self, session_id: str) -> bool:
+        entry = self._locks.get(session_id)
+        return bool(entry and entry.lock.locked())
+
+    async def coalesce(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        """Run ``factory()`` once for all concurrent callers with the same ``key``.
+
+        The shared task is shielded: if the request that started it is
+        cancelled (client disconnect), the other callers still get the result.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved when every caller went away before it finished.
+            task.exception()
+
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"locks": len(self._locks), "inflight": len(self._inflight), "coalesced": self.coalesced}
@@ -0,0 +1,211 @@
+"""Token budgets for LLM prompts built from uploaded documents.
+
+Documents are compacted first: runs of whitespace and separator rules
+collapse, and page headers and footers are dropped (page numbers and repeats
+of lines recurring as the first or last line of a page, found at the form
+feeds PDF extraction places between pages). Body lines are kept even when they
+repeat, such as an employer listed for several roles. The remaining token
+budget is then handed out by document tag priority (cv > arbeitszeugnis >
+certificate > cover_letter > other, see ``TAG_PRIORITY``), so a CV is never
+dropped for a long reference letter. A document that no longer fits is cut
+at a line boundary, and the ones after it are left out.
+
+Tokens are counted with ``tiktoken`` when it is installed (``pip install
+tiktoken``), otherwise estimated at four characters per token. Each plan also
+applies a character ceiling, so a prompt never exceeds the size the models
+were tuned for, whichever tokenizer is used.
+"""
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import tiktoken
+except ImportError:  # optional: pip install tiktoken
+    tiktoken = None
+
+TAG_PRIORITY = ("cv", "arbeitszeugnis", "certificate", "cover_letter", "other")
+CHARS_PER_TOKEN = 4
+
+_encoding = None
+
+
+def _encoder():
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        _encoding = tiktoken.get_encoding("o200k_base")
+    return _encoding
+
+
+def tokenizer_name() -> str:
+    return "tiktoken" if tiktoken is not None else "heuristic"
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoder = _encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def clip_tokens(text: str, tokens: int) -> str:
+    """Longest prefix of ``text`` within ``tokens``, ending at a line break when one is near the cut."""
+    if tokens <= 0:
+        return ""
+    encoder = _encoder()
+    if encoder is not None:
+        ids = encoder.encode(text, disallowed_special=())
+        if len(ids) <= tokens:
+            return text
+        clipped = encoder.decode(ids[:tokens])
+    else:
+        if len(text) <= tokens * CHARS_PER_TOKEN:
+            return text
+        clipped = text[: tokens * CHARS_PER_TOKEN]
+    newline = clipped.rfind("\n")
+    return clipped[:newline] if newline > len(clipped) * 0.8 else clipped
+
+
+PAGE_BREAK = "\f"
+_PAGE_NUMBER_RE = re.compile(r"^\s*(?:(?:page|seite|p\.)\s*)?\d{1,3}\s*(?:(?:/|of|von)\s*\d{1,3})?\s*$", re.IGNORECASE)
+_RULE_RE = re.compile(r"^\s*[-_=*·•.]{3,}\s*$")
+
+
+def _furniture_key(line: str) -> str:
+    # Running headers/footers often carry the page number ("Muster AG - Seite 2").
+    return re.sub(r"\d+", "#", line)
+
+
+def _page_furniture(pages: List[List[str]]) -> List[set]:
+    """Indexes of header/footer lines to drop per page.
+
+    Only the first and last content line of a page qualify: page numbers always,
+    and lines recurring in that position on at least half the pages (two or
+    more) from their second occurrence on, so a running header carrying the
+    candidate's name still reaches the prompt once.
+    """
+    edges = []
+    for lines in pages:
+        filled = [index for index, line in enumerate(lines) if line and not _RULE_RE.match(line)]
+        edges.append((filled[0], filled[-1]) if filled else ())
+    recurring = {}
+    for position in (0, 1):
+        keys = Counter(_furniture_key(pages[page][edge[position]]) for page, edge in enumerate(edges) if edge)
+        recurring[position] = {key for key, count in keys.items() if count >= max(2, len(pages) / 2)}
+    seen: set = set()
+    furniture: List[set] = []
+    for page, edge in enumerate(edges):
+        drop = set()
+        for position, index in enumerate(edge):
+            line = pages[page][index]
+            key = (position, _furniture_key(line))
+            if _PAGE_NUMBER_RE.match(line) or (key[1] in recurring[position] and key in seen):
+                drop.add(index)
+            seen.add(key)
+        furniture.append(drop)
+    return furniture
+
+
+def compact(text: str) -> str:
+    """Collapse whitespace and separator rules, and drop page headers and footers.
+
+    Headers and footers are only recognised at page breaks (form feeds, which PDF
+    extraction puts between pages); body lines are never dropped for repeating.
+    """
+    pages = [
+        [re.sub(r"[ \t\u00a0]+", " ", line).strip() for line in page.split("\n")]
+        for page in (text or "").split(PAGE_BREAK)
+    ]
+    furniture = _page_furniture(pages) if len(pages) > 1 else [set()]
+    kept: List[str] = []
+    for lines, drop in zip(pages, furniture):
+        for index, line in enumerate(lines):
+            if index in drop or (line and _RULE_RE.match(line)):
+                continue
+            if not line and (not kept or not kept[-1]):
+                continue
+            kept.append(line)
+        if kept and kept[-1]:
+            kept.append("")
+    return "\n".join(kept).strip()
+
+
+def fit_text(text: str, tokens: int) -> str:
+    """``text`` compacted and clipped to ``tokens``; for single inputs such as a job ad."""
+    return clip_tokens(compact(text), tokens)
+
+
+@dataclass
+class PromptBudget:
+    documents: List[str]
+    warning: Optional[str] = None
+    usage: Dict[str, Any] = field(default_factory=dict)
+
+
+def plan_documents(
+    documents: Sequence[str],
+    tags: Optional[Sequence[str]],
+    budget_tokens: int,
+    max_chars: int,
+    separator: str = "\n\n",
+    purpose: str = "the prompt",
+    priority: Sequence[str] = TAG_PRIORITY,
+) -> PromptBudget:
+    """Compact ``documents`` and fit them into ``budget_tokens`` and ``max_chars``, highest-priority tag first.
+
+    Returns the documents to send (in priority order) with a warning naming the
+    cuts, if any, and a usage report for logging before the call.
+    """
+    tags = list(tags or [])
+    tags += ["other"] * (len(documents) - len(tags))
+    rank = {tag: index for index, tag in enumerate(priority)}
+    order = sorted(range(len(documents)), key=lambda index: (rank.get(tags[index], len(priority)), index))
+
+    token_budget = budget_tokens
+    char_budget = max_chars
+    kept: List[str] = []
+    report: List[Dict[str, Any]] = []
+    cut: List[str] = []
+    raw_tokens = 0
+    for index in order:
+        raw_tokens += count_tokens(documents[index])
+        text = compact(documents[index])
+        tokens = count_tokens(text)
+        entry = {"tag": tags[index], "tokens": tokens, "kept_tokens": 0}
+        report.append(entry)
+        overhead = len(separator) if kept else 0
+        room_chars = char_budget - overhead
+        if not text or token_budget <= 0 or room_chars <= 0:
+            if text:
+                cut.append(f"{tags[index]} dropped")
+            continue
+        if tokens > token_budget or len(text) > room_chars:
+            text = clip_tokens(text, token_budget)[:room_chars]
+            cut.append(f"{tags[index]} cut")
+        kept_tokens = count_tokens(text)
+        entry["kept_tokens"] = kept_tokens
+        token_budget -= kept_tokens
+        char_budget -= len(text) + overhead
+        kept.append(text)
+
+    warning = None
+    if cut:
+        warning = (
+            f"Source documents truncated for {purpose} "
+            f"(budget {budget_tokens} tokens / {max_chars // 1000}k chars): {', '.join(cut)}."
+        )
+    usage = {
+        "tokenizer": tokenizer_name(),
+        "budget_tokens": budget_tokens,
+        "raw_tokens": raw_tokens,
+        "input_tokens": sum(entry["tokens"] for entry in report),
+        "kept_tokens": budget_tokens - token_budget,
+        "documents": report,
+    }
+    return PromptBudget(documents=kept, warning=warning, usage=usage)
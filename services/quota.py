@@ -0,0 +1,136 @@
+"""Global disk quota across every cache namespace under ``data/``.
+
+Each cache tracks its own bytes (see ``_SizeBudget`` in ``services/cache.py``)
+and reports how much each write, delete or expiry changed them. Once the combined size crosses the
+high-water mark, entries are evicted oldest-first, namespace by namespace in
+priority order (re-creatable documents and artifacts before live sessions),
+until usage is back under the low-water mark.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Evicted first to last. Sessions go last: losing one loses the user's work.
+EVICTION_ORDER = ("document", "llm", "artifact", "monster", "blob", "session")
+
+
+def default_quota_bytes(data_dir: Path, used: int, share: float = 0.8) -> int:
+    """``share`` of what ``data_dir`` can grow to: its volume's free space plus the ``used`` bytes already in it."""
+    try:
+        free = shutil.disk_usage(data_dir).free
+    except OSError:
+        return 0
+    return int((free + used) * share)
+
+
+class QuotaManager:
+    def __init__(self, max_bytes: int, high_water: float = 0.9, low_water: float = 0.8) -> None:
+        if not 0 < low_water <= high_water <= 1:
+            raise ValueError("Quota water marks must satisfy 0 < low_water <= high_water <= 1.")
+        self.max_bytes = max_bytes
+        self.high_water = high_water
+        self.low_water = low_water
+        self._caches: List[Tuple[str, Any]] = []
+        self._lock = threading.Lock()
+        self._evicting = threading.Lock()
+        self._estimate = 0
+        self.relief_runs = 0
+        self.evicted_bytes: Dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def register(self, name: str, cache: Any) -> None:
+        """Track ``cache`` (anything with ``usage()`` and ``evict_bytes()``) under namespace ``name``."""
+        self._caches.append((name, cache))
+        self._caches.sort(key=lambda item: EVICTION_ORDER.index(item[0]) if item[0] in EVICTION_ORDER else -1)
+        cache.quota = self
+        with self._lock:
+            self._estimate = self.used_bytes()
+
+    @staticmethod
+    def _usage(cache: Any) -> Dict[str, Any]:
+        try:
+            return cache.usage()
+        except Exception as exc:
+            return {"error": str(exc)}
+
+    def used_bytes(self) -> int:
+        return sum(self._usage(cache).get("bytes", 0) for _, cache in self._caches)
+
+    def grew(self, nbytes: int) -> None:
+        """Called by a cache whose bytes grew by ``nbytes``; evicts once past the high-water mark."""
+        with self._lock:
+            self._estimate += nbytes
+            over = self.enabled and self._estimate >= self.max_bytes * self.high_water
+        if over:
+            self.relieve()
+
+    def shrank(self, nbytes: int) -> None:
+        """Called by a cache that freed ``nbytes`` (overwritten with less, deleted or expired)."""
+        with self._lock:
+            self._estimate = max(0, self._estimate - nbytes)
+
+    def relieve(self, force: bool = False) -> int:
+        """Evict down to the low-water mark if over the high-water mark (or unconditionally with ``force``).
+
+        Returns the bytes freed. Concurrent callers return at once while one eviction runs.
+        """
+        if not self.enabled or not self._evicting.acquire(blocking=False):
+            return 0
+        try:
+            used = self.used_bytes()
+            freed = 0
+            if force or used >= self.max_bytes * self.high_water:
+                self.relief_runs += 1
+                target = int(self.max_bytes * self.low_water)
+                for name, cache in self._caches:
+                    if used - freed <= target:
+                        break
+                    released = cache.evict_bytes(used - freed - target)
+                    self.evicted_bytes[name] = self.evicted_bytes.get(name, 0) + released
+                    freed += released
+            with self._lock:
+                self._estimate = used - freed
+            return freed
+        finally:
+            self._evicting.release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        namespaces = {name: self._usage(cache) for name, cache in self._caches}
+        used = sum(usage.get("bytes", 0) for usage in namespaces.values())
+        return {
+            "max_bytes": self.max_bytes,
+            "used_bytes": used,
+            "used_ratio": round(used / self.max_bytes, 3) if self.max_bytes else 0.0,
+            "high_water_bytes": int(self.max_bytes * self.high_water),
+            "low_water_bytes": int(self.max_bytes * self.low_water),
+            "relief_runs": self.relief_runs,
+            "evicted_bytes": dict(self.evicted_bytes),
+            "namespaces": namespaces,
+        }
+
+
+def quota_from_env(data_dir: Path, caches: Dict[str, Any]) -> QuotaManager:
+    """Quota over ``caches`` (namespace name -> cache) configured from the environment.
+
+    ``HAPPYRAV_DATA_MAX_BYTES`` sets the quota (unset: 80% of what the volume
+    allows, 0: off); ``HAPPYRAV_DATA_HIGH_WATER`` and ``HAPPYRAV_DATA_LOW_WATER``
+    are fractions of it.
+    """
+    quota = QuotaManager(
+        max_bytes=0,
+        high_water=float(os.getenv("HAPPYRAV_DATA_HIGH_WATER", "0.9")),
+        low_water=float(os.getenv("HAPPYRAV_DATA_LOW_WATER", "0.8")),
+    )
+    for name, cache in caches.items():
+        quota.register(name, cache)
+    raw: Optional[str] = os.getenv("HAPPYRAV_DATA_MAX_BYTES")
+    quota.max_bytes = int(raw) if raw else default_quota_bytes(data_dir, quota.used_bytes())
+    quota.relieve()
+    return quota
@@ -0,0 +1,233 @@
+"""Versioned on-disk encodings for cached records.
+
+Every payload starts with a small header (magic, codec id, schema version) so
+records written by any codec can be read back, and old records are upgraded
+through registered migrations instead of failing to unpickle after a model
+change. Payloads without the header are legacy pickles from before this
+format existed; they are still loaded, through the record's schema so that
+attributes added since then get their defaults.
+"""
+from __future__ import annotations
+
+import abc
+import base64
+import json
+import os
+import pickle
+import struct
+from dataclasses import is_dataclass
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+try:
+    import msgpack
+except ImportError:  # optional: pip install msgpack
+    msgpack = None
+
+MAGIC = b"HR"
+HEADER = struct.Struct(">2sBH")  # magic, codec id, schema version
+DEFAULT_FORMAT = "pickle"
+# Schema version that legacy pickles (no header) are upgraded from.
+LEGACY_VERSION = 1
+
+
+class SerializationError(ValueError):
+    pass
+
+
+def _plain_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return {"__b64__": base64.b64encode(value).decode("ascii")}
+    return _plain_default(value)
+
+
+def _json_object_hook(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1 and "__b64__" in obj:
+        return base64.b64decode(obj["__b64__"])
+    return obj
+
+
+class Codec(abc.ABC):
+    name = ""
+    codec_id = 0
+
+    @abc.abstractmethod
+    def encode(self, data: Any) -> bytes:
+        ...
+
+    @abc.abstractmethod
+    def decode(self, body: bytes) -> Any:
+        ...
+
+
+class JsonCodec(Codec):
+    name = "json"
+    codec_id = 1
+
+    def encode(self, data: Any) -> bytes:
+        # ensure_ascii keeps the C encoder's fast path; umlauts cost a few bytes each.
+        return json.dumps(data, separators=(",", ":"), default=_json_default).encode("ascii")
+
+    def decode(self, body: bytes) -> Any:
+        return json.loads(body, object_hook=_json_object_hook)
+
+
+class MsgpackCodec(Codec):
+    name = "msgpack"
+    codec_id = 2
+
+    def __init__(self) -> None:
+        if msgpack is None:
+            raise SerializationError("msgpack format selected but the msgpack package is not installed.")
+
+    def encode(self, data: Any) -> bytes:
+        return msgpack.packb(data, use_bin_type=True, default=_plain_default)
+
+    def decode(self, body: bytes) -> Any:
+        return msgpack.unpackb(body, raw=False, strict_map_key=False)
+
+
+class PickleCodec(Codec):
+    """Pickle of the plain ``to_dict`` data, not of model objects, so model changes still load."""
+
+    name = "pickle"
+    codec_id = 3
+
+    def encode(self, data: Any) -> bytes:
+        return pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def decode(self, body: bytes) -> Any:
+        return pickle.loads(body)
+
+
+CODECS: Dict[str, Type[Codec]] = {codec.name: codec for codec in (JsonCodec, MsgpackCodec, PickleCodec)}
+_CODECS_BY_ID: Dict[int, Type[Codec]] = {codec.codec_id: codec for codec in CODECS.values()}
+
+
+def cache_format(cache_name: str) -> str:
+    """Codec for ``cache_name``: ``HAPPYRAV_<NAME>_FORMAT``, else ``HAPPYRAV_CACHE_FORMAT``, else pickle."""
+    value = os.getenv(f"HAPPYRAV_{cache_name.upper()}_FORMAT") or os.getenv("HAPPYRAV_CACHE_FORMAT") or DEFAULT_FORMAT
+    value = value.strip().lower()
+    if value not in CODECS:
+        raise ValueError(f"Unknown cache format {value!r} for {cache_name}; expected one of {tuple(CODECS)}.")
+    return value
+
+
+class RecordSchema:
+    """How one record type maps to plain data, plus migrations between schema versions.
+
+    Migrations receive the plain dict written at ``from_version`` and return it
+    in the ``from_version + 1`` shape. The SQLite session store encodes each
+    column separately, so migrations must tolerate dicts that hold only some
+    of the record's attributes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        version: int,
+        to_dict: Callable[[Any], Dict[str, Any]],
+        from_dict: Callable[[Dict[str, Any]], Any],
+    ) -> None:
+        self.name = name
+        self.version = version
+        self.to_dict = to_dict
+        self.from_dict = from_dict
+        self.migrations: Dict[int, Callable[[Dict[str, Any]], Dict[str, Any]]] = {}
+
+    def migration(self, from_version: int) -> Callable:
+        def register(fn: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Callable:
+            self.migrations[from_version] = fn
+            return fn
+
+        return register
+
+    def upgrade(self, data: Dict[str, Any], version: int) -> Dict[str, Any]:
+        if version > self.version:
+            raise SerializationError(
+                f"{self.name} record has schema v{version}, newer than this build (v{self.version})."
+            )
+        while version < self.version:
+            migrate = self.migrations.get(version)
+            if migrate is None:
+                raise SerializationError(f"No migration for {self.name} records from schema v{version}.")
+            data = migrate(data)
+            version += 1
+        return data
+
+
+def model_schema(name: str, model: Type[BaseModel], version: int = 1) -> RecordSchema:
+    """Schema for a record that is a single Pydantic model."""
+    return RecordSchema(name, version, to_dict=lambda obj: obj.model_dump(), from_dict=model.model_validate)
+
+
+def is_legacy(payload: bytes) -> bool:
+    return not payload.startswith(MAGIC)
+
+
+def legacy_to_plain(value: Any) -> Any:
+    """Plain data from an object unpickled from a legacy payload.
+
+    Such objects carry only the attributes their class had when they were
+    pickled, so they are read through ``vars()`` rather than trusted as
+    instances of the current class; the schema then fills in the defaults.
+    """
+    if isinstance(value, dict):
+        return {key: legacy_to_plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [legacy_to_plain(item) for item in value]
+    if isinstance(value, BaseModel) or (is_dataclass(value) and not isinstance(value, type)):
+        return {key: legacy_to_plain(item) for key, item in vars(value).items() if not key.startswith("_")}
+    return value
+
+
+class Serializer:
+    """Encodes records for one cache with the configured codec; decodes any codec."""
+
+    def __init__(self, schema: RecordSchema, codec: str = DEFAULT_FORMAT) -> None:
+        if codec not in CODECS:
+            raise ValueError(f"Unknown cache format {codec!r}; expected one of {tuple(CODECS)}.")
+        self.schema = schema
+        self.codec = CODECS[codec]()
+        self._decoders: Dict[int, Codec] = {self.codec.codec_id: self.codec}
+
+    def encode(self, data: Any) -> bytes:
+        return HEADER.pack(MAGIC, self.codec.codec_id, self.schema.version) + self.codec.encode(data)
+
+    def decode(self, payload: bytes) -> Any:
+        """Plain data from a headered payload, upgraded to the current schema version."""
+        data, version = self._decode_raw(payload)
+        return self.schema.upgrade(data, version)
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.encode(self.schema.to_dict(obj))
+
+    def loads(self, payload: bytes) -> Any:
+        if is_legacy(payload):
+            data = legacy_to_plain(pickle.loads(payload))
+            return self.schema.from_dict(self.schema.upgrade(data, LEGACY_VERSION))
+        return self.schema.from_dict(self.decode(payload))
+
+    def _decode_raw(self, payload: bytes) -> Tuple[Any, int]:
+        if len(payload) < HEADER.size:
+            raise SerializationError("Truncated payload.")
+        _, codec_id, version = HEADER.unpack_from(payload)
+        return self._decoder(codec_id).decode(payload[HEADER.size:]), version
+
+    def _decoder(self, codec_id: int) -> Codec:
+        decoder: Optional[Codec] = self._decoders.get(codec_id)
+        if decoder is None:
+            codec = _CODECS_BY_ID.get(codec_id)
+            if codec is None:
+                raise SerializationError(f"Unknown codec id {codec_id}.")
+            decoder = self._decoders[codec_id] = codec()
+        return decoder
@@ -0,0 +1,86 @@
+"""Concurrent LLM stages with per-stage deadlines and timings.
+
+Endpoints that make several LLM calls start the independent ones as tasks and
+await each result only where it is needed, so latency follows the longest
+dependency chain instead of the sum of all calls. A stage that fails or runs
+past its deadline yields its default and the request continues with a partial
+result; every stage's outcome and duration is recorded for the response.
+
+Deadlines default to ``STAGE_TIMEOUTS`` and can be overridden per stage with
+``HAPPYRAV_STAGE_TIMEOUT_<NAME>`` (seconds).
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Dict, List, Optional
+
+STAGE_TIMEOUTS = {
+    "job_summary": 20.0,
+    "semantic_keywords": 30.0,
+    "semantic_match": 30.0,
+    "contextual_gaps": 30.0,
+    "semantic_fast": 45.0,
+    "strategic_analysis": 45.0,
+    "skill_ranking": 15.0,
+    "achievement_scoring": 15.0,
+}
+DEFAULT_STAGE_TIMEOUT = 30.0
+
+
+def stage_timeout(name: str) -> float:
+    raw = os.getenv(f"HAPPYRAV_STAGE_TIMEOUT_{name.upper()}")
+    return float(raw) if raw else STAGE_TIMEOUTS.get(name, DEFAULT_STAGE_TIMEOUT)
+
+
+class StageRun:
+    """Stages of one request. Use as ``async with``; unfinished tasks are cancelled on exit."""
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    async def run(self, name: str, awaitable: Awaitable[Any], default: Any = None, timeout: Optional[float] = None) -> Any:
+        """Await ``awaitable`` within the stage deadline; ``default`` on timeout or error."""
+        started = time.perf_counter()
+        outcome: Dict[str, Any] = {"status": "ok"}
+        try:
+            result = await asyncio.wait_for(awaitable, timeout if timeout is not None else stage_timeout(name))
+        except asyncio.TimeoutError:
+            outcome = {"status": "timeout"}
+            result = default
+            print(f"Stage {name} timed out")
+        except Exception as exc:
+            outcome = {"status": "error", "error": str(exc)[:200]}
+            result = default
+            print(f"Stage {name} failed: {exc}")
+        outcome["ms"] = round((time.perf_counter() - started) * 1000, 1)
+        self.stages[name] = outcome
+        return result
+
+    def start(self, name: str, awaitable: Awaitable[Any], default: Any = None, timeout: Optional[float] = None) -> asyncio.Task:
+        """Run the stage as a task that starts now; await the task where its result is needed."""
+        task = asyncio.ensure_future(self.run(name, awaitable, default, timeout))
+        self._tasks.append(task)
+        return task
+
+    def skip(self, name: str, task: asyncio.Task) -> None:
+        """Drop a speculatively started stage whose result turned out not to be needed."""
+        if not task.done():
+            task.cancel()
+            self.stages[name] = {"status": "skipped"}
+
+    @property
+    def partial(self) -> bool:
+        return any(stage["status"] in ("timeout", "error") for stage in self.stages.values())
+
+    async def __aenter__(self) -> "StageRun":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        pending = [task for task in self._tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
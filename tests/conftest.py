@@ -29,6 +29,11 @@ def temp_data_dir(monkeypatch) -> Generator[Path, None, None]:
     # Patch DATA_DIR before any imports happen
     from happyrav.services import cache as cache_module
     monkeypatch.setattr(cache_module, "DATA_DIR", temp_dir)
+    # Mocked LLM responses must not be served from the response cache to later tests.
+    from happyrav.services import llm_cache, llm_scheduler
+    monkeypatch.setattr(llm_cache, "response_cache", None)
+    # Each test starts with unthrottled provider schedulers configured from its own env.
+    monkeypatch.setattr(llm_scheduler, "schedulers", {})
 
     yield temp_dir
 
@@ -46,10 +51,11 @@ def test_client(temp_data_dir: Path) -> TestClient:
 
     # Import app AFTER patching DATA_DIR
     from happyrav import main
-    from happyrav.services.cache import SessionCache, ArtifactCache, DocumentCache
+    from happyrav.services.cache import ArtifactCache, DocumentCache, create_session_cache
 
     # Reinitialize caches with new temp directory
-    main.session_cache = SessionCache(ttl_seconds=3600)
+    # (HAPPYRAV_SESSION_BACKEND=sqlite runs the suite against the SQLite store)
+    main.session_cache = create_session_cache(ttl_seconds=3600)
     main.artifact_cache = ArtifactCache()
     main.document_cache = DocumentCache()
 
@@ -0,0 +1,128 @@
+"""Tests for content-addressed PDF/HTML storage behind ArtifactCache and MonsterCache."""
+import time
+
+from happyrav.models import (
+    ArtifactRecord,
+    ComparisonSection,
+    MatchPayload,
+    MonsterArtifactRecord,
+    MonsterCVProfile,
+)
+from happyrav.services.cache import ArtifactCache, BlobStore, MonsterCache
+
+
+def _artifact(cache: ArtifactCache, pdf: bytes = b"%PDF-1.4 cv", html: str = "<html>CV</html>") -> ArtifactRecord:
+    return ArtifactRecord(
+        token=cache.create_token(),
+        filename_cv="CV_Test.pdf",
+        cv_pdf_bytes=pdf,
+        cv_html=html,
+        match=MatchPayload(overall_score=80.0),
+        expires_at=time.time() + cache.ttl_seconds,
+        comparison_sections=[ComparisonSection(label_en="Summary", label_de="Kurzprofil", original="a", optimized="b")],
+    )
+
+
+class TestBlobStore:
+    def test_identical_payloads_stored_once(self, temp_data_dir):
+        blobs = BlobStore(ttl_seconds=3600)
+        first = blobs.put(b"same bytes")
+        second = blobs.put(b"same bytes")
+        assert first == second
+        assert len([p for p in (temp_data_dir / "blobs").rglob("*") if p.is_file()]) == 1
+        assert blobs.get(first) == b"same bytes"
+
+    def test_sweep_keeps_recently_reput_blob(self, temp_data_dir):
+        blobs = BlobStore(ttl_seconds=60)
+        digest = blobs.put(b"pdf")
+        assert blobs.sweep(now=time.time() + 30) == 0
+        assert blobs.sweep(now=time.time() + 61) == 1
+        assert not blobs.exists(digest)
+
+
+class TestArtifactBlobs:
+    def test_record_on_disk_holds_only_digests(self, temp_data_dir):
+        cache = ArtifactCache(ttl_seconds=3600)
+        record = _artifact(cache)
+        cache.set(record)
+
+        stored = cache._serializer.loads(cache._path(record.token).read_bytes())
+        assert stored.cv_pdf_bytes == b""
+        assert stored.cv_html == ""
+        assert cache.read_blob(stored.cv_pdf_hash) == b"%PDF-1.4 cv"
+
+    def test_refinements_share_identical_pdf(self, temp_data_dir):
+        cache = ArtifactCache(ttl_seconds=3600)
+        first = _artifact(cache, html="<html>v1</html>")
+        second = _artifact(cache, html="<html>v2</html>")
+        cache.set(first)
+        cache.set(second)
+        assert cache.get(first.token).cv_pdf_hash == cache.get(second.token).cv_pdf_hash
+        # one shared PDF + two HTML versions
+        assert len([p for p in (temp_data_dir / "blobs").rglob("*") if p.is_file()]) == 3
+
+    def test_get_without_html_skips_blob_reads(self, temp_data_dir, monkeypatch):
+        cache = ArtifactCache(ttl_seconds=3600)
+        record = _artifact(cache)
+        cache.set(record)
+
+        def _no_read(self, digest):
+            raise AssertionError("blob read for metadata-only lookup")
+
+        monkeypatch.setattr(BlobStore, "get", _no_read)
+        loaded = cache.get(record.token, include_html=False)
+        assert loaded.comparison_sections[0].label_en == "Summary"
+
+    def test_get_hydrates_html_by_default(self, temp_data_dir):
+        cache = ArtifactCache(ttl_seconds=3600)
+        record = _artifact(cache)
+        cache.set(record)
+        assert cache.get(record.token).cv_html == "<html>CV</html>"
+
+
+class TestDownloads:
+    def test_download_serves_pdf_file(self, test_client):
+        from happyrav import main
+
+        record = _artifact(main.artifact_cache)
+        main.artifact_cache.set(record)
+
+        resp = test_client.get(f"/download/{record.token}/cv")
+        assert resp.status_code == 200
+        assert resp.content == b"%PDF-1.4 cv"
+        assert resp.headers["content-type"] == "application/pdf"
+        assert 'filename="CV_Test.pdf"' in resp.headers["content-disposition"]
+
+    def test_download_missing_cover_returns_404(self, test_client):
+        from happyrav import main
+
+        record = _artifact(main.artifact_cache)
+        main.artifact_cache.set(record)
+        assert test_client.get(f"/download/{record.token}/cover").status_code == 404
+
+    def test_comparison_endpoint(self, test_client):
+        from happyrav import main
+
+        record = _artifact(main.artifact_cache)
+        main.artifact_cache.set(record)
+        resp = test_client.get(f"/api/result/{record.token}/comparison")
+        assert resp.json()["sections"][0]["optimized"] == "b"
+
+    def test_monster_download_serves_pdf_file(self, test_client):
+        from happyrav import main
+
+        main.monster_cache = MonsterCache(ttl_seconds=7200)
+        record = MonsterArtifactRecord(
+            token=main.monster_cache.create_token(),
+            filename="MonsterCV_Test.pdf",
+            pdf_bytes=b"%PDF monster",
+            html="<html>timeline</html>",
+            timeline=MonsterCVProfile(),
+            expires_at=time.time() + 7200,
+        )
+        main.monster_cache.set(record)
+
+        resp = test_client.get(f"/download/monster/{record.token}")
+        assert resp.status_code == 200
+        assert resp.content == b"%PDF monster"
+        assert main.monster_cache.get(record.token).html == "<html>timeline</html>"
@@ -0,0 +1,170 @@
+"""Tests for the session -> artifact index maintained by ArtifactCache."""
+import time
+from unittest.mock import AsyncMock
+
+from happyrav.models import ArtifactRecord, GeneratedContent, MatchPayload
+from happyrav.services.cache import ArtifactCache
+
+
+def _artifact(cache: ArtifactCache, session_id: str, filename: str = "CV.pdf") -> ArtifactRecord:
+    return ArtifactRecord(
+        token=cache.create_token(),
+        filename_cv=filename,
+        cv_pdf_bytes=b"%PDF-1.4 cv",
+        cv_html="<html>CV</html>",
+        match=MatchPayload(overall_score=80.0),
+        expires_at=time.time() + cache.ttl_seconds,
+        meta={"session_id": session_id},
+    )
+
+
+class TestSessionIndex:
+    def test_latest_follows_creation_order(self, temp_data_dir):
+        cache = ArtifactCache(ttl_seconds=3600)
+        first = _artifact(cache, "s1")
+        second = _artifact(cache, "s1")
+        other = _artifact(cache, "s2")
+        for record in (first, second, other):
+            cache.set(record)
+
+        assert cache.latest_for_session("s1") == second.token
+        assert cache.tokens_for_session("s1") == [first.token, second.token]
+        assert cache.latest_for_session("missing") is None
+
+    def test_resaving_does_not_reorder(self, temp_data_dir):
+        cache = ArtifactCache(ttl_seconds=3600)
+        first = _artifact(cache, "s1")
+        second = _artifact(cache, "s1")
+        cache.set(first)
+        cache.set(second)
+        cache.set(first)
+        assert cache.latest_for_session("s1") == second.token
+
+    def test_expired_artifacts_leave_index(self, temp_data_dir):
+        cache = ArtifactCache(ttl_seconds=60)
+        record = _artifact(cache, "s1")
+        cache.set(record)
+
+        assert cache.sweep(now=time.time() + 120) == 1
+        assert cache.latest_for_session("s1") is None
+        assert not cache._index_path("s1").exists()
+
+    def test_delete_falls_back_to_previous(self, temp_data_dir):
+        cache = ArtifactCache(ttl_seconds=3600)
+        first = _artifact(cache, "s1")
+        second = _artifact(cache, "s1")
+        cache.set(first)
+        cache.set(second)
+        cache.delete(second.token)
+        assert cache.latest_for_session("s1") == first.token
+
+    def test_index_rebuilt_on_restart(self, temp_data_dir):
+        cache1 = ArtifactCache(ttl_seconds=3600)
+        first = _artifact(cache1, "s1")
+        cache1.set(first)
+        time.sleep(0.01)
+        second = _artifact(cache1, "s1")
+        cache1.set(second)
+
+        cache2 = ArtifactCache(ttl_seconds=3600)
+        assert cache2.tokens_for_session("s1") == [first.token, second.token]
+
+    def test_legacy_artifacts_are_indexed_on_startup(self, temp_data_dir):
+        cache1 = ArtifactCache(ttl_seconds=3600)
+        record = _artifact(cache1, "s1")
+        cache1.set(record)
+        cache1._index_path("s1").unlink()
+
+        assert ArtifactCache(ttl_seconds=3600).latest_for_session("s1") == record.token
+
+    def test_workers_see_each_others_artifacts(self, temp_data_dir):
+        worker_a = ArtifactCache(ttl_seconds=3600)
+        worker_b = ArtifactCache(ttl_seconds=3600)
+        first = _artifact(worker_a, "s1")
+        worker_a.set(first)
+        assert worker_b.latest_for_session("s1") == first.token
+
+        second = _artifact(worker_b, "s1")
+        worker_b.set(second)
+        assert worker_a.tokens_for_session("s1") == [first.token, second.token]
+
+        worker_b.delete(second.token)
+        assert worker_a.latest_for_session("s1") == first.token
+
+
+class TestGenerateCoverUsesIndex:
+    def test_cover_attaches_to_latest_cv(self, test_client, monkeypatch):
+        from happyrav import main
+
+        resp = test_client.post(
+            "/api/session/start",
+            json={"language": "en", "company_name": "TestCo", "position_title": "Engineer", "consent_confirmed": True},
+        )
+        session_id = resp.json()["session_id"]
+        old = _artifact(main.artifact_cache, session_id)
+        latest = _artifact(main.artifact_cache, session_id, filename="CV_refined.pdf")
+        main.artifact_cache.set(old)
+        main.artifact_cache.set(latest)
+
+        generated = GeneratedContent(
+            summary="Summary",
+            cover_greeting="Dear team",
+            cover_opening="Opening",
+            cover_body=["Body"],
+            cover_closing="Regards",
+        )
+        monkeypatch.setattr(main, "has_api_key", lambda: True)
+        monkeypatch.setattr(main, "generate_content", AsyncMock(return_value=(generated, None)))
+        monkeypatch.setattr(main, "render_pdf", lambda html: b"%PDF cover")
+
+        resp = test_client.post(f"/api/session/{session_id}/generate-cover", json={})
+        assert resp.status_code == 200
+        assert resp.json()["token"] == latest.token
+        updated = main.artifact_cache.get(latest.token)
+        assert main.artifact_cache.read_blob(updated.cover_pdf_hash) == b"%PDF cover"
+        assert updated.filename_cv == "CV_refined.pdf"
+
+    def test_failed_cover_render_drops_the_previous_pdf(self, test_client, monkeypatch):
+        from happyrav import main
+
+        resp = test_client.post(
+            "/api/session/start",
+            json={"language": "en", "company_name": "TestCo", "position_title": "Engineer", "consent_confirmed": True},
+        )
+        session_id = resp.json()["session_id"]
+        artifact = _artifact(main.artifact_cache, session_id)
+        main.artifact_cache.set(artifact)
+        generated = GeneratedContent(
+            summary="Summary", cover_greeting="Dear team", cover_opening="Opening", cover_closing="Regards"
+        )
+        monkeypatch.setattr(main, "has_api_key", lambda: True)
+        monkeypatch.setattr(main, "generate_content", AsyncMock(return_value=(generated, None)))
+        monkeypatch.setattr(main, "render_pdf", lambda html: b"%PDF cover")
+        assert test_client.post(f"/api/session/{session_id}/generate-cover", json={}).status_code == 200
+        assert test_client.get(f"/download/{artifact.token}/cover").status_code == 200
+
+        def broken_render(html):
+            raise RuntimeError("renderer crashed")
+
+        monkeypatch.setattr(main, "render_pdf", broken_render)
+        generated.cover_opening = "Second opening"
+        resp = test_client.post(f"/api/session/{session_id}/generate-cover", json={})
+        assert resp.status_code == 200
+        assert "Second opening" in resp.json()["cover_html"]
+        assert test_client.get(f"/download/{artifact.token}/cover").status_code == 404
+
+    def test_cover_without_cv_returns_404(self, test_client, monkeypatch):
+        from happyrav import main
+
+        resp = test_client.post(
+            "/api/session/start",
+            json={"language": "en", "company_name": "TestCo", "position_title": "Engineer", "consent_confirmed": True},
+        )
+        session_id = resp.json()["session_id"]
+        generated = GeneratedContent(summary="", cover_greeting="", cover_opening="", cover_closing="")
+        monkeypatch.setattr(main, "has_api_key", lambda: True)
+        monkeypatch.setattr(main, "generate_content", AsyncMock(return_value=(generated, None)))
+        monkeypatch.setattr(main, "render_pdf", lambda html: b"%PDF cover")
+
+        resp = test_client.post(f"/api/session/{session_id}/generate-cover", json={})
+        assert resp.status_code == 404
@@ -0,0 +1,98 @@
+"""Tests for the awaitable cache API used by the FastAPI handlers."""
+import threading
+import time
+
+import pytest
+
+from happyrav.models import ArtifactRecord, MatchPayload, SessionState
+from happyrav.services.cache import ArtifactCache, DocumentCache, SessionCache, SessionRecord, SqliteSessionCache
+
+
+def _record(cache) -> SessionRecord:
+    session_id = cache.create_session_id()
+    now = time.time()
+    state = SessionState(session_id=session_id, created_at=now, expires_at=now + cache.ttl_seconds)
+    return SessionRecord(state=state, document_texts={"doc": "CV text"})
+
+
+class TestAsyncSessionAPI:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("cache_cls", [SessionCache, SqliteSessionCache])
+    async def test_round_trip(self, temp_data_dir, cache_cls):
+        cache = cache_cls(ttl_seconds=3600)
+        record = _record(cache)
+        await cache.aset(record)
+
+        loaded = await cache.aget(record.state.session_id)
+        assert loaded.document_texts == {"doc": "CV text"}
+
+        touched = await cache.atouch(record.state.session_id)
+        assert touched.state.expires_at >= record.state.expires_at
+
+        await cache.adelete(record.state.session_id)
+        assert await cache.aget(record.state.session_id) is None
+
+    @pytest.mark.asyncio
+    async def test_io_runs_off_the_event_loop(self, temp_data_dir, monkeypatch):
+        cache = SessionCache(ttl_seconds=3600)
+        loop_thread = threading.get_ident()
+        seen = []
+        original = SessionCache.set
+
+        def _recording_set(self, record, fields=None):
+            seen.append(threading.get_ident())
+            return original(self, record, fields)
+
+        monkeypatch.setattr(SessionCache, "set", _recording_set)
+        await cache.aset(_record(cache), fields=("state",))
+        assert seen and seen[0] != loop_thread
+
+
+class TestAsyncArtifactAPI:
+    @pytest.mark.asyncio
+    async def test_artifact_and_blob_reads(self, temp_data_dir):
+        cache = ArtifactCache(ttl_seconds=3600)
+        record = ArtifactRecord(
+            token=cache.create_token(),
+            filename_cv="CV.pdf",
+            cv_pdf_bytes=b"%PDF",
+            cv_html="<html>CV</html>",
+            match=MatchPayload(overall_score=80.0),
+            expires_at=time.time() + 3600,
+        )
+        await cache.aset(record)
+        loaded = await cache.aget(record.token, include_html=False)
+        assert loaded.cv_html == ""
+        assert await cache.aread_blob(loaded.cv_pdf_hash) == b"%PDF"
+
+    @pytest.mark.asyncio
+    async def test_latest_for_session_runs_off_the_event_loop(self, temp_data_dir, monkeypatch):
+        cache = ArtifactCache(ttl_seconds=3600)
+        record = ArtifactRecord(
+            token=cache.create_token(),
+            filename_cv="CV.pdf",
+            cv_html="<html>CV</html>",
+            match=MatchPayload(overall_score=80.0),
+            expires_at=time.time() + 3600,
+            meta={"session_id": "s1"},
+        )
+        await cache.aset(record)
+        loop_thread = threading.get_ident()
+        seen = []
+        original = ArtifactCache.tokens_for_session
+
+        def _recording_tokens(self, session_id):
+            seen.append(threading.get_ident())
+            return original(self, session_id)
+
+        monkeypatch.setattr(ArtifactCache, "tokens_for_session", _recording_tokens)
+        assert await cache.alatest_for_session("s1") == record.token
+        assert seen and seen[0] != loop_thread
+
+    @pytest.mark.asyncio
+    async def test_document_cache(self, temp_data_dir):
+        cache = DocumentCache()
+        await cache.aset("abc", {"text": "hello"})
+        assert await cache.aget("abc") == {"text": "hello"}
+        await cache.adelete("abc")
+        assert await cache.aget("abc") is None
@@ -0,0 +1,164 @@
+"""Tests for the cache expiry index and background sweeper."""
+import asyncio
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from happyrav.models import MonsterArtifactRecord, MonsterCVProfile, SessionState
+from happyrav.services.cache import (
+    ArtifactCache,
+    ExpiryIndex,
+    MonsterCache,
+    SessionCache,
+    SessionRecord,
+    run_sweeper,
+)
+
+
+def _session(cache: SessionCache) -> SessionRecord:
+    session_id = cache.create_session_id()
+    now = time.time()
+    state = SessionState(session_id=session_id, created_at=now, expires_at=now + cache.ttl_seconds)
+    return SessionRecord(state=state)
+
+
+def _monster(cache: MonsterCache) -> MonsterArtifactRecord:
+    return MonsterArtifactRecord(
+        token=cache.create_token(),
+        filename="MonsterCV.pdf",
+        pdf_bytes=b"%PDF",
+        html="<html></html>",
+        timeline=MonsterCVProfile(),
+        expires_at=time.time() + cache.ttl_seconds,
+    )
+
+
+class TestExpiryIndex:
+    def test_pop_expired_returns_only_due_keys(self):
+        index = ExpiryIndex()
+        index.schedule("a", 10.0)
+        index.schedule("b", 20.0)
+        assert index.pop_expired(now=15.0) == ["a"]
+        assert "a" not in index
+        assert "b" in index
+
+    def test_reschedule_invalidates_old_deadline(self):
+        index = ExpiryIndex()
+        index.schedule("a", 10.0)
+        index.schedule("a", 30.0)
+        assert index.pop_expired(now=15.0) == []
+        assert index.deadline("a") == 30.0
+
+    def test_discard_removes_key(self):
+        index = ExpiryIndex()
+        index.schedule("a", 10.0)
+        index.discard("a")
+        assert index.pop_expired(now=100.0) == []
+        assert len(index) == 0
+
+
+class TestCacheExpiry:
+    def test_request_path_does_not_scan_directory(self, temp_data_dir, monkeypatch):
+        """After startup, get/set must only touch the file they need."""
+        cache = SessionCache(ttl_seconds=3600)
+
+        def _no_glob(self, pattern):
+            raise AssertionError(f"directory scanned on request path: {pattern}")
+
+        monkeypatch.setattr(Path, "glob", _no_glob)
+        record = _session(cache)
+        cache.set(record)
+        assert cache.get(record.state.session_id) is not None
+        assert cache.touch(record.state.session_id) is not None
+
+    def test_index_rebuilt_from_existing_files(self, temp_data_dir):
+        cache1 = SessionCache(ttl_seconds=3600)
+        record = _session(cache1)
+        cache1.set(record)
+
+        cache2 = SessionCache(ttl_seconds=3600)
+        assert record.state.session_id in cache2._expiry
+        assert cache2.get(record.state.session_id) is not None
+
+    def test_stale_file_at_startup_is_treated_as_expired(self, temp_data_dir):
+        cache1 = SessionCache(ttl_seconds=60)
+        record = _session(cache1)
+        cache1.set(record)
+        path = cache1._path(record.state.session_id)
+        old = time.time() - 120
+        os.utime(path, (old, old))
+
+        cache2 = SessionCache(ttl_seconds=60)
+        assert cache2.get(record.state.session_id) is None
+        assert not path.exists()
+
+    def test_sweep_removes_expired_files(self, temp_data_dir):
+        cache = SessionCache(ttl_seconds=60)
+        record = _session(cache)
+        cache.set(record)
+        path = cache._path(record.state.session_id)
+
+        assert cache.sweep(now=time.time() + 30) == 0
+        assert path.exists()
+        assert cache.sweep(now=time.time() + 61) == 1
+        assert not path.exists()
+
+    def test_sweep_keeps_entries_another_worker_refreshed(self, temp_data_dir):
+        worker_a = SessionCache(ttl_seconds=60)
+        worker_b = SessionCache(ttl_seconds=60)
+        record = _session(worker_a)
+        worker_a.set(record)
+        session_id = record.state.session_id
+        started = time.time()
+        assert worker_b.touch(session_id) is not None
+        touched = started + 30  # worker B's touch, as seen from worker A's clock below
+        os.utime(worker_a._path(session_id), (touched, touched))
+
+        assert worker_a.sweep(now=started + 61) == 0
+        assert worker_a._path(session_id).exists()
+        assert worker_a._expiry.deadline(session_id) == pytest.approx(touched + 60)
+        assert worker_a.sweep(now=touched + 61) == 1
+        assert worker_b.get(session_id) is None
+
+    def test_read_keeps_entries_another_worker_refreshed(self, temp_data_dir):
+        worker_a = SessionCache(ttl_seconds=60)
+        worker_b = SessionCache(ttl_seconds=60)
+        record = _session(worker_a)
+        worker_a.set(record)
+        session_id = record.state.session_id
+        worker_a._expiry.schedule(session_id, time.time() - 1)  # A's deadline passed while B kept touching
+
+        assert worker_b.touch(session_id) is not None
+        assert worker_a.get(session_id) is not None
+        assert worker_b.get(session_id) is not None
+
+    def test_artifact_index_ignores_monster_files(self, temp_data_dir):
+        monster_cache = MonsterCache(ttl_seconds=7200)
+        monster = _monster(monster_cache)
+        monster_cache.set(monster)
+
+        artifact_cache = ArtifactCache(ttl_seconds=60)
+        assert len(artifact_cache._expiry) == 0
+        artifact_cache.sweep(now=time.time() + 120)
+        assert monster_cache.get(monster.token) is not None
+
+
+class TestSweeper:
+    @pytest.mark.asyncio
+    async def test_sweeper_evicts_on_schedule(self, temp_data_dir):
+        cache = SessionCache(ttl_seconds=0)
+        record = _session(cache)
+        cache.set(record)
+        path = cache._path(record.state.session_id)
+
+        task = asyncio.create_task(run_sweeper([cache], interval_seconds=0.01))
+        try:
+            for _ in range(100):
+                if not path.exists():
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            task.cancel()
+        assert not path.exists()
@@ -0,0 +1,162 @@
+"""Tests for per-namespace storage: separate directories, TTLs, budgets and sweep schedules."""
+import asyncio
+import os
+import time
+
+import pytest
+
+from happyrav.models import MonsterArtifactRecord, MonsterCVProfile, SessionState
+from happyrav.services import cache as cache_module
+from happyrav.services.cache import (
+    ArtifactCache,
+    BlobStore,
+    DocumentCache,
+    ExpiryIndex,
+    MonsterCache,
+    SessionCache,
+    SessionRecord,
+    namespace,
+    run_sweeper,
+)
+
+
+def _session(cache: SessionCache) -> SessionRecord:
+    now = time.time()
+    state = SessionState(session_id=cache.create_session_id(), created_at=now, expires_at=now + cache.ttl_seconds)
+    return SessionRecord(state=state, document_texts={"d1": "x" * 500})
+
+
+def _monster(cache: MonsterCache) -> MonsterArtifactRecord:
+    return MonsterArtifactRecord(
+        token=cache.create_token(),
+        filename="MonsterCV.pdf",
+        pdf_bytes=b"%PDF",
+        html="<html></html>",
+        timeline=MonsterCVProfile(),
+        expires_at=time.time() + cache.ttl_seconds,
+    )
+
+
+class TestNamespaceSettings:
+    def test_env_overrides_defaults(self, monkeypatch):
+        monkeypatch.setenv("HAPPYRAV_MONSTER_TTL", "60")
+        monkeypatch.setenv("HAPPYRAV_MONSTER_MAX_BYTES", "1000")
+        monkeypatch.setenv("HAPPYRAV_MONSTER_SWEEP_INTERVAL", "5")
+        ns = namespace("monster", ttl_seconds=7200)
+        assert (ns.ttl_seconds, ns.max_bytes, ns.sweep_interval) == (60, 1000, 5.0)
+        assert namespace("artifact", ttl_seconds=3600, max_bytes=0).max_bytes == 0
+
+    def test_for_namespace_applies_settings(self, temp_data_dir):
+        ns = namespace("session", ttl_seconds=123, max_bytes=4096)
+        cache = SessionCache.for_namespace(ns)
+        assert cache.ttl_seconds == 123
+        assert cache.usage()["max_bytes"] == 4096
+        assert cache.sweep_interval == ns.sweep_interval
+
+
+class TestSeparateDirectories:
+    def test_monster_records_have_their_own_directory(self, temp_data_dir):
+        monster_cache = MonsterCache(ttl_seconds=7200)
+        monster_cache.set(_monster(monster_cache))
+        assert list((cache_module.DATA_DIR / "monster").glob("*.pkl"))
+        assert not list((cache_module.DATA_DIR / "artifacts").glob("*.pkl"))
+
+    def test_legacy_monster_files_are_moved(self, temp_data_dir):
+        old = MonsterCache(ttl_seconds=7200)
+        record = _monster(old)
+        old.set(record)
+        legacy_dir = cache_module.DATA_DIR / "artifacts"
+        legacy_dir.mkdir(parents=True, exist_ok=True)
+        os.replace(old._path(record.token), legacy_dir / f"monster_{record.token}.pkl")
+
+        artifacts = ArtifactCache(ttl_seconds=60)
+        assert len(artifacts._expiry) == 0
+        migrated = MonsterCache(ttl_seconds=7200)
+        assert migrated.get(record.token) is not None
+        assert not list(legacy_dir.glob("monster_*.pkl"))
+
+    def test_short_artifact_ttl_does_not_sweep_monster(self, temp_data_dir):
+        monster_cache = MonsterCache(ttl_seconds=7200)
+        record = _monster(monster_cache)
+        monster_cache.set(record)
+        ArtifactCache(ttl_seconds=1).sweep(now=time.time() + 60)
+        assert monster_cache.get(record.token) is not None
+
+
+class TestSizeBudget:
+    def test_entries_nearest_expiry_are_evicted(self, temp_data_dir):
+        cache = SessionCache(ttl_seconds=3600)
+        first, second, third = (_session(cache) for _ in range(3))
+        cache.set(first)
+        entry_bytes = cache.usage()["bytes"]
+        cache._budget.max_bytes = entry_bytes * 2 + entry_bytes // 2
+        cache.set(second)
+        cache.set(third)
+
+        assert cache.get(first.state.session_id) is None
+        assert cache.get(second.state.session_id) is not None
+        assert cache.get(third.state.session_id) is not None
+        usage = cache.usage()
+        assert usage["evictions"] == 1
+        assert usage["entries"] == 2
+        assert usage["bytes"] <= usage["max_bytes"]
+
+    def test_budget_enforced_on_startup(self, temp_data_dir):
+        cache = SessionCache(ttl_seconds=3600)
+        for _ in range(4):
+            cache.set(_session(cache))
+        restarted = SessionCache(ttl_seconds=3600, max_bytes=cache.usage()["bytes"] // 2 + 16)
+        assert restarted.usage()["entries"] == 2
+
+    def test_blob_budget(self, temp_data_dir):
+        blobs = BlobStore(ttl_seconds=3600, max_bytes=250)
+        old = blobs.put(b"a" * 100)
+        blobs.put(b"b" * 100)
+        newest = blobs.put(b"c" * 100)
+        assert not blobs.exists(old)
+        assert blobs.exists(newest)
+        assert blobs.usage()["bytes"] == 200
+
+    def test_pop_earliest_skips_kept_key(self):
+        index = ExpiryIndex()
+        index.schedule("a", 1)
+        index.schedule("b", 2)
+        assert index.pop_earliest(keep="a") == "b"
+        assert index.pop_earliest(keep="a") is None
+        assert "a" in index
+
+
+class TestSweepSchedules:
+    def test_document_cache_sweeps_idle_entries(self, temp_data_dir):
+        cache = DocumentCache(ttl_seconds=60)
+        idle, used = DocumentCache.content_key(b"idle"), DocumentCache.content_key(b"used")
+        cache.set(idle, {"text": "a"})
+        cache.set(used, {"text": "b"})
+        past = time.time() - 120
+        os.utime(cache._path(idle), (past, past))
+        assert cache.sweep() == 1
+        assert cache.get(idle) is None
+        assert cache.get(used) is not None
+
+    @pytest.mark.asyncio
+    async def test_each_cache_sweeps_on_its_own_interval(self):
+        class _Counting:
+            def __init__(self, interval):
+                self.sweep_interval = interval
+                self.sweeps = 0
+
+            def sweep(self):
+                self.sweeps += 1
+                return 0
+
+        fast, slow = _Counting(0.01), _Counting(10)
+        task = asyncio.create_task(run_sweeper([fast, slow]))
+        try:
+            for _ in range(200):
+                if fast.sweeps >= 3:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            task.cancel()
+        assert fast.sweeps >= 3
+        assert slow.sweeps == 0
@@ -0,0 +1,157 @@
+"""Tests for transparent compression of document texts and HTML blobs."""
+import time
+
+import pytest
+
+from happyrav.models import ArtifactRecord, MatchPayload, SessionState
+from happyrav.services import cache as cache_module
+from happyrav.services import compression
+from happyrav.services.cache import ArtifactCache, SessionCache, SessionRecord, SqliteSessionCache
+from happyrav.services.compression import Compressor, LazyTexts
+
+LONG_TEXT = "Led the platform team and reduced latency by 40 percent.\n" * 400
+
+
+@pytest.fixture
+def inflate_counter(monkeypatch):
+    calls = []
+    original = compression.decompress
+
+    def _counting(frame):
+        calls.append(len(frame))
+        return original(frame)
+
+    monkeypatch.setattr(compression, "decompress", _counting)
+    return calls
+
+
+def _record(cache) -> SessionRecord:
+    session_id = cache.create_session_id()
+    now = time.time()
+    state = SessionState(session_id=session_id, created_at=now, expires_at=now + cache.ttl_seconds)
+    return SessionRecord(state=state, document_texts={"cv": LONG_TEXT, "note": "short"})
+
+
+class TestCompressor:
+    def test_small_values_are_left_alone(self):
+        assert Compressor(min_bytes=4096).compress(b"x" * 100) is None
+
+    def test_round_trip_and_stats(self):
+        before = compression.stats.snapshot()["compressed"]
+        frame = Compressor(min_bytes=16).compress(LONG_TEXT.encode())
+        assert len(frame) < len(LONG_TEXT) / 10
+        assert compression.decompress(frame) == LONG_TEXT.encode()
+        snapshot = compression.stats.snapshot()
+        assert snapshot["compressed"] == before + 1
+        assert snapshot["ratio"] > 1
+
+    def test_disabled(self):
+        assert Compressor(algorithm="off").compress(LONG_TEXT.encode()) is None
+
+    def test_unknown_algorithm_rejected(self):
+        with pytest.raises(ValueError):
+            Compressor(algorithm="lz4")
+
+
+class TestLazySessionTexts:
+    @pytest.mark.parametrize("cache_cls", [SessionCache, SqliteSessionCache])
+    def test_reading_state_does_not_inflate(self, temp_data_dir, inflate_counter, cache_cls):
+        cache = cache_cls(ttl_seconds=3600)
+        record = _record(cache)
+        cache.set(record)
+
+        loaded = cache.touch(record.state.session_id)
+        assert isinstance(loaded.document_texts, LazyTexts)
+        assert loaded.state.session_id == record.state.session_id
+        assert list(loaded.document_texts) == ["cv", "note"]
+        assert inflate_counter == []
+
+        assert loaded.document_texts["cv"] == LONG_TEXT
+        assert loaded.document_texts.get("note") == "short"
+        assert len(inflate_counter) == 1
+
+    def test_stored_file_is_smaller_than_text(self, temp_data_dir):
+        cache = SessionCache(ttl_seconds=3600)
+        record = _record(cache)
+        cache.set(record)
+        assert cache._path(record.state.session_id).stat().st_size < len(LONG_TEXT) / 5
+
+    def test_resave_reuses_frames(self, temp_data_dir, monkeypatch):
+        cache = SessionCache(ttl_seconds=3600)
+        record = _record(cache)
+        cache.set(record)
+        loaded = cache.get(record.state.session_id)
+        _ = loaded.document_texts["cv"]
+
+        original = Compressor.compress
+
+        def _no_recompress(self, data):
+            if len(data) >= self.min_bytes:
+                raise AssertionError("unchanged document recompressed")
+            return original(self, data)
+
+        monkeypatch.setattr(Compressor, "compress", _no_recompress)
+        loaded.state.answers["q1"] = "yes"
+        cache.set(loaded)
+        assert cache.get(record.state.session_id).document_texts["cv"] == LONG_TEXT
+
+    def test_new_documents_are_added_to_lazy_mapping(self, temp_data_dir):
+        cache = SessionCache(ttl_seconds=3600)
+        record = _record(cache)
+        cache.set(record)
+        loaded = cache.get(record.state.session_id)
+        loaded.document_texts["letter"] = LONG_TEXT.upper()
+        cache.set(loaded)
+        stored = cache.get(record.state.session_id).document_texts
+        assert stored["letter"] == LONG_TEXT.upper()
+        assert stored["cv"] == LONG_TEXT
+
+    def test_compression_off(self, temp_data_dir, monkeypatch):
+        monkeypatch.setattr(cache_module, "COMPRESSOR", Compressor(algorithm="off"))
+        cache = SessionCache(ttl_seconds=3600)
+        record = _record(cache)
+        cache.set(record)
+        assert cache._path(record.state.session_id).stat().st_size > len(LONG_TEXT)
+
+
+class TestCompressedBlobs:
+    def test_html_blob_is_compressed_and_pdf_is_not(self, temp_data_dir):
+        cache = ArtifactCache(ttl_seconds=3600)
+        html = "<html><body>" + "<p>Experience</p>" * 2000 + "</body></html>"
+        record = ArtifactRecord(
+            token=cache.create_token(),
+            filename_cv="CV.pdf",
+            cv_pdf_bytes=b"%PDF-1.4 " + b"0" * 8000,
+            cv_html=html,
+            match=MatchPayload(overall_score=80.0),
+            expires_at=time.time() + 3600,
+        )
+        cache.set(record)
+        stored = cache.get(record.token, include_html=False)
+
+        assert cache.blobs.path(stored.cv_html_hash).stat().st_size < len(html) / 10
+        assert cache.blob_path(stored.cv_pdf_hash).read_bytes().startswith(b"%PDF")
+        assert cache.get(record.token).cv_html == html
+
+
+class TestSessionEndpoints:
+    def test_answer_and_state_do_not_inflate_documents(self, test_client, inflate_counter, monkeypatch):
+        from happyrav import main
+
+        async def _extract(language, documents, doc_tags=None):
+            return None, "", {}
+
+        monkeypatch.setattr(main, "extract_profile_from_documents", _extract)
+        session_id = test_client.post("/api/session/start", json={"language": "en"}).json()["session_id"]
+        for text in (LONG_TEXT, "Jane Doe\njane@example.com\n" + LONG_TEXT.upper()):
+            assert test_client.post(f"/api/session/{session_id}/paste", json={"text": text}).status_code == 200
+
+        inflate_counter.clear()
+        assert test_client.post(f"/api/session/{session_id}/answer", json={"answers": {"q": "a"}}).status_code == 200
+        state = test_client.get(f"/api/session/{session_id}/state").json()["state"]
+        assert inflate_counter == []
+        assert state["profile"]["email"] == "jane@example.com"
+
+        record = main.session_cache.get(session_id)
+        assert record.document_texts[state["documents"][0]["doc_id"]] == LONG_TEXT.strip()
+        assert len(inflate_counter) == 1
@@ -0,0 +1,122 @@
+"""Tests for the sharded, size-bounded DocumentCache."""
+import hashlib
+import json
+import os
+import time
+
+from happyrav.services import cache as cache_module
+from happyrav.services.cache import DocumentCache
+
+
+def _payload(text: str, parse_method: str = "pdf_text", size_bytes: int = 1000) -> dict:
+    return {"text": text, "parse_method": parse_method, "confidence": 0.9, "size_bytes": size_bytes}
+
+
+class TestLayout:
+    def test_key_is_blake2b_of_content(self):
+        key = DocumentCache.content_key(b"%PDF-1.4 cv")
+        assert len(key) == 64
+        assert key == DocumentCache.content_key(b"%PDF-1.4 cv")
+        assert key != DocumentCache.content_key(b"%PDF-1.4 other")
+
+    def test_entries_are_sharded_by_prefix(self, temp_data_dir):
+        cache = DocumentCache()
+        key = DocumentCache.content_key(b"doc")
+        cache.set(key, _payload("text"))
+        assert (cache_module.DATA_DIR / "documents" / key[:2] / key[2:4] / f"{key}.json").exists()
+        assert cache.get(key)["text"] == "text"
+
+    def test_legacy_flat_entry_moves_into_its_shard(self, temp_data_dir):
+        root = cache_module.DATA_DIR / "documents"
+        content = b"%PDF-1.4 scanned cv"
+        (root / f"{hashlib.md5(content).hexdigest()}.json").write_text(json.dumps(_payload("ocr", "ocr_image")))
+        cache = DocumentCache()
+        key = DocumentCache.content_key(content)
+
+        assert cache.get(key, legacy_key=cache.legacy_key(content))["text"] == "ocr"
+        assert list(root.glob("*.json")) == []
+        assert cache._path(key).exists()
+        assert cache.stats()["ocr_calls_saved"] == 1
+        assert DocumentCache().legacy_key(content) == ""
+
+    def test_unclaimed_legacy_entries_expire_on_ttl(self, temp_data_dir):
+        root = cache_module.DATA_DIR / "documents"
+        stale, fresh = root / "0123456789abcdef.json", root / "fedcba9876543210.json"
+        stale.write_text("{}")
+        fresh.write_text("{}")
+        past = time.time() - 7200
+        os.utime(stale, (past, past))
+        cache = DocumentCache(ttl_seconds=3600)
+
+        assert cache.sweep() == 1
+        assert not stale.exists()
+        assert fresh.exists()
+        assert cache.legacy_key(b"x")
+
+
+class TestEviction:
+    def test_least_recently_used_is_evicted(self, temp_data_dir):
+        cache = DocumentCache()
+        keys = [DocumentCache.content_key(bytes([i])) for i in range(3)]
+        cache.set(keys[0], _payload("x" * 200))
+        cache.max_bytes = cache.stats()["bytes"] * 2 + 10
+        cache.set(keys[1], _payload("x" * 200))
+        assert cache.get(keys[0]) is not None  # keys[1] is now the oldest
+        cache.set(keys[2], _payload("x" * 200))
+
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) is not None
+        assert cache.get(keys[2]) is not None
+        stats = cache.stats()
+        assert stats["evictions"] == 1
+        assert stats["bytes"] <= cache.max_bytes
+
+    def test_oversized_entry_is_kept_alone(self, temp_data_dir):
+        cache = DocumentCache(max_bytes=10)
+        key = DocumentCache.content_key(b"big")
+        cache.set(key, _payload("x" * 500))
+        assert cache.get(key) is not None
+
+    def test_recency_survives_restart(self, temp_data_dir):
+        cache = DocumentCache()
+        old = DocumentCache.content_key(b"old")
+        new = DocumentCache.content_key(b"new")
+        cache.set(old, _payload("x" * 200))
+        cache.set(new, _payload("x" * 200))
+        past = time.time() - 3600
+        os.utime(cache._path(old), (past, past))
+        cache.get(old)  # refreshes mtime
+
+        restarted = DocumentCache()
+        assert list(restarted._entries) == [new, old]
+        assert restarted.stats()["entries"] == 2
+
+    def test_budget_enforced_on_startup(self, temp_data_dir):
+        cache = DocumentCache()
+        for i in range(4):
+            cache.set(DocumentCache.content_key(bytes([i])), _payload("x" * 200))
+        restarted = DocumentCache(max_bytes=cache.stats()["bytes"] // 2)
+        assert restarted.stats()["entries"] == 2
+        assert restarted.stats()["evictions"] == 2
+
+
+class TestStats:
+    def test_counts_hits_misses_and_savings(self, temp_data_dir):
+        cache = DocumentCache()
+        key = DocumentCache.content_key(b"scan")
+        cache.set(key, _payload("ocr text", parse_method="ocr_image", size_bytes=5000))
+        cache.get(key)
+        cache.get(key)
+        cache.get(DocumentCache.content_key(b"missing"))
+
+        stats = cache.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == round(2 / 3, 3)
+        assert stats["ocr_calls_saved"] == 2
+        assert stats["source_bytes_saved"] == 10000
+
+    def test_health_reports_document_cache(self, test_client):
+        body = test_client.get("/health").json()
+        assert body["document_cache"]["hits"] == 0
+        assert "evictions" in body["document_cache"]
@@ -0,0 +1,97 @@
+"""Tests for incremental per-document profile extraction."""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from happyrav.services import llm_cache, llm_kimi
+from happyrav.services.llm_cache import LLMResponseCache, ResponseCacheStats
+
+CV = "CV: Jane Doe, Python engineer at Acme"
+REFERENCE = "Arbeitszeugnis: Frau Doe war bei Beta AG als Teamleiterin tätig"
+
+
+@pytest.fixture
+def incremental(monkeypatch):
+    monkeypatch.setattr(llm_kimi, "EXTRACTION_MODE", "incremental")
+    monkeypatch.setattr(llm_cache, "response_cache", LLMResponseCache(ttl_seconds=3600))
+    monkeypatch.setattr(llm_cache, "stats", ResponseCacheStats())
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Fake OpenAI client answering with a fragment for whichever document the prompt carries."""
+    prompts = []
+
+    async def create(model, messages, **kwargs):
+        prompt = messages[-1]["content"]
+        prompts.append(prompt)
+        if "BROKEN" in prompt:
+            raise RuntimeError("model unavailable")
+        if "Arbeitszeugnis" in prompt:
+            payload = {"full_name": "Frau Doe", "experience": [{"role": "Teamleiterin", "company": "Beta AG"}]}
+        else:
+            payload = {"full_name": "Jane Doe", "skills": ["Python"], "experience": [{"role": "Engineer", "company": "Acme"}]}
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(payload)))])
+
+    fake = MagicMock()
+    fake.chat.completions.create = create
+    fake.prompts = prompts
+    monkeypatch.setattr(llm_kimi, "_build_async_client", lambda: fake)
+    return fake
+
+
+def _extract(documents, tags, language="en"):
+    return asyncio.run(llm_kimi.extract_profile_from_documents(language, documents, tags))
+
+
+def test_adding_a_document_costs_one_call(incremental, client):
+    _extract([CV], ["cv"])
+    profile, warning, debug = _extract([CV, REFERENCE], ["cv", "arbeitszeugnis"])
+
+    assert len(client.prompts) == 2
+    assert (debug["fragments_cached"], debug["fragments_extracted"]) == (1, 1)
+    assert warning is None
+    assert [item.company for item in profile.experience] == ["Acme", "Beta AG"]
+
+
+def test_cv_fragment_wins_scalar_fields(incremental, client):
+    profile, _, _ = _extract([REFERENCE, CV], ["arbeitszeugnis", "cv"])
+    assert profile.full_name == "Jane Doe"
+    assert profile.skills_str == ["Python"]
+
+
+def test_each_prompt_carries_a_single_document(incremental, client):
+    _extract([CV, REFERENCE], ["cv", "arbeitszeugnis"])
+    assert sorted(("Jane Doe" in prompt, "Beta AG" in prompt) for prompt in client.prompts) == [(False, True), (True, False)]
+
+
+def test_language_is_part_of_the_key(incremental, client):
+    _extract([CV], ["cv"], language="en")
+    _extract([CV], ["cv"], language="de")
+    assert len(client.prompts) == 2
+
+
+def test_failed_document_is_reported_and_not_cached(incremental, client):
+    profile, warning, debug = _extract([CV, "BROKEN scan"], ["cv", "other"])
+    assert profile.full_name == "Jane Doe"
+    assert "1 of 2 documents could not be extracted" in warning
+    assert debug["fragments_failed"] == 1
+
+    _extract([CV, "BROKEN scan"], ["cv", "other"])
+    assert sum("BROKEN" in prompt for prompt in client.prompts) == 2
+
+
+def test_all_documents_failing_falls_back(incremental, client):
+    profile, warning, _ = _extract(["BROKEN"], ["cv"])
+    assert profile is None
+    assert warning.startswith("Extraction fallback used")
+
+
+def test_combined_mode_is_the_default(client, monkeypatch):
+    monkeypatch.setattr(llm_kimi, "EXTRACTION_MODE", "combined")
+    _, _, debug = _extract([CV, REFERENCE], ["cv", "arbeitszeugnis"])
+    assert len(client.prompts) == 1
+    assert "mode" not in debug
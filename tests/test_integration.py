@@ -152,7 +152,7 @@ class TestDiskPersistence:
         assert retrieved2 is not None
         assert retrieved2.token == token
         assert retrieved2.filename_cv == "test_cv.pdf"
-        assert retrieved2.cv_pdf_bytes == b"fake pdf content"
+        assert cache2.read_blob(retrieved2.cv_pdf_hash) == b"fake pdf content"
         assert retrieved2.match.overall_score == 85.0
         assert len(retrieved2.match.matched_keywords) == 2
 
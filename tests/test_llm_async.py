@@ -0,0 +1,69 @@
+"""Tests for the native async provider calls in llm_kimi."""
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from happyrav.models import ExtractedProfile, MatchPayload
+from happyrav.services import llm_kimi
+
+
+def _anthropic_client(text, delay=0.2):
+    client = MagicMock()
+
+    async def create(**kwargs):
+        await asyncio.sleep(delay)
+        return SimpleNamespace(content=[SimpleNamespace(text=text)])
+
+    client.messages.create = create
+    return client
+
+
+def test_concurrent_calls_are_multiplexed_on_the_event_loop(monkeypatch):
+    monkeypatch.setenv("HAPPYRAV_ANTHROPIC_MAX_CONCURRENCY", "200")
+    client = _anthropic_client('{"strengths": ["x"], "gaps": [], "recommendations": [], "summary": "ok"}')
+    monkeypatch.setattr(llm_kimi, "_build_async_anthropic_client", lambda: client)
+    match = MatchPayload(overall_score=50.0, category_scores={}, matched_keywords=[], missing_keywords=[], ats_issues=[])
+    profile = ExtractedProfile(full_name="Test User")
+    threads_before = threading.active_count()
+
+    async def many():
+        return await asyncio.gather(*[
+            llm_kimi.generate_strategic_analysis("en", match, profile, f"job ad {index}") for index in range(200)
+        ])
+
+    started = time.perf_counter()
+    results = asyncio.run(many())
+    elapsed = time.perf_counter() - started
+
+    assert all(result["summary"] == "ok" for result in results)
+    # 200 calls of 0.2s each finish together instead of queueing behind the thread pool.
+    assert elapsed < 1.5
+    assert threading.active_count() <= threads_before + 1
+
+
+def test_refine_keeps_current_content_when_provider_fails(monkeypatch):
+    client = MagicMock()
+
+    async def create(**kwargs):
+        raise RuntimeError("overloaded")
+
+    client.messages.create = create
+    monkeypatch.setattr(llm_kimi, "_build_async_anthropic_client", lambda: client)
+    current = llm_kimi._fallback_content("en", "Python role", ExtractedProfile(full_name="Test User"))
+
+    content, error = asyncio.run(
+        llm_kimi.refine_content("en", "shorter please", current, ExtractedProfile(full_name="Test User"), "Python role")
+    )
+
+    assert content is current
+    assert "overloaded" in error
+
+
+def test_answer_strategic_question_uses_async_client(monkeypatch):
+    monkeypatch.setattr(llm_kimi, "_build_async_anthropic_client", lambda: _anthropic_client(" Lead with Python. ", 0))
+    answer = asyncio.run(
+        llm_kimi._answer_strategic_question("en", "What first?", {}, {}, ExtractedProfile(full_name="T"), "Python")
+    )
+    assert answer == "Lead with Python."
@@ -0,0 +1,149 @@
+"""Tests for the persistent LLM response cache."""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from happyrav.services import llm_cache, llm_kimi, llm_matching
+from happyrav.services.backends import MemoryBackend
+from happyrav.services.llm_cache import LLMResponseCache, RemoteLLMResponseCache, ResponseCacheStats, response_key
+
+
+@pytest.fixture
+def installed(monkeypatch):
+    cache = LLMResponseCache(ttl_seconds=3600)
+    monkeypatch.setattr(llm_cache, "response_cache", cache)
+    monkeypatch.setattr(llm_cache, "stats", ResponseCacheStats())
+    return cache
+
+
+def _openai_client(text='{"ok": true}'):
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(
+        return_value=SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+    )
+    return client
+
+
+def _chat(**kwargs):
+    return asyncio.run(llm_kimi._chat_json_openai(**kwargs))
+
+
+class TestResponseKey:
+    def test_every_field_changes_the_key(self):
+        base = ("openai", "gpt-4.1-mini", "system", "user", 100)
+        keys = {response_key(*base)}
+        for index, value in enumerate(("anthropic", "gpt-5.2", "other", "prompt", 200)):
+            variant = list(base)
+            variant[index] = value
+            keys.add(response_key(*variant))
+        assert len(keys) == 6
+
+    def test_fields_do_not_run_together(self):
+        assert response_key("openai", "m", "ab", "c", 1) != response_key("openai", "m", "a", "bc", 1)
+
+
+class TestChatHelpers:
+    def test_second_identical_call_is_served_from_cache(self, installed, monkeypatch):
+        client = _openai_client()
+        monkeypatch.setattr(llm_kimi, "_build_async_client", lambda: client)
+
+        first = _chat(prompt="job ad", max_tokens=100, model="m")
+        second = _chat(prompt="job ad", max_tokens=100, model="m")
+
+        assert first == second == {"ok": True}
+        assert client.chat.completions.create.call_count == 1
+        snapshot = llm_cache.stats.snapshot()
+        assert (snapshot["hits"], snapshot["misses"], snapshot["stores"]) == (1, 1, 1)
+
+    def test_different_max_tokens_misses(self, installed, monkeypatch):
+        client = _openai_client()
+        monkeypatch.setattr(llm_kimi, "_build_async_client", lambda: client)
+        _chat(prompt="job ad", max_tokens=100, model="m")
+        _chat(prompt="job ad", max_tokens=200, model="m")
+        assert client.chat.completions.create.call_count == 2
+
+    def test_opt_out_always_calls_the_provider(self, installed, monkeypatch):
+        client = _openai_client()
+        monkeypatch.setattr(llm_kimi, "_build_async_client", lambda: client)
+        for _ in range(2):
+            _chat(prompt="job ad", max_tokens=100, model="m", cache=False)
+        assert client.chat.completions.create.call_count == 2
+        assert llm_cache.stats.snapshot()["bypassed"] == 2
+
+    def test_unparseable_response_is_not_cached(self, installed, monkeypatch):
+        client = _openai_client("not json")
+        monkeypatch.setattr(llm_kimi, "_build_async_client", lambda: client)
+        with pytest.raises(Exception):
+            _chat(prompt="job ad", max_tokens=100, model="m")
+        assert installed.usage()["entries"] == 0
+
+    def test_storage_failure_costs_only_a_miss(self, installed, monkeypatch):
+        client = _openai_client()
+        monkeypatch.setattr(llm_kimi, "_build_async_client", lambda: client)
+        monkeypatch.setattr(installed, "set", MagicMock(side_effect=OSError("disk full")))
+        assert _chat(prompt="job ad", max_tokens=100, model="m") == {"ok": True}
+        assert llm_cache.stats.snapshot()["errors"] == 1
+
+    def test_not_installed_bypasses(self, monkeypatch):
+        monkeypatch.setattr(llm_cache, "response_cache", None)
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            return {"a": 1}
+
+        for _ in range(2):
+            asyncio.run(llm_cache.cached_json("openai", "m", "s", "u", 1, compute))
+        assert len(calls) == 2
+
+
+class TestAsyncHelper:
+    def test_fallback_answer_is_cached_under_requested_model(self, installed, monkeypatch):
+        client = MagicMock()
+        calls = []
+
+        async def create(model, **kwargs):
+            calls.append(model)
+            if model == "primary":
+                raise RuntimeError("model unavailable")
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='{"n": 1}'))])
+
+        client.chat.completions.create = create
+        monkeypatch.setattr(llm_matching, "_build_async_openai_client", lambda: client)
+        monkeypatch.setattr(llm_matching, "MATCHING_MODEL_FALLBACKS", ["backup"])
+
+        async def twice():
+            first = await llm_matching._chat_json_openai_async("sys", "user", 50, model="primary")
+            second = await llm_matching._chat_json_openai_async("sys", "user", 50, model="primary")
+            return first, second
+
+        assert asyncio.run(twice()) == ({"n": 1}, {"n": 1})
+        assert calls == ["primary", "backup"]
+
+
+class TestStorage:
+    def test_entries_survive_a_restart_and_expire(self, installed):
+        installed.set("k", {"payload": {"x": 1}, "provider": "openai", "model": "m", "created_at": 0})
+        assert LLMResponseCache(ttl_seconds=3600).get("k")["payload"] == {"x": 1}
+        assert LLMResponseCache(ttl_seconds=0).get("k") is None
+
+    def test_size_budget_evicts(self, temp_data_dir):
+        cache = LLMResponseCache(ttl_seconds=3600, max_bytes=600)
+        for index in range(10):
+            cache.set(f"k{index}", {"payload": {"text": "x" * 100}, "provider": "p", "model": "m", "created_at": 0})
+        usage = cache.usage()
+        assert usage["bytes"] <= 600
+        assert usage["evictions"] > 0
+        assert cache.get("k9") is not None
+
+    def test_remote_cache_round_trip(self):
+        cache = RemoteLLMResponseCache(ttl_seconds=60, backend=MemoryBackend())
+        cache.set("k", {"payload": {"x": 1}, "provider": "openai", "model": "m", "created_at": 0})
+        assert cache.get("k")["payload"] == {"x": 1}
+
+
+def test_health_reports_llm_cache(test_client):
+    body = test_client.get("/health").json()
+    assert set(body["llm_cache"]) >= {"enabled", "hits", "misses", "hit_rate"}
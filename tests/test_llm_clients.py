@@ -0,0 +1,77 @@
+"""Tests for the shared, pooled LLM SDK clients."""
+import asyncio
+
+import pytest
+
+from happyrav.services import llm_clients
+from happyrav.services.llm_clients import ClientPool
+from happyrav.services.llm_kimi import _build_anthropic_client, _build_client
+from happyrav.services.llm_matching import _build_async_openai_client
+
+
+@pytest.fixture
+def fresh_pool(monkeypatch):
+    pool = ClientPool()
+    monkeypatch.setattr(llm_clients, "pool", pool)
+    return pool
+
+
+class TestSyncClients:
+    def test_client_is_reused_per_key_and_base_url(self, fresh_pool, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "key-a")
+        monkeypatch.delenv("OPENAI_BASE_URL", raising=False)
+        first = _build_client()
+        assert _build_client() is first
+
+        monkeypatch.setenv("OPENAI_BASE_URL", "http://127.0.0.1:9/v1")
+        assert _build_client() is not first
+        monkeypatch.setenv("OPENAI_API_KEY", "key-b")
+        assert len({id(_build_client()), id(first)}) == 2
+        assert fresh_pool.created == 3
+
+    def test_anthropic_client_is_shared(self, fresh_pool, monkeypatch):
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "key")
+        assert _build_anthropic_client() is _build_anthropic_client()
+
+    def test_pool_limits_from_env(self, monkeypatch):
+        monkeypatch.setenv("HAPPYRAV_LLM_MAX_CONNECTIONS", "5")
+        monkeypatch.setenv("HAPPYRAV_LLM_MAX_KEEPALIVE", "2")
+        limits = llm_clients.pool_limits()
+        assert (limits.max_connections, limits.max_keepalive_connections) == (5, 2)
+
+    def test_http2_needs_h2(self, monkeypatch):
+        monkeypatch.setenv("HAPPYRAV_LLM_HTTP2", "1")
+        monkeypatch.setattr(llm_clients, "h2", None)
+        assert not llm_clients.http2_enabled()
+
+    def test_close_drops_clients(self, fresh_pool, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "key")
+        client = _build_client()
+        fresh_pool.close()
+        assert len(fresh_pool) == 0
+        assert _build_client() is not client
+
+
+class TestAsyncClients:
+    def test_async_clients_are_per_event_loop(self, fresh_pool, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "key")
+
+        async def twice():
+            return _build_async_openai_client(), _build_async_openai_client()
+
+        first_a, first_b = asyncio.run(twice())
+        second_a, _ = asyncio.run(twice())
+        assert first_a is first_b
+        assert second_a is not first_a
+
+    def test_aclose_closes_loop_clients(self, fresh_pool, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "key")
+
+        async def run():
+            client = _build_async_openai_client()
+            await fresh_pool.aclose()
+            return client
+
+        client = asyncio.run(run())
+        assert client.is_closed()
+        assert len(fresh_pool) == 0
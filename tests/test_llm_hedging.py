@@ -0,0 +1,159 @@
+"""Tests for hedged requests in the matching model fallback chain."""
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from happyrav.services import llm_matching, llm_metrics, llm_scheduler
+from happyrav.services.llm_metrics import Registry
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    registry = Registry()
+    monkeypatch.setattr(llm_metrics, "registry", registry)
+    return registry
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    """Fake client whose per-model behaviour is (delay seconds, reply text or exception)."""
+    behaviour = {}
+    events = []
+
+    async def create(model, **kwargs):
+        delay, reply = behaviour[model]
+        events.append(("start", model))
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            events.append(("cancelled", model))
+            raise
+        if isinstance(reply, Exception):
+            raise reply
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))])
+
+    client = MagicMock()
+    client.chat.completions.create = create
+    monkeypatch.setattr(llm_matching, "_build_async_openai_client", lambda: client)
+    monkeypatch.setattr(llm_matching, "MATCHING_MODEL_FALLBACKS", ["backup", "last"])
+    monkeypatch.setattr(llm_matching, "HEDGE_ENABLED", True)
+    monkeypatch.setattr(llm_matching, "HEDGE_DEFAULT_DELAY", 0.05)
+    return SimpleNamespace(behaviour=behaviour, events=events)
+
+
+def _chat():
+    return asyncio.run(llm_matching._chat_json_openai_async("sys", "user", 10, model="primary"))
+
+
+def test_hanging_primary_is_hedged_and_cancelled(chain, fresh_registry):
+    chain.behaviour.update(primary=(5, '{"from": "primary"}'), backup=(0.01, '{"from": "backup"}'), last=(0, "{}"))
+
+    started = time.perf_counter()
+    assert _chat() == {"from": "backup"}
+    assert time.perf_counter() - started < 1
+
+    assert ("cancelled", "primary") in chain.events
+    assert ("start", "last") not in chain.events
+    assert fresh_registry.value("happyrav_llm_hedges_total", model="primary", to_model="backup") == 1
+    assert fresh_registry.value("happyrav_llm_hedge_wins_total", model="backup") == 1
+    assert fresh_registry.value("happyrav_llm_calls_total", model="primary", outcome="cancelled") == 1
+    assert fresh_registry.quantile(0.5, model="primary") is None
+
+
+def test_primary_answering_first_cancels_the_hedge(chain, fresh_registry, monkeypatch):
+    monkeypatch.setattr(llm_matching, "HEDGE_DEFAULT_DELAY", 0.02)
+    chain.behaviour.update(primary=(0.1, '{"from": "primary"}'), backup=(5, '{"from": "backup"}'), last=(5, "{}"))
+
+    assert _chat() == {"from": "primary"}
+    assert ("cancelled", "backup") in chain.events
+    assert fresh_registry.value("happyrav_llm_hedge_wins_total") == 0
+
+
+def test_invalid_json_from_hedge_keeps_waiting(chain):
+    chain.behaviour.update(primary=(0.15, '{"from": "primary"}'), backup=(0.01, "not json"), last=(5, "{}"))
+    assert _chat() == {"from": "primary"}
+
+
+def test_failure_falls_back_immediately(chain, fresh_registry):
+    chain.behaviour.update(primary=(0, RuntimeError("unavailable")), backup=(0, '{"from": "backup"}'), last=(0, "{}"))
+    assert _chat() == {"from": "backup"}
+    assert fresh_registry.value("happyrav_llm_fallback_hops_total", model="primary", to_model="backup") == 1
+    assert fresh_registry.value("happyrav_llm_hedges_total") == 0
+
+
+def test_disabled_hedging_waits_for_the_primary(chain, monkeypatch):
+    monkeypatch.setattr(llm_matching, "HEDGE_ENABLED", False)
+    chain.behaviour.update(primary=(0.2, '{"from": "primary"}'), backup=(0, '{"from": "backup"}'), last=(0, "{}"))
+    assert _chat() == {"from": "primary"}
+    assert chain.events == [("start", "primary")]
+
+
+def test_every_candidate_failing_raises_the_last_error(chain):
+    chain.behaviour.update(
+        primary=(0, RuntimeError("a")), backup=(0, RuntimeError("b")), last=(0, RuntimeError("c"))
+    )
+    with pytest.raises(RuntimeError, match="c"):
+        _chat()
+
+
+def test_saturated_scheduler_does_not_trigger_hedges(chain, fresh_registry, monkeypatch):
+    monkeypatch.setitem(llm_scheduler.schedulers, "openai", llm_scheduler.ProviderScheduler("openai", max_concurrency=1))
+    monkeypatch.setattr(llm_matching, "HEDGE_DEFAULT_DELAY", 0.1)
+    chain.behaviour.update(primary=(0.05, '{"from": "primary"}'), backup=(0, "{}"), last=(0, "{}"))
+
+    async def burst():
+        # Ten requests queue behind one slot; each waits far longer than the hedge delay for it.
+        return await asyncio.gather(*(
+            llm_matching._chat_json_openai_async("sys", f"user {i}", 10, model="primary", cache=False)
+            for i in range(10)
+        ))
+
+    assert asyncio.run(burst()) == [{"from": "primary"}] * 10
+    assert fresh_registry.value("happyrav_llm_hedges_total") == 0
+    assert chain.events == [("start", "primary")] * 10
+
+
+def test_hedge_delay_follows_the_latency_percentile(fresh_registry, monkeypatch):
+    monkeypatch.setattr(llm_matching, "HEDGE_ENABLED", True)
+    monkeypatch.setattr(llm_matching, "HEDGE_DEFAULT_DELAY", 20.0)
+    monkeypatch.setattr(llm_matching, "HEDGE_MIN_SAMPLES", 20)
+    labels = {"endpoint": "other", "provider": "openai", "model": "primary"}
+    for _ in range(10):
+        fresh_registry.observe(labels, 0.2, metric=llm_metrics.PROVIDER_SECONDS)
+    assert llm_matching._hedge_delay("primary") == 20.0
+
+    for _ in range(9):
+        fresh_registry.observe(labels, 0.2, metric=llm_metrics.PROVIDER_SECONDS)
+    fresh_registry.observe(labels, 3.0, metric=llm_metrics.PROVIDER_SECONDS)
+    assert llm_matching._hedge_delay("primary") == pytest.approx(0.25)
+    monkeypatch.setattr(llm_matching, "HEDGE_PERCENTILE", 0.99)
+    assert 2.5 < llm_matching._hedge_delay("primary") <= 5.0
+
+
+def test_hedge_delay_ignores_scheduler_queueing(fresh_registry):
+    queue = llm_scheduler.ProviderScheduler("openai", max_concurrency=1)
+
+    async def call():
+        await asyncio.sleep(0.3)
+        return SimpleNamespace()
+
+    async def burst():
+        await asyncio.gather(*(queue.run(call, model="primary") for _ in range(2)))
+
+    asyncio.run(burst())
+    # The second call waited 0.3 s for the slot: wall time grows, provider latency does not.
+    assert fresh_registry.quantile(1.0, model="primary") > 0.5
+    assert llm_metrics.latency_quantile("openai", "primary", 1.0) <= 0.5
+
+
+def test_quantile_interpolates_within_buckets(fresh_registry):
+    for seconds in (0.1, 0.3, 0.3, 0.7):
+        fresh_registry.observe({"provider": "openai", "model": "m"}, seconds)
+    assert fresh_registry.quantile(0.5, model="m") == pytest.approx(0.375)
+    assert fresh_registry.quantile(1.0, model="m") == pytest.approx(1.0)
+    assert fresh_registry.quantile(0.5, min_samples=5, model="m") is None
+    fresh_registry.observe({"provider": "openai", "model": "m"}, 500)
+    assert fresh_registry.quantile(1.0, model="m") == llm_metrics.LATENCY_BUCKETS[-1]
@@ -0,0 +1,132 @@
+"""Tests for LLM token, latency and cost accounting and the /metrics route."""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from happyrav.services import llm_matching, llm_metrics
+from happyrav.services.llm_metrics import Registry, cost_usd, track, usage_tokens
+from happyrav.services.llm_scheduler import ProviderScheduler
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    registry = Registry()
+    monkeypatch.setattr(llm_metrics, "registry", registry)
+    return registry
+
+
+def _openai_response(text="{}", prompt=120, completion=30):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=text))],
+        usage=SimpleNamespace(prompt_tokens=prompt, completion_tokens=completion),
+    )
+
+
+def test_usage_tokens_for_each_provider_shape():
+    assert usage_tokens(_openai_response()) == (120, 30)
+    assert usage_tokens(SimpleNamespace(usage=SimpleNamespace(input_tokens=7, output_tokens=3))) == (7, 3)
+    assert usage_tokens(SimpleNamespace(usage_metadata=SimpleNamespace(prompt_token_count=5, candidates_token_count=2))) == (5, 2)
+    assert usage_tokens(MagicMock()) == (0, 0)
+
+
+def test_cost_uses_longest_prefix_and_env_override(monkeypatch):
+    assert cost_usd("gpt-4.1-mini-2025", 1_000_000, 0) == pytest.approx(0.40)
+    assert cost_usd("gpt-4.1", 0, 1_000_000) == pytest.approx(8.0)
+    assert cost_usd("unpriced-model", 10 ** 6, 10 ** 6) == 0.0
+    monkeypatch.setenv("HAPPYRAV_LLM_PRICES", '{"unpriced-model": [1, 2]}')
+    assert cost_usd("unpriced-model", 10 ** 6, 10 ** 6) == pytest.approx(3.0)
+
+
+def test_track_records_tokens_cost_and_outcome(fresh_registry):
+    token = llm_metrics.endpoint.set("POST /api/x")
+    try:
+        with track("openai", "gpt-4.1") as record:
+            record.response = _openai_response(prompt=1000, completion=500)
+        with pytest.raises(RuntimeError):
+            with track("openai", "gpt-4.1"):
+                raise RuntimeError("boom")
+    finally:
+        llm_metrics.endpoint.reset(token)
+
+    assert fresh_registry.value("happyrav_llm_prompt_tokens_total", endpoint="POST /api/x") == 1000
+    assert fresh_registry.value("happyrav_llm_completion_tokens_total") == 500
+    assert fresh_registry.value("happyrav_llm_cost_usd_total") == pytest.approx(0.006)
+    assert fresh_registry.value("happyrav_llm_calls_total", outcome="ok") == 1
+    assert fresh_registry.value("happyrav_llm_calls_total", outcome="error") == 1
+
+
+def test_scheduler_counts_rate_limit_retries(fresh_registry):
+    class RateLimited(Exception):
+        status_code = 429
+        response = SimpleNamespace(headers={"retry-after": "0"})
+
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RateLimited()
+        return _openai_response()
+
+    asyncio.run(ProviderScheduler("openai").run(call, model="m"))
+    assert fresh_registry.value("happyrav_llm_retries_total", model="m") == 2
+    assert fresh_registry.value("happyrav_llm_calls_total", model="m") == 1
+
+
+def test_fallback_hops_are_counted(fresh_registry, monkeypatch):
+    client = MagicMock()
+
+    async def create(model, **kwargs):
+        if model == "primary":
+            raise RuntimeError("model unavailable")
+        return _openai_response('{"ok": 1}')
+
+    client.chat.completions.create = create
+    monkeypatch.setattr(llm_matching, "_build_async_openai_client", lambda: client)
+    monkeypatch.setattr(llm_matching, "MATCHING_MODEL_FALLBACKS", ["backup"])
+
+    asyncio.run(llm_matching._chat_json_openai_async("sys", "user", 10, model="primary"))
+    assert fresh_registry.value("happyrav_llm_fallback_hops_total", model="primary", to_model="backup") == 1
+
+
+def test_render_prometheus_text(fresh_registry):
+    with track("anthropic", 'model"x') as record:
+        record.response = SimpleNamespace(usage=SimpleNamespace(input_tokens=4, output_tokens=1))
+    text = llm_metrics.render({"happyrav_llm_scheduler_queued": {(("provider", "openai"),): 2}})
+    assert "# TYPE happyrav_llm_calls_total counter" in text
+    assert 'model="model\\"x"' in text
+    assert 'happyrav_llm_call_seconds_bucket{endpoint="other",model="model\\"x",provider="anthropic",le="+Inf"} 1' in text
+    assert "# TYPE happyrav_llm_provider_seconds histogram" in text
+    assert 'happyrav_llm_scheduler_queued{provider="openai"} 2' in text
+
+
+def test_metrics_route_attributes_calls_to_the_endpoint(test_client, monkeypatch):
+    client = MagicMock()
+
+    async def create(model, **kwargs):
+        return _openai_response("{}", prompt=50, completion=5)
+
+    client.chat.completions.create = create
+    monkeypatch.setattr(llm_matching, "_build_async_openai_client", lambda: client)
+    resp = test_client.post(
+        "/api/session/start",
+        json={"language": "en", "company_name": "Co", "position_title": "Dev", "job_ad_text": "Rust role", "consent_confirmed": True},
+    )
+    session_id = resp.json()["session_id"]
+    test_client.post(
+        f"/api/session/{session_id}/preseed",
+        json={"profile": {"full_name": "Test User", "skills": ["Cooking"]}},
+    )
+
+    with patch("happyrav.services.llm_kimi.generate_strategic_analysis", return_value=None):
+        assert test_client.post(f"/api/session/{session_id}/preview-match").status_code == 200
+
+    body = test_client.get("/metrics")
+    assert body.headers["content-type"].startswith("text/plain")
+    assert 'endpoint="POST /api/session/{session_id}/preview-match"' in body.text
+    assert llm_metrics.registry.value(
+        "happyrav_llm_prompt_tokens_total", endpoint="POST /api/session/{session_id}/preview-match"
+    ) >= 50
+    assert "happyrav_llm_scheduler_in_flight" in body.text
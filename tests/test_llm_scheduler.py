@@ -0,0 +1,186 @@
+"""Tests for per-provider concurrency limits, rate buckets and 429 handling."""
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from happyrav.services import llm_matching, llm_scheduler
+from happyrav.services.llm_scheduler import ProviderScheduler, TokenBucket, retry_after
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self, retry="0.05"):
+        super().__init__("rate limited")
+        self.response = SimpleNamespace(headers={"retry-after": retry} if retry else {})
+
+
+def test_concurrency_is_capped_and_excess_calls_queue():
+    sched = ProviderScheduler("test", max_concurrency=2)
+    active = peak = 0
+    depths = []
+
+    async def call():
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        depths.append(sched.queued)
+        await asyncio.sleep(0.02)
+        active -= 1
+        return "ok"
+
+    async def main():
+        return await asyncio.gather(*[sched.run(call) for _ in range(6)])
+
+    assert asyncio.run(main()) == ["ok"] * 6
+    assert peak == 2
+    assert max(depths) > 0
+    assert sched.in_flight == 0 and sched.queued == 0
+
+
+def test_queue_depth_drops_when_a_waiting_call_is_cancelled():
+    sched = ProviderScheduler("test", max_concurrency=1)
+
+    async def call():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def main():
+        running = asyncio.ensure_future(sched.run(call))
+        waiting = asyncio.ensure_future(sched.run(call))
+        await asyncio.sleep(0.01)
+        assert sched.queued == 1
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert sched.queued == 0
+        return await running
+
+    assert asyncio.run(main()) == "ok"
+    assert sched.snapshot()["queued"] == 0 and sched.in_flight == 0
+
+
+def test_rate_limited_call_waits_retry_after_and_halves_the_limit():
+    sched = ProviderScheduler("test", max_concurrency=8)
+    attempts = []
+
+    async def call():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise RateLimited("0.1")
+        return "ok"
+
+    assert asyncio.run(sched.run(call)) == "ok"
+    assert attempts[1] - attempts[0] >= 0.09
+    assert sched.throttled == 1
+    assert 4 <= sched.limit < 4.5
+
+
+def test_retries_are_bounded():
+    sched = ProviderScheduler("test", max_retries=1)
+    llm_calls = []
+
+    async def call():
+        llm_calls.append(1)
+        raise RateLimited("0")
+
+    with pytest.raises(RateLimited):
+        asyncio.run(sched.run(call))
+    assert len(llm_calls) == 2
+    assert sched.in_flight == 0
+
+
+def test_other_errors_pass_through_without_backoff():
+    sched = ProviderScheduler("test")
+
+    async def call():
+        raise ValueError("bad json")
+
+    with pytest.raises(ValueError):
+        asyncio.run(sched.run(call))
+    assert (sched.throttled, sched.limit, sched.in_flight) == (0, 16.0, 0)
+
+
+def test_limit_recovers_additively():
+    sched = ProviderScheduler("test", max_concurrency=4)
+    sched.limit = 1.0
+
+    async def call():
+        return None
+
+    async def main():
+        for _ in range(6):
+            await sched.run(call)
+
+    asyncio.run(main())
+    assert 3 <= sched.limit <= 4
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    sched = ProviderScheduler("test", max_concurrency=1)
+
+    async def slow():
+        await asyncio.sleep(0.05)
+
+    async def main():
+        first = asyncio.ensure_future(sched.run(slow))
+        await asyncio.sleep(0)
+        waiting = asyncio.ensure_future(sched.run(slow))
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        await first
+        await sched.run(slow)
+
+    asyncio.run(main())
+    assert sched.in_flight == 0
+
+
+def test_token_bucket_refills_per_minute():
+    now = [0.0]
+    bucket = TokenBucket(60, clock=lambda: now[0])
+    assert bucket.reserve(60) == 0
+    assert bucket.reserve(30) == pytest.approx(30.0)
+    now[0] = 60.0
+    assert bucket.reserve(10) == 0
+    assert TokenBucket(0).reserve(10 ** 6) == 0
+
+
+def test_retry_after_parsing():
+    assert retry_after(RateLimited("2")) == 2.0
+    assert retry_after(RateLimited(None)) is None
+    exc = RateLimited()
+    exc.response.headers = {"retry-after-ms": "250"}
+    assert retry_after(exc) == 0.25
+    exc.response.headers = {"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}
+    assert retry_after(exc) == 0.0
+
+
+def test_scheduler_configured_from_env(monkeypatch):
+    monkeypatch.setenv("HAPPYRAV_OPENAI_MAX_CONCURRENCY", "3")
+    monkeypatch.setenv("HAPPYRAV_OPENAI_RPM", "120")
+    sched = llm_scheduler.scheduler("openai")
+    assert sched is llm_scheduler.scheduler("openai")
+    assert (sched.max_concurrency, sched.requests.per_minute) == (3, 120)
+    assert llm_scheduler.snapshot()["openai"]["queued"] == 0
+
+
+def test_matching_queues_on_429_instead_of_failing_over(monkeypatch):
+    client = MagicMock()
+    models = []
+
+    async def create(model, **kwargs):
+        models.append(model)
+        if len(models) == 1:
+            raise RateLimited("0.01")
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='{"ok": 1}'))])
+
+    client.chat.completions.create = create
+    monkeypatch.setattr(llm_matching, "_build_async_openai_client", lambda: client)
+    monkeypatch.setattr(llm_matching, "MATCHING_MODEL_FALLBACKS", ["backup"])
+
+    result = asyncio.run(llm_matching._chat_json_openai_async("sys", "user", 10, model="primary"))
+
+    assert result == {"ok": 1}
+    assert models == ["primary", "primary"]
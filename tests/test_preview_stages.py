@@ -0,0 +1,210 @@
+"""Tests for concurrent LLM stages and the preview-match dependency graph."""
+import asyncio
+import time
+from unittest.mock import patch
+
+from happyrav.models import ContextualGap, SemanticMatchResult
+from happyrav.services.stages import StageRun, stage_timeout
+
+
+class TestStageRun:
+    def test_independent_stages_overlap(self):
+        async def work(value):
+            await asyncio.sleep(0.2)
+            return value
+
+        async def main():
+            async with StageRun() as stages:
+                first = stages.start("a", work(1))
+                second = stages.start("b", work(2))
+                return await first, await second, stages
+
+        started = time.perf_counter()
+        results = asyncio.run(main())
+        assert results[:2] == (1, 2)
+        assert time.perf_counter() - started < 0.35
+        assert results[2].stages["a"]["status"] == "ok"
+
+    def test_timeout_and_error_yield_default_and_mark_partial(self):
+        async def slow():
+            await asyncio.sleep(5)
+
+        async def broken():
+            raise RuntimeError("provider down")
+
+        async def main():
+            async with StageRun() as stages:
+                slow_result = await stages.run("slow", slow(), default="fallback", timeout=0.05)
+                broken_result = await stages.run("broken", broken(), default=[])
+                return slow_result, broken_result, stages
+
+        slow_result, broken_result, stages = asyncio.run(main())
+        assert (slow_result, broken_result) == ("fallback", [])
+        assert stages.stages["slow"]["status"] == "timeout"
+        assert stages.stages["broken"] == {"status": "error", "error": "provider down", "ms": stages.stages["broken"]["ms"]}
+        assert stages.partial
+
+    def test_skipped_and_unawaited_tasks_are_cancelled(self):
+        cancelled = []
+
+        async def speculative(name):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(name)
+                raise
+
+        async def main():
+            async with StageRun() as stages:
+                task = stages.start("gaps", speculative("gaps"))
+                stages.start("orphan", speculative("orphan"))
+                await asyncio.sleep(0)
+                stages.skip("gaps", task)
+            return stages
+
+        stages = asyncio.run(main())
+        assert sorted(cancelled) == ["gaps", "orphan"]
+        assert stages.stages["gaps"] == {"status": "skipped"}
+        assert not stages.partial
+
+    def test_timeout_override_from_env(self, monkeypatch):
+        monkeypatch.setenv("HAPPYRAV_STAGE_TIMEOUT_JOB_SUMMARY", "2.5")
+        assert stage_timeout("job_summary") == 2.5
+        assert stage_timeout("unknown_stage") == 30.0
+
+
+def _start_review_session(test_client):
+    resp = test_client.post(
+        "/api/session/start",
+        json={
+            "language": "en",
+            "company_name": "TestCo",
+            "position_title": "Engineer",
+            "job_ad_text": "We need Kubernetes, GraphQL and Rust experts.",
+            "consent_confirmed": True,
+        },
+    )
+    session_id = resp.json()["session_id"]
+    resp = test_client.post(
+        f"/api/session/{session_id}/preseed",
+        json={
+            "profile": {
+                "full_name": "Test User",
+                "skills": ["Cooking"],
+                "experience": [{"role": "Chef", "company": "Diner", "period": "2020-2023", "achievements": ["Cooked"]}],
+            }
+        },
+    )
+    assert resp.status_code == 200
+    return session_id
+
+
+def test_preview_match_runs_stages_concurrently(test_client):
+    session_id = _start_review_session(test_client)
+
+    def slow(result):
+        async def call(*args, **kwargs):
+            await asyncio.sleep(0.3)
+            return result
+        return call
+
+    semantic = SemanticMatchResult(missing_critical=["Rust"], overall_fit=0.1)
+    with patch("happyrav.main.summarize_job_ad", side_effect=slow("Rust role")), \
+         patch("happyrav.services.llm_matching.extract_semantic_keywords", side_effect=slow({})), \
+         patch("happyrav.services.llm_matching.match_skills_semantic", side_effect=slow(semantic)), \
+         patch("happyrav.services.llm_matching.detect_contextual_gaps", side_effect=slow([])), \
+         patch("happyrav.services.llm_kimi.generate_strategic_analysis", side_effect=slow({"summary": "s"})):
+        started = time.perf_counter()
+        resp = test_client.post(f"/api/session/{session_id}/preview-match")
+        elapsed = time.perf_counter() - started
+
+    assert resp.status_code == 200
+    data = resp.json()
+    # Critical path is keywords -> semantic match -> strategic analysis (3 x 0.3s), not all five calls.
+    assert elapsed < 1.35
+    assert data["match"]["job_summary"] == "Rust role"
+    assert set(data["stages"]) == {"job_summary", "semantic_keywords", "semantic_match", "contextual_gaps", "strategic_analysis"}
+    assert not data["partial"]
+
+
+def test_preview_match_returns_partial_result_on_stage_timeout(test_client, monkeypatch):
+    session_id = _start_review_session(test_client)
+    monkeypatch.setenv("HAPPYRAV_STAGE_TIMEOUT_JOB_SUMMARY", "0.05")
+
+    async def hang(*args, **kwargs):
+        await asyncio.sleep(5)
+
+    with patch("happyrav.main.summarize_job_ad", side_effect=hang), \
+         patch("happyrav.services.llm_matching.extract_semantic_keywords", side_effect=RuntimeError("down")), \
+         patch("happyrav.services.llm_matching.detect_contextual_gaps", return_value=[]), \
+         patch("happyrav.services.llm_kimi.generate_strategic_analysis", return_value=None):
+        resp = test_client.post(f"/api/session/{session_id}/preview-match")
+
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["partial"]
+    assert data["stages"]["job_summary"]["status"] == "timeout"
+    assert data["stages"]["semantic_keywords"]["status"] == "error"
+    assert data["match"]["matching_strategy"] == "baseline"
+    assert data["match"]["job_summary"].startswith("We need Kubernetes")
+
+
+def test_preview_match_fast_mode_makes_one_matching_call(test_client, monkeypatch):
+    from happyrav.services import llm_matching
+
+    session_id = _start_review_session(test_client)
+    monkeypatch.setattr(llm_matching, "MATCHING_MODE", "fast")
+    semantic = SemanticMatchResult(missing_critical=["Rust"], overall_fit=0.1)
+    gaps = [ContextualGap(gap_type="skill", missing="Rust", severity="critical")]
+
+    with patch("happyrav.main.summarize_job_ad", return_value="Rust role"), \
+         patch("happyrav.services.llm_matching.match_semantic_fast", return_value=({}, semantic, gaps)) as fast, \
+         patch("happyrav.services.llm_matching.extract_semantic_keywords") as keywords, \
+         patch("happyrav.services.llm_matching.detect_contextual_gaps") as detect, \
+         patch("happyrav.services.llm_kimi.generate_strategic_analysis", return_value={"summary": "s"}):
+        resp = test_client.post(f"/api/session/{session_id}/preview-match")
+
+    assert resp.status_code == 200
+    data = resp.json()
+    assert fast.call_count == 1
+    assert not keywords.called and not detect.called
+    assert set(data["stages"]) == {"job_summary", "semantic_fast", "strategic_analysis"}
+    assert data["match"]["matching_strategy"] == "hybrid"
+    assert data["match"]["contextual_gaps"][0]["missing"] == "Rust"
+
+
+def test_generate_content_runs_enhancements_concurrently_within_deadlines(monkeypatch):
+    from happyrav.models import ExperienceItem, ExtractedProfile
+    from happyrav.services import llm_kimi
+
+    monkeypatch.setenv("HAPPYRAV_STAGE_TIMEOUT_SKILL_RANKING", "0.2")
+    profile = ExtractedProfile(
+        full_name="Test User",
+        skills=["Python"],
+        experience=[ExperienceItem(role="Dev", company="Co", period="2020", achievements=["Shipped"])],
+    )
+
+    async def hang(**kwargs):
+        await asyncio.sleep(5)
+
+    async def score(**kwargs):
+        await asyncio.sleep(0.1)
+        return [{"original": "Shipped", "relevance": 0.9}]
+
+    captured = {}
+
+    async def fake_generate(language, job_ad_text, profile, source_documents, context, tone, doc_tags=None):
+        captured.update(context)
+        return "generated", None
+
+    with patch("happyrav.services.llm_matching.rank_skills_by_relevance", side_effect=hang), \
+         patch("happyrav.services.llm_matching.score_achievement_relevance", side_effect=score), \
+         patch.object(llm_kimi, "_generate", fake_generate):
+        started = time.perf_counter()
+        result = asyncio.run(llm_kimi.generate_content("en", "Python role", profile))
+        elapsed = time.perf_counter() - started
+
+    assert result == ("generated", None)
+    assert elapsed < 1.0
+    assert "skill_rankings" not in captured
+    assert captured["achievement_hints"]["high_relevance"][0]["original"] == "Shipped"
@@ -0,0 +1,116 @@
+"""Tests for token-aware prompt budgets."""
+from happyrav.models import ExtractedProfile
+from happyrav.services import llm_kimi, prompt_budget
+from happyrav.services.prompt_budget import clip_tokens, compact, count_tokens, fit_text, plan_documents
+
+
+class TestCompact:
+    def test_collapses_whitespace_and_blank_runs(self):
+        assert compact("Python   and\t\tSQL\n\n\n\nTeam lead") == "Python and SQL\n\nTeam lead"
+
+    def test_drops_page_furniture_at_page_breaks(self):
+        pages = []
+        for page in range(1, 4):
+            pages.append(f"Muster AG | Zeugnis\nContent of page {page}\nSeite {page} von 3\n-----")
+        text = compact("\f".join(pages))
+        assert "Seite" not in text
+        assert "---" not in text
+        assert [line for line in text.splitlines() if line] == [
+            "Muster AG | Zeugnis", "Content of page 1", "Content of page 2", "Content of page 3"
+        ]
+
+    def test_repeated_body_lines_survive(self):
+        cv = "\n".join(
+            line
+            for role, period in (("Engineer", "2015-2017"), ("Senior Engineer", "2017-2020"), ("Engineer", "2020-2023"))
+            for line in ("Swisscom AG", role, period, "Python", "Kubernetes", "12")
+        )
+        text = compact(cv)
+        assert text == cv
+        assert text.count("Swisscom AG") == 3
+        assert text.count("Engineer\n") == 3
+        assert text.count("Python") == 3
+
+    def test_repeated_lines_across_pages_are_kept_inside_the_page(self):
+        page = "Header\nSwisscom AG\nPython\nSwisscom AG\n2"
+        text = compact("\f".join([page] * 3))
+        assert text.count("Swisscom AG") == 6
+        assert text.count("Header") == 1
+        assert "\n2\n" not in text
+
+    def test_without_page_breaks_no_line_is_dropped(self):
+        lines = ["Seite 1 von 2", "Jane Doe", "3"] * 3
+        assert compact("\n".join(lines)).splitlines() == lines
+
+    def test_keeps_content_lines_with_numbers(self):
+        assert compact("2019 - 2023\nLed 12 engineers") == "2019 - 2023\nLed 12 engineers"
+
+
+class TestClip:
+    def test_short_text_is_untouched(self):
+        assert clip_tokens("short", 100) == "short"
+
+    def test_cut_prefers_a_line_boundary(self):
+        text = "\n".join(f"line {index:03d} of the document" for index in range(200))
+        clipped = clip_tokens(text, 300)
+        assert count_tokens(clipped) <= 300
+        assert clipped.endswith("of the document")
+
+    def test_fit_text_compacts_before_clipping(self):
+        assert fit_text("We   need\n\n\n\nRust", 100) == "We need\n\nRust"
+
+
+class TestPlan:
+    def test_cv_is_kept_before_a_long_reference_letter(self):
+        reference = "".join(f"Projekt {index}: sehr gute Leistung.\n" for index in range(2000))
+        cv = "Jane Doe\nSenior Engineer at Acme\n"
+        budget = plan_documents([reference, cv], ["arbeitszeugnis", "cv"], budget_tokens=500, max_chars=64000)
+        assert budget.documents[0].startswith("Jane Doe")
+        assert budget.warning.endswith(": arbeitszeugnis cut.")
+        assert budget.usage["kept_tokens"] <= 500
+
+    def test_lower_priority_documents_are_dropped_when_budget_is_spent(self):
+        budget = plan_documents(["a " * 4000, "b " * 10], ["cv", "other"], budget_tokens=100, max_chars=64000)
+        assert len(budget.documents) == 1
+        assert "other dropped" in budget.warning
+
+    def test_character_ceiling_applies_regardless_of_token_budget(self):
+        budget = plan_documents(["X" * 65000], None, budget_tokens=10**6, max_chars=64000, purpose="extraction")
+        assert len(budget.documents[0]) == 64000
+        assert "truncated" in budget.warning and "64k" in budget.warning
+
+    def test_fitting_documents_need_no_warning(self):
+        budget = plan_documents(["cv text", "letter"], ["cv", "certificate"], budget_tokens=1000, max_chars=64000)
+        assert budget.warning is None
+        assert [entry["tag"] for entry in budget.usage["documents"]] == ["cv", "certificate"]
+        assert budget.usage["tokenizer"] in ("tiktoken", "heuristic")
+
+    def test_custom_priority(self):
+        budget = plan_documents(["cv", "zeugnis"], ["cv", "arbeitszeugnis"], 100, 1000, priority=llm_kimi.MONSTER_TAG_PRIORITY)
+        assert budget.documents == ["zeugnis", "cv"]
+
+
+class TestPrompts:
+    def test_extraction_prompt_reports_usage(self, monkeypatch):
+        monkeypatch.setattr(llm_kimi, "EXTRACTION_TOKEN_BUDGET", 50)
+        prompt, warning, usage = llm_kimi._profile_extract_prompt(
+            "en", ["Zeugnis " * 400, "Jane Doe, Python"], ["arbeitszeugnis", "cv"]
+        )
+        assert prompt.index("Jane Doe") < prompt.index("Zeugnis")
+        assert "truncated for extraction" in warning
+        assert usage["prompt_tokens"] == count_tokens(prompt)
+        assert usage["budget_tokens"] == 50
+
+    def test_generation_prompt_uses_tags(self, monkeypatch):
+        monkeypatch.setattr(llm_kimi, "GENERATION_TOKEN_BUDGET", 20)
+        prompt, warning, _ = llm_kimi._generate_prompt(
+            "en", "Job", ExtractedProfile(full_name="Jane"), ["certificate text " * 50, "cv text"], None, ["certificate", "cv"]
+        )
+        assert "cv text" in prompt
+        assert "certificate cut" in warning
+
+    def test_heuristic_tokenizer_without_tiktoken(self, monkeypatch):
+        monkeypatch.setattr(prompt_budget, "tiktoken", None)
+        monkeypatch.setattr(prompt_budget, "_encoding", None)
+        assert count_tokens("x" * 10) == 3
+        assert prompt_budget.tokenizer_name() == "heuristic"
@@ -0,0 +1,177 @@
+"""Tests for the global disk quota across cache namespaces."""
+import secrets
+import time
+
+import pytest
+
+from happyrav.models import ArtifactRecord, MatchPayload, SessionState
+from happyrav.services.cache import (
+    ArtifactCache,
+    BlobStore,
+    DocumentCache,
+    SessionCache,
+    SessionRecord,
+    SqliteSessionCache,
+)
+from happyrav.services.quota import QuotaManager, quota_from_env
+
+
+def _session(cache, size: int = 2000) -> SessionRecord:
+    now = time.time()
+    state = SessionState(session_id=cache.create_session_id(), created_at=now, expires_at=now + 3600)
+    # Random text so compression does not hide the size.
+    return SessionRecord(state=state, document_texts={"d1": secrets.token_hex(size // 2)})
+
+
+def _artifact(cache: ArtifactCache) -> ArtifactRecord:
+    return ArtifactRecord(
+        token=cache.create_token(),
+        filename_cv="CV.pdf",
+        cv_html="",
+        match=MatchPayload(overall_score=80.0),
+        expires_at=time.time() + cache.ttl_seconds,
+        meta={"session_id": "s1", "notes": "a" * 2000},
+    )
+
+
+def _caches():
+    return {
+        "session": SessionCache(ttl_seconds=3600),
+        "document": DocumentCache(),
+        "artifact": ArtifactCache(ttl_seconds=3600, blobs=BlobStore()),
+    }
+
+
+class TestQuotaManager:
+    def test_water_marks_validated(self):
+        with pytest.raises(ValueError):
+            QuotaManager(max_bytes=100, high_water=0.5, low_water=0.9)
+
+    def test_usage_is_summed_across_namespaces(self, temp_data_dir):
+        caches = _caches()
+        quota = QuotaManager(max_bytes=10_000_000)
+        for name, cache in caches.items():
+            quota.register(name, cache)
+        caches["session"].set(_session(caches["session"]))
+        caches["document"].set("h", {"text": "t"})
+
+        snapshot = quota.snapshot()
+        assert snapshot["used_bytes"] == sum(usage["bytes"] for usage in snapshot["namespaces"].values())
+        assert snapshot["namespaces"]["session"]["entries"] == 1
+        assert snapshot["namespaces"]["document"]["entries"] == 1
+
+    def test_documents_and_artifacts_evicted_before_sessions(self, temp_data_dir):
+        caches = _caches()
+        sessions, documents, artifacts = caches["session"], caches["document"], caches["artifact"]
+        quota = QuotaManager(max_bytes=0)
+        for name, cache in caches.items():
+            quota.register(name, cache)
+
+        live = [_session(sessions) for _ in range(3)]
+        for record in live:
+            sessions.set(record)
+        for i in range(5):
+            documents.set(DocumentCache.content_key(bytes([i])), {"text": "d" * 2000})
+            artifacts.set(_artifact(artifacts))
+        quota.max_bytes = int(quota.used_bytes() / 0.85)  # just over the 0.8 low-water mark
+
+        documents.set(DocumentCache.content_key(b"trigger"), {"text": "d" * 4000})
+
+        assert quota.relief_runs == 1
+        assert quota.evicted_bytes["document"] > 0
+        assert "session" not in quota.evicted_bytes
+        assert all(sessions.get(record.state.session_id) for record in live)
+        assert quota.used_bytes() <= quota.max_bytes * quota.low_water
+
+    def test_sessions_go_last_resort(self, temp_data_dir):
+        sessions = SessionCache(ttl_seconds=3600)
+        quota = QuotaManager(max_bytes=0)
+        quota.register("session", sessions)
+        oldest, newest = _session(sessions), _session(sessions)
+        sessions.set(oldest)
+        sessions.set(newest)
+        quota.max_bytes = int(quota.used_bytes() * 0.9)
+
+        quota.relieve()
+        assert sessions.get(oldest.state.session_id) is None
+        assert sessions.get(newest.state.session_id) is not None
+
+    def test_disabled_quota_never_evicts(self, temp_data_dir):
+        sessions = SessionCache(ttl_seconds=3600)
+        quota = QuotaManager(max_bytes=0)
+        quota.register("session", sessions)
+        sessions.set(_session(sessions))
+        assert quota.relieve(force=True) == 0
+
+    def test_sqlite_sessions_report_live_pages_and_evict(self, temp_data_dir):
+        sessions = SqliteSessionCache(ttl_seconds=3600)
+        quota = QuotaManager(max_bytes=0)
+        quota.register("session", sessions)
+        records = [_session(sessions, size=20_000) for _ in range(4)]
+        for record in records:
+            sessions.set(record)
+        before = sessions.usage()["bytes"]
+
+        assert sessions.evict_bytes(1) > 0
+        assert sessions.get(records[0].state.session_id) is None
+        assert sessions.usage()["entries"] == 3
+        assert sessions.usage()["bytes"] < before
+
+    @pytest.mark.parametrize("cache_cls", [SessionCache, SqliteSessionCache])
+    def test_overwrites_report_the_size_delta(self, temp_data_dir, cache_cls):
+        sessions = cache_cls(ttl_seconds=3600)
+        quota = QuotaManager(max_bytes=0)
+        quota.register("session", sessions)
+        record = _session(sessions, size=20_000)
+        sessions.set(record)
+        quota.max_bytes = int(quota._estimate / 0.85)
+        after_first = quota._estimate
+
+        for index in range(20):
+            record.state.answers["q"] = str(index)
+            sessions.set(record)
+        assert quota._estimate - after_first < 100
+        assert quota.relief_runs == 0
+        assert sessions.get(record.state.session_id) is not None
+
+    @pytest.mark.parametrize("cache_cls", [SessionCache, SqliteSessionCache])
+    def test_delete_and_expiry_shrink_the_estimate(self, temp_data_dir, cache_cls):
+        sessions = cache_cls(ttl_seconds=3600)
+        quota = QuotaManager(max_bytes=0)
+        quota.register("session", sessions)
+        start = quota._estimate
+        kept, expired = _session(sessions, size=20_000), _session(sessions, size=20_000)
+        sessions.set(kept)
+        sessions.set(expired)
+        sessions.delete(kept.state.session_id)
+        assert quota._estimate - start < 30_000
+        sessions.sweep(now=time.time() + 7200)
+        assert quota._estimate - start < 1_000
+
+    def test_document_overwrite_reports_the_size_delta(self, temp_data_dir):
+        documents = DocumentCache()
+        quota = QuotaManager(max_bytes=0)
+        quota.register("document", documents)
+        key = DocumentCache.content_key(b"cv")
+        for _ in range(5):
+            documents.set(key, {"text": "x" * 5000})
+        assert quota._estimate == documents.usage()["bytes"]
+        documents.delete(key)
+        assert quota._estimate == 0
+
+    def test_from_env(self, temp_data_dir, monkeypatch):
+        monkeypatch.setenv("HAPPYRAV_DATA_MAX_BYTES", "123456")
+        monkeypatch.setenv("HAPPYRAV_DATA_HIGH_WATER", "0.95")
+        caches = _caches()
+        quota = quota_from_env(temp_data_dir, caches)
+        assert quota.max_bytes == 123456
+        assert quota.high_water == 0.95
+        assert caches["session"].quota is quota
+
+        monkeypatch.delenv("HAPPYRAV_DATA_MAX_BYTES")
+        assert quota_from_env(temp_data_dir, _caches()).max_bytes > 0
+
+
+def test_health_reports_storage(test_client):
+    storage = test_client.get("/health").json()["storage"]
+    assert {"max_bytes", "used_bytes", "high_water_bytes", "namespaces"} <= set(storage)
@@ -8,6 +8,7 @@ from happyrav.services.llm_matching import (
     rank_skills_by_relevance,
     score_achievement_relevance,
     detect_contextual_gaps,
+    match_semantic_fast,
     merge_match_scores,
 )
 from happyrav.models import (
@@ -303,3 +304,49 @@ async def test_achievement_scoring_suggests_metric_rich_rewrites(mock_llm):
     # Verify rewrite suggestions provided
     rewrites_count = sum(1 for a in result if a.get("rewrite_suggestion"))
     assert rewrites_count >= 2
+
+
+@pytest.mark.asyncio
+@patch("happyrav.services.llm_matching._chat_json_openai_async")
+async def test_fast_matching_returns_the_three_call_models_from_one_call(mock_llm):
+    """Fast mode should yield requirements, SemanticMatchResult and ContextualGaps from a single call."""
+    mock_llm.return_value = {
+        "requirements": {
+            "required_hard_skills": [{"skill": "AWS", "alternatives": ["Amazon Web Services"], "criticality": 0.9}],
+        },
+        "match": {
+            "matched_hard_skills": [{"skill": "Python", "evidence": "Listed in skills", "confidence": 0.95}],
+            "missing_critical": ["AWS"],
+            "transferable_matches": [{"cv_has": "GCP", "job_needs": "AWS", "confidence": 0.7}],
+            "overall_fit": 0.6,
+        },
+        "gaps": [
+            {"gap_type": "skill", "missing": "AWS", "severity": "critical", "substitutable": True, "suggestions": "Mention GCP"}
+        ],
+    }
+    profile = ExtractedProfile(
+        full_name="Test User",
+        skills=["Python", "GCP"],
+        experience=[ExperienceItem(role="Engineer", company="Acme", period="2019-2024", achievements=["Migrated to GCP"])],
+    )
+
+    requirements, semantic, gaps = await match_semantic_fast(profile, "We need AWS and Python engineers", language="en")
+
+    mock_llm.assert_called_once()
+    assert "We need AWS and Python" in mock_llm.call_args.kwargs["user"]
+    assert "Engineer at Acme" in mock_llm.call_args.kwargs["user"]
+    assert requirements["required_hard_skills"][0]["skill"] == "AWS"
+    assert isinstance(semantic, SemanticMatchResult)
+    assert semantic.overall_fit == 0.6
+    assert semantic.transferable_matches[0]["cv_has"] == "GCP"
+    assert gaps == [ContextualGap(gap_type="skill", missing="AWS", severity="critical", substitutable=True, suggestions="Mention GCP")]
+
+
+@pytest.mark.asyncio
+@patch("happyrav.services.llm_matching._chat_json_openai_async")
+async def test_fast_matching_tolerates_missing_sections(mock_llm):
+    mock_llm.return_value = {"match": {"overall_fit": 0.4}}
+    requirements, semantic, gaps = await match_semantic_fast(ExtractedProfile(full_name="X"), "Job", language="de")
+    assert requirements == {}
+    assert semantic.overall_fit == 0.4
+    assert gaps == []
@@ -0,0 +1,224 @@
+"""Tests for the versioned record encodings used by the disk caches."""
+import copy
+import pickle
+import time
+
+import pytest
+
+from happyrav.models import ArtifactRecord, DocumentMeta, ExtractedProfile, MatchPayload, SessionState
+from happyrav.services.cache import (
+    SESSION_SCHEMA,
+    ArtifactCache,
+    SessionCache,
+    SessionRecord,
+    SqliteSessionCache,
+)
+from happyrav.services.serialization import (
+    HEADER,
+    Codec,
+    RecordSchema,
+    SerializationError,
+    Serializer,
+    cache_format,
+)
+
+
+def _session(cache) -> SessionRecord:
+    session_id = cache.create_session_id()
+    now = time.time()
+    state = SessionState(session_id=session_id, created_at=now, expires_at=now + cache.ttl_seconds)
+    state.answers["q1"] = "yes"
+    return SessionRecord(
+        state=state,
+        document_texts={"d1": "CV text"},
+        llm_profile=ExtractedProfile(full_name="Jane Doe", skills=["Python"]),
+        llm_debug={"raw": b"\x00\xff"},
+        chat_history=[{"role": "user", "content": "hi"}],
+    )
+
+
+class TestCodecs:
+    @pytest.mark.parametrize("codec", ["json", "pickle"])
+    def test_session_round_trip(self, codec):
+        serializer = Serializer(SESSION_SCHEMA, codec)
+        state = SessionState(session_id="s1", created_at=1.0, expires_at=2.0)
+        record = SessionRecord(
+            state=state,
+            llm_profile=ExtractedProfile(full_name="Jane Doe"),
+            llm_debug={"raw": b"\x00\xff"},
+            version=3,
+        )
+        loaded = serializer.loads(serializer.dumps(record))
+        assert loaded == record
+
+    def test_msgpack_round_trip(self):
+        pytest.importorskip("msgpack")
+        serializer = Serializer(SESSION_SCHEMA, "msgpack")
+        record = SessionRecord(state=SessionState(session_id="s1"), document_texts={"d1": "text"})
+        assert serializer.loads(serializer.dumps(record)) == record
+
+    def test_any_codec_is_readable(self):
+        record = SessionRecord(state=SessionState(session_id="s1"))
+        payload = Serializer(SESSION_SCHEMA, "pickle").dumps(record)
+        assert Serializer(SESSION_SCHEMA, "json").loads(payload) == record
+
+    def test_incomplete_codec_fails_at_construction(self):
+        class EncodeOnly(Codec):
+            def encode(self, data):
+                return b""
+
+        with pytest.raises(TypeError, match="abstract"):
+            EncodeOnly()
+
+    def test_unknown_fields_are_ignored(self):
+        serializer = Serializer(SESSION_SCHEMA, "json")
+        payload = serializer.encode({"state": {"session_id": "s1", "removed_field": 1}, "gone": True})
+        assert serializer.loads(payload).state.session_id == "s1"
+
+
+class TestSchemaVersions:
+    def _schema(self, version: int) -> RecordSchema:
+        return RecordSchema("thing", version, to_dict=dict, from_dict=dict)
+
+    def test_migrations_upgrade_old_payloads(self):
+        old = Serializer(self._schema(1), "json").encode({"name": "Jane"})
+        schema = self._schema(2)
+
+        @schema.migration(1)
+        def _split_name(data):
+            return {"first_name": data.pop("name"), **data}
+
+        assert Serializer(schema, "json").loads(old) == {"first_name": "Jane"}
+
+    def test_missing_migration_is_an_error(self):
+        old = Serializer(self._schema(1), "json").encode({})
+        with pytest.raises(SerializationError):
+            Serializer(self._schema(3), "json").loads(old)
+
+    def test_newer_payload_is_rejected(self):
+        new = Serializer(self._schema(5), "json").encode({})
+        with pytest.raises(SerializationError):
+            Serializer(self._schema(1), "json").loads(new)
+
+
+class TestCacheFormats:
+    def test_default_is_framed_pickle_of_plain_data(self, temp_data_dir, monkeypatch):
+        monkeypatch.delenv("HAPPYRAV_SESSION_FORMAT", raising=False)
+        monkeypatch.delenv("HAPPYRAV_CACHE_FORMAT", raising=False)
+        cache = SessionCache(ttl_seconds=3600)
+        record = _session(cache)
+        cache.set(record)
+        payload = cache._path(record.state.session_id).read_bytes()
+        assert HEADER.unpack_from(payload)[1] == 3
+        # Plain dicts only: no model classes are referenced, so model changes cannot break loading.
+        assert b"happyrav" not in payload
+        assert cache.get(record.state.session_id).state == record.state
+
+    def test_format_selected_per_cache(self, monkeypatch):
+        monkeypatch.setenv("HAPPYRAV_CACHE_FORMAT", "json")
+        monkeypatch.setenv("HAPPYRAV_ARTIFACT_FORMAT", "pickle")
+        assert cache_format("session") == "json"
+        assert cache_format("artifact") == "pickle"
+        monkeypatch.setenv("HAPPYRAV_SESSION_FORMAT", "yaml")
+        with pytest.raises(ValueError):
+            cache_format("session")
+
+    def test_legacy_pickle_files_still_load(self, temp_data_dir):
+        cache = SessionCache(ttl_seconds=3600)
+        record = _session(cache)
+        cache._path(record.state.session_id).write_bytes(pickle.dumps(record))
+
+        loaded = SessionCache(ttl_seconds=3600).get(record.state.session_id)
+        assert loaded.llm_profile.full_name == "Jane Doe"
+
+    def test_unreadable_record_is_reported(self, temp_data_dir, capsys):
+        cache = ArtifactCache(ttl_seconds=3600)
+        token = cache.create_token()
+        cache._path(token).write_bytes(Serializer(RecordSchema("artifact", 99, dict, dict), "json").encode({}))
+
+        assert ArtifactCache(ttl_seconds=3600).get(token) is None
+        assert token in capsys.readouterr().out
+
+    def test_artifact_round_trip(self, temp_data_dir):
+        cache = ArtifactCache(ttl_seconds=3600, codec="json")
+        record = ArtifactRecord(
+            token=cache.create_token(),
+            filename_cv="CV.pdf",
+            cv_html="<html/>",
+            match=MatchPayload(overall_score=71.5, matched_keywords=["python"]),
+            expires_at=time.time() + 3600,
+        )
+        cache.set(record)
+        loaded = ArtifactCache(ttl_seconds=3600).get(record.token, include_html=False)
+        assert loaded.match.matched_keywords == ["python"]
+
+    def test_sqlite_reads_legacy_pickled_columns(self, temp_data_dir):
+        cache = SqliteSessionCache(ttl_seconds=3600)
+        record = _session(cache)
+        with cache._transaction() as conn:
+            conn.execute(
+                "INSERT INTO sessions (session_id, expires_at, state, document_texts, chat_history, extraction)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    record.state.session_id,
+                    time.time() + 3600,
+                    pickle.dumps(record.state),
+                    pickle.dumps(record.document_texts),
+                    pickle.dumps(record.chat_history),
+                    pickle.dumps({"llm_profile": record.llm_profile, "llm_warning": "w"}),
+                ),
+            )
+
+        loaded = cache.get(record.state.session_id)
+        assert loaded.state.answers == {"q1": "yes"}
+        assert loaded.document_texts == {"d1": "CV text"}
+        assert loaded.llm_profile.full_name == "Jane Doe"
+        assert loaded.llm_warning == "w"
+
+
+def _baseline_pickle(obj, *added):
+    """``obj`` pickled the way the code before the versioned format did: without the attributes added since."""
+    old = copy.copy(obj)
+    old.__dict__ = {name: value for name, value in vars(obj).items() if name not in added}
+    return pickle.dumps(old)
+
+
+class TestBaselineRecords:
+    def test_session_touch_and_refresh(self, temp_data_dir):
+        from happyrav import main
+
+        cache = SessionCache(ttl_seconds=3600)
+        record = _session(cache)
+        record.state.documents.append(DocumentMeta(
+            doc_id="d1", filename="cv.pdf", mime="application/pdf", tag="cv",
+            parse_method="pdf_text", confidence=0.9, size_bytes=7,
+        ))
+        payload = _baseline_pickle(record, "document_fragments", "document_digests", "version")
+        cache._path(record.state.session_id).write_bytes(payload)
+
+        touched = SessionCache(ttl_seconds=3600).touch(record.state.session_id)
+        assert touched.document_fragments == {}
+        assert touched.version == 1
+        refreshed = main._refresh_state(touched)
+        assert set(refreshed.document_digests) == {"d1"}
+        assert refreshed.llm_profile.full_name == "Jane Doe"
+
+    def test_artifact_download(self, test_client):
+        from happyrav import main
+
+        record = ArtifactRecord(
+            token=main.artifact_cache.create_token(),
+            filename_cv="CV.pdf",
+            cv_pdf_bytes=b"%PDF-baseline",
+            cv_html="<html>cv</html>",
+            match=MatchPayload(overall_score=71.5),
+            expires_at=time.time() + 3600,
+        )
+        payload = _baseline_pickle(record, "cv_pdf_hash", "cover_pdf_hash", "cv_html_hash", "cover_html_hash")
+        main.artifact_cache._path(record.token).write_bytes(payload)
+
+        response = test_client.get(f"/download/{record.token}/cv")
+        assert response.status_code == 200
+        assert response.content == b"%PDF-baseline"
+        assert test_client.get(f"/download/{record.token}/cover").status_code == 404
+        assert main.artifact_cache.get(record.token).cv_html == "<html>cv</html>"
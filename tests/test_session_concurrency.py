@@ -0,0 +1,134 @@
+"""Tests for atomic session writes and compare-and-set merging of stale records."""
+import os
+import threading
+import time
+
+import pytest
+
+from happyrav.models import SessionState
+from happyrav.services.cache import SessionCache, SessionRecord, SqliteSessionCache, merge_session_records
+
+BACKENDS = [SessionCache, SqliteSessionCache]
+
+
+def _seed(cache) -> str:
+    session_id = cache.create_session_id()
+    now = time.time()
+    state = SessionState(session_id=session_id, created_at=now, expires_at=now + cache.ttl_seconds)
+    cache.set(SessionRecord(state=state, document_texts={"cv.pdf": "CV text"}))
+    return session_id
+
+
+class TestAtomicWrites:
+    def test_failed_write_keeps_previous_record(self, temp_data_dir, monkeypatch):
+        cache = SessionCache(ttl_seconds=3600)
+        session_id = _seed(cache)
+        record = cache.get(session_id)
+        record.state.company_name = "NewCo"
+
+        def _crash(src, dst):
+            raise OSError("disk full")
+
+        with monkeypatch.context() as m:
+            m.setattr(os, "replace", _crash)
+            with pytest.raises(OSError):
+                cache.set(record)
+
+        fresh = SessionCache(ttl_seconds=3600)
+        assert fresh.get(session_id).document_texts == {"cv.pdf": "CV text"}
+        assert not list((temp_data_dir / "sessions").glob(".*.tmp"))
+
+
+class TestCompareAndSet:
+    @pytest.mark.parametrize("cache_cls", BACKENDS)
+    def test_versions_increase_per_write(self, temp_data_dir, cache_cls):
+        cache = cache_cls(ttl_seconds=3600)
+        session_id = _seed(cache)
+        assert cache.get(session_id).version == 1
+        record = cache.touch(session_id)
+        assert record.version == 2
+        assert cache.get(session_id).version == 2
+
+    @pytest.mark.parametrize("cache_cls", BACKENDS)
+    def test_stale_write_is_merged(self, temp_data_dir, cache_cls):
+        """/answer and /upload read the same version; neither change is lost."""
+        cache = cache_cls(ttl_seconds=3600)
+        session_id = _seed(cache)
+        answer = cache.get(session_id)
+        upload = cache.get(session_id)
+
+        answer.state.answers["q1"] = "yes"
+        cache.set(answer, fields=("state",))
+        upload.document_texts["letter.pdf"] = "Reference"
+        upload.state.phase = "review"
+        cache.set(upload)
+
+        stored = cache.get(session_id)
+        assert stored.state.answers == {"q1": "yes"}
+        assert stored.state.phase == "review"
+        assert set(stored.document_texts) == {"cv.pdf", "letter.pdf"}
+        assert stored.version == 3
+        assert cache.conflicts == 1
+        # The stale writer's in-memory record now reflects what was stored.
+        assert upload.state.answers == {"q1": "yes"}
+
+    @pytest.mark.parametrize("cache_cls", BACKENDS)
+    def test_concurrent_threads_do_not_lose_updates(self, temp_data_dir, cache_cls):
+        cache = cache_cls(ttl_seconds=3600)
+        session_id = _seed(cache)
+        start = threading.Barrier(8)
+
+        def _answer(i: int) -> None:
+            record = cache.get(session_id)
+            start.wait()
+            record.state.answers[f"q{i}"] = str(i)
+            cache.set(record, fields=("state",))
+
+        threads = [threading.Thread(target=_answer, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        stored = cache.get(session_id)
+        assert stored.state.answers == {f"q{i}": str(i) for i in range(8)}
+        assert stored.version == 9
+
+    def test_other_worker_write_invalidates_hot_tier(self, temp_data_dir):
+        worker_a = SessionCache(ttl_seconds=3600)
+        worker_b = SessionCache(ttl_seconds=3600)
+        session_id = _seed(worker_a)
+        assert worker_a.get(session_id).state.company_name == ""
+
+        record = worker_b.get(session_id)
+        record.state.company_name = "OtherWorker"
+        worker_b.set(record)
+
+        assert worker_a.get(session_id).state.company_name == "OtherWorker"
+
+
+class TestMerge:
+    def _record(self, **kwargs) -> SessionRecord:
+        return SessionRecord(state=SessionState(session_id="s"), **kwargs)
+
+    def test_chat_history_appends_are_combined(self):
+        base = self._record(chat_history=[{"role": "user", "content": "a"}])
+        mine = self._record(chat_history=base.chat_history + [{"role": "user", "content": "mine"}])
+        theirs = self._record(chat_history=base.chat_history + [{"role": "user", "content": "theirs"}])
+        merged = merge_session_records(base, mine, theirs)
+        assert [m["content"] for m in merged.chat_history] == ["a", "theirs", "mine"]
+
+    def test_same_field_conflict_prefers_later_writer(self):
+        base = self._record(llm_warning="")
+        mine = self._record(llm_warning="mine")
+        theirs = self._record(llm_warning="theirs", version=4)
+        merged = merge_session_records(base, mine, theirs)
+        assert merged.llm_warning == "mine"
+        assert merged.version == 4
+
+    def test_removed_keys_stay_removed(self):
+        base = self._record(document_texts={"a": "1", "b": "2"})
+        mine = self._record(document_texts={"a": "1"})
+        theirs = self._record(document_texts={"a": "1", "b": "2", "c": "3"})
+        merged = merge_session_records(base, mine, theirs)
+        assert merged.document_texts == {"a": "1", "c": "3"}
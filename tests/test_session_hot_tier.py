@@ -0,0 +1,96 @@
+"""Tests for the in-process LRU tier in front of SessionCache."""
+import builtins
+import time
+
+from happyrav.models import SessionState
+from happyrav.services.cache import LRUTier, SessionCache, SessionRecord
+
+
+def _record(cache: SessionCache, text: str = "") -> SessionRecord:
+    session_id = cache.create_session_id()
+    now = time.time()
+    state = SessionState(session_id=session_id, created_at=now, expires_at=now + cache.ttl_seconds)
+    return SessionRecord(state=state, document_texts={"doc": text} if text else {})
+
+
+class TestLRUTier:
+    def test_evicts_least_recently_used_by_entry_count(self):
+        tier = LRUTier(max_entries=2, max_bytes=1024)
+        tier.put("a", b"1")
+        tier.put("b", b"2")
+        assert tier.get("a") == b"1"
+        tier.put("c", b"3")
+        assert tier.get("b") is None
+        assert tier.get("a") == b"1"
+        assert tier.get("c") == b"3"
+        assert tier.stats()["evictions"] == 1
+
+    def test_evicts_by_byte_budget(self):
+        tier = LRUTier(max_entries=10, max_bytes=10)
+        tier.put("a", b"x" * 6)
+        tier.put("b", b"y" * 6)
+        assert tier.get("a") is None
+        assert tier.stats()["bytes"] == 6
+
+    def test_oversized_payload_is_not_cached(self):
+        tier = LRUTier(max_entries=10, max_bytes=4)
+        tier.put("a", b"too large")
+        assert len(tier) == 0
+
+    def test_counts_hits_and_misses(self):
+        tier = LRUTier(max_entries=10, max_bytes=1024)
+        tier.get("a")
+        tier.put("a", b"1")
+        tier.get("a")
+        stats = tier.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+
+class TestSessionHotTier:
+    def test_repeat_reads_skip_disk(self, temp_data_dir, monkeypatch):
+        cache = SessionCache(ttl_seconds=3600)
+        record = _record(cache, text="CV text")
+        cache.set(record)
+
+        real_open = builtins.open
+
+        def _guarded_open(path, mode="r", *args, **kwargs):
+            if "r" in mode and str(path).endswith(".pkl"):
+                raise AssertionError("session read from disk despite hot tier")
+            return real_open(path, mode, *args, **kwargs)
+
+        monkeypatch.setattr(builtins, "open", _guarded_open)
+        for _ in range(3):
+            loaded = cache.get(record.state.session_id)
+            assert loaded.document_texts["doc"] == "CV text"
+        assert cache.hot_stats()["hits"] == 3
+
+    def test_readers_get_independent_copies(self, temp_data_dir):
+        cache = SessionCache(ttl_seconds=3600)
+        record = _record(cache)
+        cache.set(record)
+
+        first = cache.get(record.state.session_id)
+        first.state.answers["q1"] = "unsaved"
+        second = cache.get(record.state.session_id)
+        assert "q1" not in second.state.answers
+
+    def test_disk_is_fallback_after_eviction(self, temp_data_dir):
+        cache = SessionCache(ttl_seconds=3600, hot_max_entries=1)
+        first = _record(cache, text="first")
+        second = _record(cache, text="second")
+        cache.set(first)
+        cache.set(second)
+
+        loaded = cache.get(first.state.session_id)
+        assert loaded.document_texts["doc"] == "first"
+        assert cache.hot_stats()["misses"] == 1
+
+    def test_delete_drops_hot_entry(self, temp_data_dir):
+        cache = SessionCache(ttl_seconds=3600)
+        record = _record(cache)
+        cache.set(record)
+        cache.delete(record.state.session_id)
+        assert cache.get(record.state.session_id) is None
+        assert cache.hot_stats()["entries"] == 0
@@ -0,0 +1,123 @@
+"""Tests for per-session locking and coalescing of duplicate extraction calls."""
+import asyncio
+import time
+
+import pytest
+
+from happyrav.models import DocumentMeta, ExtractedProfile, SessionState
+from happyrav.services.cache import SessionRecord
+from happyrav.services.locks import SessionLocks
+
+
+class TestSessionLocks:
+    @pytest.mark.asyncio
+    async def test_same_session_runs_one_at_a_time(self):
+        locks = SessionLocks()
+        order = []
+
+        async def _work(name: str) -> None:
+            async with locks.hold("s1"):
+                order.append(f"{name}-start")
+                await asyncio.sleep(0.01)
+                order.append(f"{name}-end")
+
+        await asyncio.gather(_work("a"), _work("b"))
+        assert order == ["a-start", "a-end", "b-start", "b-end"]
+        assert locks.stats()["locks"] == 0
+
+    @pytest.mark.asyncio
+    async def test_different_sessions_do_not_block(self):
+        locks = SessionLocks()
+        async with locks.hold("s1"):
+            await asyncio.wait_for(self._enter(locks, "s2"), timeout=1)
+
+    async def _enter(self, locks: SessionLocks, session_id: str) -> None:
+        async with locks.hold(session_id):
+            pass
+
+    @pytest.mark.asyncio
+    async def test_identical_calls_share_one_result(self):
+        locks = SessionLocks()
+        calls = 0
+
+        async def _expensive():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        results = await asyncio.gather(*(locks.coalesce(("s1", "sig"), _expensive) for _ in range(5)))
+        assert results == [1] * 5
+        assert calls == 1
+        assert locks.coalesced == 4
+        assert locks.inflight() == 0
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_caller_and_are_not_cached(self):
+        locks = SessionLocks()
+
+        async def _fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("provider down")
+
+        results = await asyncio.gather(
+            locks.coalesce("k", _fail), locks.coalesce("k", _fail), return_exceptions=True
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+        async def _ok():
+            return "ok"
+
+        assert await locks.coalesce("k", _ok) == "ok"
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_shared_work(self):
+        locks = SessionLocks()
+
+        async def _slow():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        leader = asyncio.ensure_future(locks.coalesce("k", _slow))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(locks.coalesce("k", _slow))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        assert await follower == "done"
+
+
+class TestExtractionCoalescing:
+    @pytest.mark.asyncio
+    async def test_duplicate_enrichment_issues_one_llm_call(self, monkeypatch):
+        from happyrav import main
+
+        calls = 0
+
+        async def _extract(language, source_documents, doc_tags=None):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.02)
+            return ExtractedProfile(full_name="Jane Doe"), None, {}
+
+        monkeypatch.setattr(main, "extract_profile_from_documents", _extract)
+        monkeypatch.setattr(main, "session_locks", SessionLocks())
+
+        def _record() -> SessionRecord:
+            state = SessionState(
+                session_id="s1",
+                documents=[
+                    DocumentMeta(
+                        doc_id="d1", filename="cv.pdf", mime="application/pdf", tag="cv",
+                        parse_method="pdf_text", confidence=1.0, size_bytes=10,
+                    )
+                ],
+                created_at=time.time(),
+            )
+            return SessionRecord(state=state, document_texts={"d1": "Jane Doe, Python engineer"})
+
+        first, second = await asyncio.gather(
+            main._enrich_profile_with_openai(_record()), main._enrich_profile_with_openai(_record())
+        )
+        assert calls == 1
+        assert first.llm_profile.full_name == second.llm_profile.full_name == "Jane Doe"
+        assert first.extraction_signature == second.extraction_signature
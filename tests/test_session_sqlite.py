@@ -0,0 +1,162 @@
+"""Tests for the SQLite (WAL) session backend."""
+import io
+import secrets
+import time
+
+import pytest
+
+from happyrav.models import SessionState
+from happyrav.services.cache import (
+    Namespace,
+    SessionCache,
+    SessionRecord,
+    SqliteSessionCache,
+    create_session_cache,
+)
+
+
+def _record(cache, **kwargs) -> SessionRecord:
+    session_id = cache.create_session_id()
+    now = time.time()
+    state = SessionState(session_id=session_id, created_at=now, expires_at=now + cache.ttl_seconds)
+    return SessionRecord(state=state, **kwargs)
+
+
+class TestSqliteSessionCache:
+    def test_round_trip_all_fields(self, temp_data_dir):
+        cache = SqliteSessionCache(ttl_seconds=3600)
+        record = _record(
+            cache,
+            document_texts={"d1": "CV text"},
+            photo_data_url="data:image/jpeg;base64,AAA",
+            signature_data_url="data:image/png;base64,BBB",
+            chat_history=[{"role": "user", "content": "hi"}],
+            extraction_signature="sig",
+            llm_warning="warn",
+        )
+        cache.set(record)
+
+        loaded = SqliteSessionCache(ttl_seconds=3600).get(record.state.session_id)
+        assert loaded.document_texts == {"d1": "CV text"}
+        assert loaded.photo_data_url == record.photo_data_url
+        assert loaded.signature_data_url == record.signature_data_url
+        assert loaded.chat_history == record.chat_history
+        assert loaded.extraction_signature == "sig"
+        assert loaded.llm_warning == "warn"
+
+    def test_uses_wal_journal(self, temp_data_dir):
+        cache = SqliteSessionCache(ttl_seconds=3600)
+        mode = cache._conn().execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode.lower() == "wal"
+
+    def test_partial_update_leaves_other_columns_untouched(self, temp_data_dir, monkeypatch):
+        cache = SqliteSessionCache(ttl_seconds=3600)
+        record = _record(cache, document_texts={"d1": "X" * 100_000})
+        cache.set(record)
+
+        written = []
+        original = SqliteSessionCache._column_values
+
+        def _spy(self, rec, columns):
+            columns = list(columns)
+            written.extend(columns)
+            return original(self, rec, columns)
+
+        monkeypatch.setattr(SqliteSessionCache, "_column_values", _spy)
+        record.state.answers["q1"] = "yes"
+        record.document_texts["d1"] = "changed but not saved"
+        cache.set(record, fields=("state",))
+
+        assert written == ["state"]
+        loaded = cache.get(record.state.session_id)
+        assert loaded.state.answers == {"q1": "yes"}
+        assert loaded.document_texts["d1"] == "X" * 100_000
+
+    def test_partial_update_of_missing_row_inserts_full_record(self, temp_data_dir):
+        cache = SqliteSessionCache(ttl_seconds=3600)
+        record = _record(cache, document_texts={"d1": "text"})
+        cache.set(record, fields=("state",))
+        assert cache.get(record.state.session_id).document_texts == {"d1": "text"}
+
+    def test_expired_rows_are_hidden_and_swept(self, temp_data_dir):
+        cache = SqliteSessionCache(ttl_seconds=60)
+        record = _record(cache)
+        cache.set(record)
+
+        assert cache.sweep(now=time.time() + 30) == 0
+        assert cache.sweep(now=time.time() + 61) == 1
+        assert cache.get(record.state.session_id) is None
+
+    def test_expiry_query_uses_index(self, temp_data_dir):
+        cache = SqliteSessionCache(ttl_seconds=60)
+        plan = cache._conn().execute(
+            "EXPLAIN QUERY PLAN DELETE FROM sessions WHERE expires_at <= ?", (time.time(),)
+        ).fetchall()
+        assert any("idx_sessions_expires_at" in str(row) for row in plan)
+
+
+    def test_max_bytes_evicts_sessions_closest_to_expiry(self, temp_data_dir):
+        cache = SqliteSessionCache(ttl_seconds=3600)
+        records = [_record(cache, document_texts={"d1": secrets.token_hex(10_000)}) for _ in range(4)]
+        cache.set(records[0])
+        cache.max_bytes = int(cache._stored_bytes() * 2.5)
+        for record in records[1:]:
+            cache.set(record)
+
+        assert cache.get(records[0].state.session_id) is None
+        assert all(cache.get(record.state.session_id) for record in records[2:])
+        assert cache._stored_bytes() <= cache.max_bytes
+        usage = cache.usage()
+        assert usage["max_bytes"] == cache.max_bytes
+        assert usage["evictions"] == 2
+
+    def test_oversized_session_is_kept_alone(self, temp_data_dir):
+        cache = SqliteSessionCache(ttl_seconds=3600, max_bytes=1_000)
+        record = _record(cache, document_texts={"d1": secrets.token_hex(5_000)})
+        cache.set(record)
+        assert cache.get(record.state.session_id) is not None
+
+    def test_budget_enforced_on_startup(self, temp_data_dir):
+        cache = SqliteSessionCache(ttl_seconds=3600)
+        for _ in range(4):
+            cache.set(_record(cache, document_texts={"d1": secrets.token_hex(10_000)}))
+        row_bytes = cache._stored_bytes() // 4
+        restarted = SqliteSessionCache(ttl_seconds=3600, max_bytes=int(row_bytes * 2.5))
+        assert restarted.usage()["entries"] == 2
+
+class TestBackendSelection:
+    def test_default_is_pickle(self, temp_data_dir, monkeypatch):
+        monkeypatch.delenv("HAPPYRAV_SESSION_BACKEND", raising=False)
+        assert isinstance(create_session_cache(ttl_seconds=60), SessionCache)
+
+    def test_sqlite_selected_by_env(self, temp_data_dir, monkeypatch):
+        monkeypatch.setenv("HAPPYRAV_SESSION_BACKEND", "sqlite")
+        assert isinstance(create_session_cache(ttl_seconds=60), SqliteSessionCache)
+
+    def test_sqlite_gets_the_namespace_size_budget(self, temp_data_dir, monkeypatch):
+        monkeypatch.setenv("HAPPYRAV_SESSION_BACKEND", "sqlite")
+        cache = create_session_cache(ns=Namespace("session", ttl_seconds=60, max_bytes=4096))
+        assert cache.usage()["max_bytes"] == 4096
+
+    def test_unknown_backend_rejected(self, temp_data_dir, monkeypatch):
+        monkeypatch.setenv("HAPPYRAV_SESSION_BACKEND", "mongodb")
+        with pytest.raises(ValueError):
+            create_session_cache(ttl_seconds=60)
+
+    def test_api_flow_on_sqlite_backend(self, test_client, mock_llm_extract, mock_ocr):
+        from happyrav import main
+
+        main.session_cache = SqliteSessionCache(ttl_seconds=3600)
+        resp = test_client.post(
+            "/api/session/start",
+            json={"language": "en", "job_ad_text": "Python developer", "consent_confirmed": True},
+        )
+        session_id = resp.json()["session_id"]
+        pdf_file = ("cv.pdf", io.BytesIO(b"%PDF-1.4\nCV"), "application/pdf")
+        assert test_client.post(f"/api/session/{session_id}/upload", files={"files": pdf_file}).status_code == 200
+        assert test_client.post(f"/api/session/{session_id}/language", json={"language": "de"}).status_code == 200
+
+        state = test_client.get(f"/api/session/{session_id}/state").json()["state"]
+        assert state["language"] == "de"
+        assert len(state["documents"]) == 1
+        assert main.session_cache.get(session_id).document_texts
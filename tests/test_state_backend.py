@@ -0,0 +1,216 @@
+"""Tests for the shared state backend and the caches built on it (two caches = two workers)."""
+import threading
+import time
+
+import pytest
+
+from happyrav.models import ArtifactRecord, MatchPayload, SessionState
+from happyrav.services.backends import LockTimeout, MemoryBackend, StateBackend, create_state_backend
+from happyrav.services.cache import (
+    RemoteArtifactCache,
+    RemoteBlobStore,
+    RemoteDocumentCache,
+    RemoteSessionCache,
+    SessionRecord,
+    create_session_cache,
+)
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _session(cache) -> SessionRecord:
+    session_id = cache.create_session_id()
+    now = time.time()
+    return SessionRecord(state=SessionState(session_id=session_id, created_at=now, expires_at=now + 3600))
+
+
+def _artifact(session_id: str, token: str) -> ArtifactRecord:
+    return ArtifactRecord(
+        token=token,
+        filename_cv="CV.pdf",
+        cv_pdf_bytes=b"%PDF-1.4 cv",
+        cv_html="<html>CV</html>",
+        match=MatchPayload(overall_score=80.0),
+        expires_at=time.time() + 600,
+        meta={"session_id": session_id},
+    )
+
+
+class TestMemoryBackend:
+    def test_ttl_is_set_with_the_value(self):
+        clock = _Clock()
+        backend = MemoryBackend(clock=clock)
+        backend.set("k", b"v", ttl=10)
+        clock.now += 9
+        assert backend.get("k") == b"v"
+        clock.now += 1
+        assert backend.get("k") is None
+        assert not backend.expire("k", 10)
+
+    def test_nx_only_sets_absent_keys(self):
+        backend = MemoryBackend()
+        assert backend.set("k", b"1", nx=True)
+        assert not backend.set("k", b"2", nx=True)
+        assert backend.get("k") == b"1"
+
+    def test_sorted_set_keeps_first_score(self):
+        backend = MemoryBackend()
+        backend.zadd("z", "a", 1)
+        backend.zadd("z", "b", 2)
+        backend.zadd("z", "a", 3)
+        assert backend.zrange("z") == ["a", "b"]
+
+    def test_lock_is_exclusive(self):
+        backend = MemoryBackend()
+        inside = []
+        overlaps = []
+
+        def worker():
+            for _ in range(20):
+                with backend.lock("lock:x"):
+                    inside.append(1)
+                    if len(inside) > 1:
+                        overlaps.append(1)
+                    time.sleep(0.0005)
+                    inside.pop()
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert overlaps == []
+
+    def test_expired_lease_can_be_taken_over_and_old_owner_cannot_release(self):
+        clock = _Clock()
+        backend = MemoryBackend(clock=clock)
+        backend.set("lock:x", b"crashed-owner", ttl=30, nx=True)
+        with pytest.raises(LockTimeout):
+            with backend.lock("lock:x", wait=0.01):
+                pass
+        clock.now += 31
+        with backend.lock("lock:x"):
+            assert not backend.release("lock:x", "crashed-owner")
+            assert backend.exists("lock:x")
+        assert not backend.exists("lock:x")
+
+
+    def test_incomplete_backend_fails_at_construction(self):
+        class GetOnly(StateBackend):
+            def get(self, key):
+                return None
+
+        with pytest.raises(TypeError, match="abstract"):
+            GetOnly()
+
+
+class TestRemoteSessionCache:
+    def test_workers_share_sessions(self):
+        backend = MemoryBackend()
+        worker_a = RemoteSessionCache(ttl_seconds=3600, backend=backend)
+        worker_b = RemoteSessionCache(ttl_seconds=3600, backend=backend)
+        record = _session(worker_a)
+        record.document_texts["d1"] = "CV text"
+        worker_a.set(record)
+        assert worker_b.get(record.state.session_id).document_texts["d1"] == "CV text"
+
+    def test_concurrent_writes_from_two_workers_merge(self):
+        backend = MemoryBackend()
+        worker_a = RemoteSessionCache(ttl_seconds=3600, backend=backend)
+        worker_b = RemoteSessionCache(ttl_seconds=3600, backend=backend)
+        record = _session(worker_a)
+        worker_a.set(record)
+        session_id = record.state.session_id
+
+        on_a = worker_a.get(session_id)
+        on_b = worker_b.get(session_id)
+        on_a.state.answers["q1"] = "a"
+        on_b.document_texts["d1"] = "b"
+        worker_a.set(on_a)
+        worker_b.set(on_b)
+
+        merged = worker_a.get(session_id)
+        assert merged.state.answers == {"q1": "a"}
+        assert merged.document_texts == {"d1": "b"}
+        assert worker_b.conflicts == 1
+
+    def test_records_expire_with_ttl(self):
+        clock = _Clock()
+        cache = RemoteSessionCache(ttl_seconds=60, backend=MemoryBackend(clock=clock))
+        record = _session(cache)
+        cache.set(record)
+        clock.now += 61
+        assert cache.get(record.state.session_id) is None
+        assert cache.sweep() == 0
+
+    def test_selected_by_env(self, monkeypatch):
+        monkeypatch.setenv("HAPPYRAV_SESSION_BACKEND", "redis")
+        assert isinstance(create_session_cache(ttl_seconds=60, state_backend=MemoryBackend()), RemoteSessionCache)
+        monkeypatch.delenv("HAPPYRAV_REDIS_URL", raising=False)
+        with pytest.raises(ValueError):
+            create_session_cache(ttl_seconds=60)
+
+    def test_no_redis_url_means_local_state(self, monkeypatch):
+        monkeypatch.delenv("HAPPYRAV_REDIS_URL", raising=False)
+        assert create_state_backend() is None
+
+
+class TestRemoteArtifacts:
+    def test_index_and_blobs_are_shared(self):
+        backend = MemoryBackend()
+        worker_a = RemoteArtifactCache(ttl_seconds=600, backend=backend)
+        worker_b = RemoteArtifactCache(ttl_seconds=600, backend=backend)
+        worker_a.set(_artifact("s1", "t1"))
+        worker_a.set(_artifact("s1", "t2"))
+        worker_a.set(_artifact("s1", "t1"))
+
+        assert worker_b.tokens_for_session("s1") == ["t1", "t2"]
+        record = worker_b.get("t2")
+        assert record.cv_html == "<html>CV</html>"
+        assert worker_b.blob_path(record.cv_pdf_hash) is None
+        assert worker_b.read_blob(record.cv_pdf_hash) == b"%PDF-1.4 cv"
+
+        worker_b.delete("t2")
+        assert worker_a.latest_for_session("s1") == "t1"
+
+    def test_blobs_are_stored_once_and_refreshed(self):
+        clock = _Clock()
+        blobs = RemoteBlobStore(MemoryBackend(clock=clock), ttl_seconds=100)
+        digest = blobs.put(b"pdf")
+        clock.now += 90
+        assert blobs.put(b"pdf") == digest
+        clock.now += 90
+        assert blobs.get(digest) == b"pdf"
+
+    def test_download_served_from_backend(self, test_client):
+        from happyrav import main
+
+        backend = MemoryBackend()
+        main.artifact_cache = RemoteArtifactCache(ttl_seconds=600, backend=backend)
+        main.artifact_cache.set(_artifact("s1", "t1"))
+        resp = test_client.get("/download/t1/cv")
+        assert resp.status_code == 200
+        assert resp.content == b"%PDF-1.4 cv"
+        assert "CV.pdf" in resp.headers["content-disposition"]
+        assert test_client.get("/download/t1/cover").status_code == 404
+
+
+class TestRemoteDocumentCache:
+    def test_hits_are_counted_and_refresh_ttl(self):
+        clock = _Clock()
+        cache = RemoteDocumentCache(MemoryBackend(clock=clock), ttl_seconds=100)
+        cache.set("h", {"text": "t", "parse_method": "ocr_image", "size_bytes": 10})
+        clock.now += 90
+        assert cache.get("h")["text"] == "t"
+        clock.now += 90
+        assert cache.get("h") is not None
+        assert cache.get("missing") is None
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["ocr_calls_saved"]) == (2, 1, 2)
+        assert "bytes" not in stats